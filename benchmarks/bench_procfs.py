@@ -0,0 +1,128 @@
+"""Compare the /proc fast path with the psutil path on a synthetic process table.
+
+Builds a fake /proc tree with N processes in a temporary directory, points
+both scanners at it and times full ``ProcessTracker.scan()`` passes.
+
+    python -m benchmarks.bench_procfs --processes 5000 --rounds 10
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import psutil
+from monitor.processes import ProcessTracker
+
+BOOT_TIME = 1700000000
+
+MEMINFO = """MemTotal:       16384000 kB
+MemFree:         8192000 kB
+MemAvailable:   12288000 kB
+Buffers:          256000 kB
+Cached:          3072000 kB
+SwapCached:            0 kB
+Active:          4096000 kB
+Inactive:        2048000 kB
+SwapTotal:       2048000 kB
+SwapFree:        2048000 kB
+Shmem:            128000 kB
+SReclaimable:     256000 kB
+"""
+
+
+def _stat_line(pid, name, utime, stime, starttime):
+    # Fields after the name, starting at "state" (field 3)
+    rest = ['S', '1', str(pid), str(pid), '0', '-1', '4194304', '100', '0', '0', '0',
+            str(utime), str(stime), '0', '0', '20', '0', '1', '0', str(starttime),
+            '10000000', '2500'] + ['0'] * 30
+    return f"{pid} ({name}) {' '.join(rest)}\n"
+
+
+def build_proc_tree(root, count, seed=0):
+    """Write a /proc-like tree with ``count`` processes under ``root``"""
+    rng = random.Random(seed)
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write("cpu  1000 0 1000 100000 0 0 0 0 0 0\n")
+        f.write(f"btime {BOOT_TIME}\n")
+    with open(os.path.join(root, 'meminfo'), 'w') as f:
+        f.write(MEMINFO)
+
+    processes = []
+    for pid in range(1, count + 1):
+        name = rng.choice(['bash', 'python3', 'kworker/0:1', 'my (odd) name', 'postgres'])
+        processes.append((pid, name, rng.randrange(100000), rng.randrange(100000),
+                          rng.randrange(1000000)))
+    for pid, name, utime, stime, starttime in processes:
+        directory = os.path.join(root, str(pid))
+        os.mkdir(directory)
+        with open(os.path.join(directory, 'stat'), 'w') as f:
+            f.write(_stat_line(pid, name, utime, stime, starttime))
+        with open(os.path.join(directory, 'statm'), 'w') as f:
+            f.write(f"{rng.randrange(100000, 1000000)} {rng.randrange(100, 100000)} "
+                    "500 100 0 2000 0\n")
+    return processes
+
+
+def advance(root, processes, ticks=50):
+    """Bump every process's CPU counters so scans see a delta"""
+    for i, (pid, name, utime, stime, starttime) in enumerate(processes):
+        utime += ticks
+        processes[i] = (pid, name, utime, stime, starttime)
+        with open(os.path.join(root, str(pid), 'stat'), 'w') as f:
+            f.write(_stat_line(pid, name, utime, stime, starttime))
+
+
+def time_scans(tracker, rounds):
+    tracker.scan()  # first pass populates the table
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        tracker.scan()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='srm-proc-')
+    original_procfs_path = psutil.PROCFS_PATH
+    try:
+        processes = build_proc_tree(root, args.processes)
+        psutil.PROCFS_PATH = root
+
+        procfs = ProcessTracker(scanner='procfs', proc_root=root)
+        portable = ProcessTracker(scanner='psutil')
+        procfs.scan()
+        portable.scan()
+        advance(root, processes)
+        procfs.scan()
+        portable.scan()
+
+        fast = {record['pid']: record for record in procfs.records()}
+        slow = {record['pid']: record for record in portable.records()}
+        mismatches = [pid for pid in fast
+                      if pid not in slow or fast[pid]['name'] != slow[pid]['name'] or
+                      fast[pid]['rss'] != slow[pid]['rss'] or
+                      abs(fast[pid]['create_time'] - slow[pid]['create_time']) > 0.01]
+
+        print(f"{args.processes} processes, {args.rounds} rounds")
+        print(f"records match: {not mismatches and len(fast) == len(slow)} "
+              f"({len(mismatches)} mismatches)")
+        results = {}
+        for label, tracker in (('procfs', procfs), ('psutil', portable)):
+            best, mean = time_scans(tracker, args.rounds)
+            results[label] = best
+            print(f"{label:>7}: best {best * 1000:8.2f} ms  mean {mean * 1000:8.2f} ms")
+        print(f"speedup: {results['psutil'] / results['procfs']:.1f}x")
+    finally:
+        psutil.PROCFS_PATH = original_procfs_path
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Deterministic stand-ins for psutil and the GPU sampler, used by the benchmarks.
+
+``FakePsutil`` implements the part of the psutil API the collector calls,
+backed by a synthetic machine whose counters move forward on ``advance()``.
+``patched(fake)`` swaps it into the monitor modules for the duration of a
+benchmark, so the real code paths run against a reproducible workload of
+any size.
+"""
+import contextlib
+import random
+from collections import namedtuple
+
+import psutil
+
+from monitor.gpu_backends import GpuReading
+
+CpuTimes = namedtuple('scputimes', 'user nice system idle iowait irq softirq steal '
+                                   'guest guest_nice')
+VirtualMemory = namedtuple('svmem', 'total available percent used free')
+DiskCounters = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes '
+                                     'read_time write_time')
+NetCounters = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv '
+                                   'errin errout dropin dropout')
+ProcessTimes = namedtuple('pcputimes', 'user system children_user children_system')
+MemoryInfo = namedtuple('pmem', 'rss vms')
+IoCounters = namedtuple('pio', 'read_count write_count read_bytes write_bytes')
+
+# Monitor modules that use psutil directly
+PATCHED_MODULES = ('monitor.collector', 'monitor.core', 'monitor.sampling',
+                   'monitor.processes')
+
+
+class FakeProcess:
+    def __init__(self, machine, pid):
+        info = machine.processes.get(pid)
+        if info is None:
+            raise psutil.NoSuchProcess(pid)
+        self.machine = machine
+        self.pid = pid
+
+    def _info(self):
+        info = self.machine.processes.get(self.pid)
+        if info is None:
+            raise psutil.NoSuchProcess(self.pid)
+        return info
+
+    @contextlib.contextmanager
+    def oneshot(self):
+        yield
+
+    def create_time(self):
+        return self._info()['create_time']
+
+    def name(self):
+        return self._info()['name']
+
+    def cpu_times(self):
+        info = self._info()
+        return ProcessTimes(info['user'], info['system'], 0.0, 0.0)
+
+    def memory_info(self):
+        return MemoryInfo(self._info()['rss'], 0)
+
+    def io_counters(self):
+        info = self._info()
+        if info['io'] is None:
+            raise psutil.AccessDenied(self.pid)
+        return IoCounters(0, 0, info['io'], info['io'] // 2)
+
+
+class FakePsutil:
+    """Synthetic machine with ``cores`` CPUs, ``processes`` processes and
+    ``disks``/``nics`` block devices and interfaces.
+
+    Each ``advance(seconds)`` moves every counter forward and replaces
+    ``churn`` of the processes with new PIDs, like short-lived jobs do.
+    """
+
+    NoSuchProcess = psutil.NoSuchProcess
+    AccessDenied = psutil.AccessDenied
+    ZombieProcess = psutil.ZombieProcess
+
+    def __init__(self, cores=8, processes=1000, disks=4, nics=4, churn=0.01, seed=0):
+        self.rng = random.Random(seed)
+        self.cores = cores
+        self.churn = churn
+        self.clock = 0.0
+        self.memory_total = 64 * 2 ** 30
+        self.cpu = [[0.0] * len(CpuTimes._fields) for _ in range(cores)]
+        self.disks = {f'sd{chr(97 + i)}': [0] * len(DiskCounters._fields)
+                      for i in range(disks)}
+        self.nics = {f'eth{i}': [0] * len(NetCounters._fields) for i in range(nics)}
+        self.nics['lo'] = [0] * len(NetCounters._fields)
+        self.processes = {}
+        self._next_pid = 1
+        for _ in range(processes):
+            self._spawn()
+        self._update_memory()
+
+    def _update_memory(self):
+        used = sum(info['rss'] for info in self.processes.values())
+        self.memory_used = min(used, self.memory_total)
+
+    def _spawn(self):
+        pid = self._next_pid
+        self._next_pid += 1
+        self.processes[pid] = {
+            'name': self.rng.choice(('bash', 'python3', 'postgres', 'nginx', 'java')),
+            'create_time': 1700000000.0 + self.clock,
+            'user': 0.0,
+            'system': 0.0,
+            'rss': self.rng.randrange(1, 512) * 2 ** 20,
+            'io': None if self.rng.random() < 0.3 else 0,  # some are unreadable
+            'load': self.rng.random() ** 4,  # a few busy processes, many idle ones
+        }
+
+    def advance(self, seconds=1.0):
+        rng = self.rng
+        self.clock += seconds
+        for core in self.cpu:
+            busy = rng.random() * seconds
+            core[0] += busy * 0.7
+            core[2] += busy * 0.3
+            core[3] += seconds - busy
+        for counters in self.disks.values():
+            reads, writes = rng.randrange(200), rng.randrange(200)
+            counters[0] += reads
+            counters[1] += writes
+            counters[2] += reads * 4096
+            counters[3] += writes * 4096
+        for counters in self.nics.values():
+            packets = rng.randrange(1000)
+            counters[0] += packets * 800
+            counters[1] += packets * 1200
+            counters[2] += packets
+            counters[3] += packets
+        for info in self.processes.values():
+            info['user'] += info['load'] * seconds * 0.8
+            info['system'] += info['load'] * seconds * 0.2
+            if info['io'] is not None:
+                info['io'] += int(info['load'] * 1e6 * seconds)
+        for pid in rng.sample(list(self.processes), int(len(self.processes) * self.churn)):
+            del self.processes[pid]
+            self._spawn()
+        self._update_memory()
+
+    # -- the psutil API used by the monitor --------------------------------
+
+    def cpu_count(self, logical=True):
+        return self.cores
+
+    def cpu_times(self, percpu=False):
+        if percpu:
+            return [CpuTimes(*core) for core in self.cpu]
+        return CpuTimes(*[sum(values) for values in zip(*self.cpu)])
+
+    def virtual_memory(self):
+        used = self.memory_used
+        return VirtualMemory(self.memory_total, self.memory_total - used,
+                             used / self.memory_total * 100, used, self.memory_total - used)
+
+    def disk_io_counters(self, perdisk=False):
+        return {name: DiskCounters(*counters) for name, counters in self.disks.items()}
+
+    def net_io_counters(self, pernic=False):
+        return {name: NetCounters(*counters) for name, counters in self.nics.items()}
+
+    def pids(self):
+        return list(self.processes)
+
+    def Process(self, pid):
+        return FakeProcess(self, pid)
+
+
+class FakeGpuSampler:
+    """GpuSampler replacement reporting ``devices`` GPUs with moving load"""
+
+    def __init__(self, devices=1, seed=0):
+        self.rng = random.Random(seed)
+        self.devices = devices
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read_devices(self):
+        return tuple(GpuReading(index, f'Fake GPU {index}', self.rng.random() * 100,
+                                self.rng.random() * 100, 60.0, 150.0)
+                     for index in range(self.devices))
+
+    def read(self):
+        devices = self.read_devices()
+        return (max((d.utilization for d in devices), default=0.0),
+                max((d.memory for d in devices), default=0.0))
+
+
+@contextlib.contextmanager
+def patched(fake):
+    """Point the monitor modules' ``psutil`` at ``fake``"""
+    import importlib
+    modules = [importlib.import_module(name) for name in PATCHED_MODULES]
+    originals = [module.psutil for module in modules]
+    for module in modules:
+        module.psutil = fake
+    try:
+        yield fake
+    finally:
+        for module, original in zip(modules, originals):
+            module.psutil = original
@@ -0,0 +1,125 @@
+"""Import-time report and startup budget check for the GUI and headless paths.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter,
+parses the report and checks two things: the total import time stays
+within the budget, and none of the heavy optional packages is imported on
+the startup path (they are loaded when a feature first needs them).
+
+    python -m benchmarks.startup_budget
+    python -m benchmarks.startup_budget --module monitor.collector --budget-ms 250
+
+Exits with status 1 when a check fails, so it can run in CI.
+"""
+import argparse
+import subprocess
+import sys
+
+# (module imported at startup, budget in ms)
+STARTUP_PATHS = (
+    ('monitor.system_monitor', 400),  # main.py, before the window appears
+    ('monitor.collector', 250),       # headless.py
+)
+
+# Only imported when the feature that needs them is used
+DEFERRED_PACKAGES = ('matplotlib', 'requests', 'GPUtil', 'pynvml', 'nvidia_ml_py3',
+                     'pyarrow', 'plyer')
+
+
+def parse_importtime(stderr):
+    """[(package, depth, self_us, cumulative_us)] in report order (children first)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        name = fields[2].rstrip()
+        package = name.lstrip()
+        depth = (len(name) - len(package) - 1) // 2
+        entries.append((package, depth, int(fields[0]), int(fields[1])))
+    return entries
+
+
+def importers(entries, index):
+    """Chain of packages that caused entries[index] to be imported"""
+    chain = []
+    depth = entries[index][1]
+    for package, parent_depth, _, _ in entries[index + 1:]:
+        if parent_depth < depth:
+            chain.append(package)
+            depth = parent_depth
+    return chain
+
+
+def run_importtime(code):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"running {code!r} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure(module, runs=3):
+    """Import ``module`` ``runs`` times in fresh interpreters; keep the fastest run.
+
+    Packages the bare interpreter already imports (site, encodings, ...)
+    are left out, so the total is what ``import module`` itself costs.
+    """
+    baseline = {package for package, *_ in run_importtime('pass')}
+    best = None
+    for _ in range(runs):
+        entries = [entry for entry in run_importtime(f'import {module}')
+                   if entry[0] not in baseline]
+        total = sum(cumulative for _, depth, _, cumulative in entries if depth == 0)
+        if best is None or total < best[0]:
+            best = (total, entries)
+    return best
+
+
+def report(module, budget_ms, runs=3, top=10):
+    """Print the report for one startup path; returns True if it passes"""
+    total, entries = measure(module, runs)
+    print(f"== {module}: {total / 1000:.1f} ms (budget {budget_ms} ms)")
+
+    print("   slowest imports (cumulative ms, self ms):")
+    for package, _, self_us, cumulative in sorted(entries, key=lambda e: -e[3])[:top]:
+        print(f"   {cumulative / 1000:8.1f} {self_us / 1000:8.1f}  {package}")
+
+    ok = total <= budget_ms * 1000
+    outermost = {}  # deferred package -> index of its shallowest entry
+    for index, (package, depth, _, _) in enumerate(entries):
+        root = package.split('.')[0]
+        if root in DEFERRED_PACKAGES and (root not in outermost or
+                                          depth < entries[outermost[root]][1]):
+            outermost[root] = index
+    for root, index in outermost.items():
+        chain = importers(entries, index)
+        print(f"   deferred package imported at startup: {entries[index][0]} "
+              f"(via {' <- '.join(chain) or module})")
+        ok = False
+    if total > budget_ms * 1000:
+        print(f"   over budget by {total / 1000 - budget_ms:.1f} ms")
+    print("   OK" if ok else "   FAIL")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', help="Check only this module")
+    parser.add_argument('--budget-ms', type=float, help="Budget for --module")
+    parser.add_argument('--runs', type=int, default=3,
+                        help="Fresh interpreters per module; the fastest counts")
+    parser.add_argument('--top', type=int, default=10, help="Packages listed per module")
+    args = parser.parse_args(argv)
+
+    paths = STARTUP_PATHS
+    if args.module:
+        budget = args.budget_ms or dict(STARTUP_PATHS).get(args.module, 400)
+        paths = ((args.module, budget),)
+    results = [report(module, budget, args.runs, args.top) for module, budget in paths]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
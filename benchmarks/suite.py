@@ -0,0 +1,360 @@
+"""Benchmarks for the sampling, process, rendering and export hot paths.
+
+Every benchmark drives the real monitor code against ``benchmarks.fakes``,
+so results depend on the code and the machine, not on what the machine
+happens to be running:
+
+  tick      one full collection tick (memory, GPU, disk, network, CPU,
+            history, rollups, alerts), as CollectionCore runs it
+  processes process table scan and the records + visible-row selection the
+            process view runs, for 100 to 20k processes
+  frame     graph frame render with the Agg backend (blit and full redraw)
+  export    CSV / NDJSON / NPZ export throughput from a filled history
+  memory    heap growth over simulated hours of ticks and process scans
+  spans     cost of one self-instrumentation timing span
+
+Results can be saved as a baseline and later runs compared against it;
+a metric that got worse by more than ``--tolerance`` is flagged and the
+exit status is 1.
+
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite                 # compare with the saved baseline
+    python -m benchmarks.suite --quick --only tick processes
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fakes import FakeGpuSampler, FakePsutil, patched
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Metrics ending in one of these are better when higher; all others when lower
+HIGHER_IS_BETTER = ('_per_s',)
+# Changes smaller than this are noise, whatever the relative change
+ABSOLUTE_SLACK = {'memory.growth_kib_per_hour': 256.0}
+
+
+def make_collector(**config):
+    """A Collector with no disk log, HTTP server or real GPU; call inside ``patched``"""
+    from monitor.collector import Collector
+    settings = {'storage_enabled': False, 'process_scanner': 'psutil'}
+    settings.update(config)
+    collector = Collector(settings)
+    collector.gpu_sampler = FakeGpuSampler(devices=2)
+    return collector
+
+
+class TickDriver:
+    """Runs CollectionCore's collectors by hand, one simulated tick at a time"""
+
+    def __init__(self, collector):
+        from monitor.core import CollectionCore
+        from monitor.sampling import CpuSampler
+        self.core = CollectionCore(collector)
+        self.loop = asyncio.new_event_loop()
+        self.core._loop = self.loop
+        self.core._executor = ThreadPoolExecutor(max_workers=collector.EXECUTOR_WORKERS)
+        self.core._cpu_sampler = CpuSampler()
+
+    async def _tick(self, timestamp, processes):
+        core = self.core
+        await core._collect_memory(timestamp, 0)
+        await core._collect_gpu(timestamp, 0)
+        await core._collect_disk(timestamp, 0)
+        await core._collect_network(timestamp, 0)
+        if processes:
+            await core._collect_processes(timestamp, 0)
+        await core._collect_cpu(timestamp, 0)
+
+    def tick(self, timestamp, processes=False):
+        self.loop.run_until_complete(self._tick(timestamp, processes))
+
+    def close(self):
+        self.core._executor.shutdown(wait=True)
+        self.loop.close()
+
+
+def percentiles(samples):
+    samples = np.asarray(samples)
+    return {'p50': float(np.percentile(samples, 50)),
+            'p99': float(np.percentile(samples, 99)),
+            'mean': float(samples.mean())}
+
+
+def bench_tick(quick):
+    """Per-tick latency of the collection path, without process scans"""
+    ticks = 500 if quick else 3000
+    with patched(FakePsutil(cores=64, processes=500)) as fake:
+        collector = make_collector()
+        driver = TickDriver(collector)
+        try:
+            now = time.time()
+            timings = []
+            for i in range(ticks):
+                fake.advance(1.0)
+                started = time.perf_counter()
+                driver.tick(now + i)
+                timings.append(time.perf_counter() - started)
+        finally:
+            driver.close()
+            collector.shutdown()
+    stats = percentiles(timings[ticks // 10:])  # skip the warm-up
+    return {f'tick.{name}_us': value * 1e6 for name, value in stats.items()}
+
+
+def bench_processes(quick):
+    """Steady-state scan latency per process table size, and the cost of
+    publishing the records and selecting the rows a ProcessTable shows"""
+    from monitor.processes import ProcessTracker
+    from monitor.process_view import select_rows
+    sizes = (100, 1000, 5000) if quick else (100, 1000, 5000, 20000)
+    rounds = 3 if quick else 5
+    results = {}
+    for size in sizes:
+        with patched(FakePsutil(processes=size)) as fake:
+            tracker = ProcessTracker(scanner='psutil')
+            tracker.scan()
+            scans, tables = [], []
+            for _ in range(rounds):
+                fake.advance(2.0)
+                started = time.perf_counter()
+                tracker.scan()
+                scans.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                select_rows(tracker.records(), 'cpu', True, 50)  # 25 rows + a page of slack
+                tables.append(time.perf_counter() - started)
+        results[f'processes.{size}.scan_ms'] = min(scans) * 1000
+        results[f'processes.{size}.table_ms'] = min(tables) * 1000
+    return results
+
+
+def bench_frame(quick):
+    """Graph frame time with the Agg backend, live view and a rollup range"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from monitor.gui import create_graph_artists, draw_frame
+
+    frames = 50 if quick else 200
+    results = {}
+    with patched(FakePsutil(processes=100)) as fake:
+        collector = make_collector()
+        driver = TickDriver(collector)
+        try:
+            now = time.time() - 7200
+            for i in range(7200 if not quick else 1200):
+                fake.advance(1.0)
+                driver.tick(now + i)
+
+            collector.GRAPH_RANGE = None
+            collector.GRAPH_MAX_POINTS = 300
+            collector.fig = Figure(figsize=(12, 8), dpi=100)
+            (collector.ax1, collector.ax2), (collector.ax3, collector.ax4) = \
+                collector.fig.subplots(2, 2)
+            collector.canvas = FigureCanvasAgg(collector.fig)
+            create_graph_artists(collector)
+            collector.canvas.draw()
+
+            for label, graph_range in (('live', None), ('range_1h', 3600)):
+                collector.GRAPH_RANGE = graph_range
+                draw_frame(collector)  # applies the layout change with a full draw
+                collector.canvas.draw()
+                timings = []
+                for i in range(frames):
+                    fake.advance(1.0)
+                    driver.tick(time.time())
+                    started = time.perf_counter()
+                    draw_frame(collector)
+                    timings.append(time.perf_counter() - started)
+                results[f'frame.{label}.p50_ms'] = statistics.median(timings) * 1000
+
+            timings = []
+            for _ in range(max(5, frames // 10)):
+                started = time.perf_counter()
+                collector.canvas.draw()
+                timings.append(time.perf_counter() - started)
+            results['frame.full_redraw.p50_ms'] = statistics.median(timings) * 1000
+        finally:
+            driver.close()
+            collector.shutdown()
+    return results
+
+
+def bench_export(quick):
+    """Rows per second written by each export format from a filled history"""
+    from monitor.export import ExportJob
+    from monitor.history import HistoryBuffer
+
+    rows = 20000 if quick else 200000
+    columns = ['cpu', 'memory', 'gpu', 'gpu_memory', 'disk_read', 'disk_write',
+               'net_rx', 'net_tx', 'gpu0_utilization', 'gpu0_memory']
+    history = HistoryBuffer(columns, capacity=rows)
+    rng = np.random.default_rng(0)
+    history.extend((time.time() - rows + np.arange(rows)) * 1000,
+                   {name: rng.random(rows).astype(np.float32) * 100 for name in columns})
+
+    results = {}
+    directory = tempfile.mkdtemp(prefix='srm-export-')
+    try:
+        for fmt in ('csv', 'ndjson', 'npz'):
+            job = ExportJob(history, os.path.join(directory, f'history.{fmt}'))
+            job.run()
+            if job.error is not None:
+                raise job.error
+            results[f'export.{fmt}.rows_per_s'] = job.rows / job.elapsed
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_memory(quick):
+    """Traced heap growth over simulated hours, after the buffers have filled"""
+    ticks = 1800 if quick else 4 * 3600  # one tick per simulated second
+    warmup = 600  # ticks before the first measurement
+    with patched(FakePsutil(processes=1000, churn=0.02)) as fake:
+        collector = make_collector(history_capacity=3600, process_history_slots=64)
+        driver = TickDriver(collector)
+        tracemalloc.start()
+        try:
+            now = time.time() - ticks
+            for i in range(ticks):
+                fake.advance(1.0)
+                driver.tick(now + i, processes=(i % 2 == 0))
+                if i == warmup:
+                    gc.collect()
+                    start_bytes = tracemalloc.get_traced_memory()[0]
+            gc.collect()
+            end_bytes = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+            driver.close()
+            collector.shutdown()
+    simulated_hours = (ticks - warmup) / 3600
+    return {'memory.growth_kib_per_hour': (end_bytes - start_bytes) / 1024 / simulated_hours,
+            'memory.heap_mib': end_bytes / 2 ** 20}
+
+
+def bench_spans(quick):
+    """Cost of timing one block with a span, including the histogram update"""
+    from monitor.instrumentation import Instrumentation
+    instruments = Instrumentation()
+    rounds = 100000 if quick else 1000000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        with instruments.span('bench'):
+            pass
+    return {'spans.overhead_ns': (time.perf_counter() - started) / rounds * 1e9}
+
+
+BENCHMARKS = {
+    'tick': bench_tick,
+    'spans': bench_spans,
+    'processes': bench_processes,
+    'frame': bench_frame,
+    'export': bench_export,
+    'memory': bench_memory,
+}
+
+
+def machine_info():
+    return {'platform': platform.platform(), 'python': platform.python_version(),
+            'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, tolerance):
+    """Print each metric next to its baseline; returns the regressed metric names"""
+    regressions = []
+    print(f"{'metric':<34} {'value':>12} {'baseline':>12} {'change':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<34} {value:12.2f} {'-':>12} {'':>8}")
+            continue
+        change = (value - base) / abs(base)
+        higher_better = name.endswith(HIGHER_IS_BETTER)
+        worse = -change if higher_better else change
+        flag = ''
+        if abs(value - base) <= ABSOLUTE_SLACK.get(name, 0):
+            pass
+        elif worse > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif worse < -tolerance:
+            flag = '  improved'
+        print(f"{name:<34} {value:12.2f} {base:12.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS),
+                        help="Run only these benchmarks")
+    parser.add_argument('--quick', action='store_true',
+                        help="Smaller workloads, for a fast sanity check")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="Baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Relative slowdown flagged as a regression (default 0.25)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        results.update(BENCHMARKS[name](args.quick))
+
+    document = {'machine': machine_info(), 'quick': args.quick, 'results': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(document, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get('machine') != document['machine']:
+            print("note: the baseline was recorded on a different machine", file=sys.stderr)
+        if stored.get('quick') != args.quick:
+            print("note: the baseline was recorded with a different --quick setting",
+                  file=sys.stderr)
+        baseline = stored.get('results', {})
+
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)
+            if stored.get('quick') == args.quick:
+                # Keep metrics of benchmarks that were not run this time
+                stored['results'].update(results)
+                results = stored['results']
+        document['results'] = results
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+    elif not baseline:
+        print("no baseline to compare with; run with --save-baseline first", file=sys.stderr)
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# headless.py - Run the collector without the GUI (no tkinter, matplotlib or plyer)
+import argparse
+import json
+import logging
+import signal
+import threading
+import time
+
+from monitor.collector import Collector
+from monitor.export import ExportJob
+from monitor.notifications import SINK_NAMES
+
+log = logging.getLogger("system_resource_monitor")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the System Resource Monitor collector without a GUI.")
+    parser.add_argument("--config", help="JSON file with collector settings, "
+                        "e.g. {\"cpu_threshold\": 90, \"cpu_mon_interval\": 2}")
+    parser.add_argument("--interval", type=float, dest="cpu_mon_interval",
+                        help="CPU sampling interval in seconds (one history row per tick)")
+    parser.add_argument("--memory-interval", type=float, dest="memory_mon_interval",
+                        help="Memory sampling interval in seconds")
+    parser.add_argument("--process-interval", type=float, dest="process_mon_interval",
+                        help="Process scan interval in seconds (0 disables scanning)")
+    parser.add_argument("--gpu-interval", type=float, dest="gpu_mon_interval",
+                        help="GPU sampling interval in seconds")
+    parser.add_argument("--adaptive", action="store_true", dest="adaptive_sampling",
+                        default=None, help="Vary the CPU, memory, disk and network "
+                        "interval: slower while idle, faster on change or near an alert")
+    parser.add_argument("--min-interval", type=float, dest="adaptive_min_interval",
+                        help="Shortest adaptive interval in seconds")
+    parser.add_argument("--max-interval", type=float, dest="adaptive_max_interval",
+                        help="Longest adaptive interval in seconds")
+    parser.add_argument("--cpu-threshold", type=float, help="CPU alert threshold (%%)")
+    parser.add_argument("--memory-threshold", type=float,
+                        help="Memory alert threshold (%%)")
+    parser.add_argument("--gpu-threshold", type=float, help="GPU alert threshold (%%)")
+    parser.add_argument("--notify", action="append", dest="notify_sinks",
+                        choices=SINK_NAMES,
+                        help="Alert sink; repeat for several (default: log)")
+    parser.add_argument("--notify-file", help="JSON-lines file for the 'file' sink")
+    parser.add_argument("--notify-webhook", help="URL the 'webhook' sink POSTs alerts to")
+    parser.add_argument("--notify-cooldown", type=float,
+                        help="Seconds before the same alert rule notifies again")
+    parser.add_argument("--history-capacity", type=int,
+                        help="Samples kept in the in-memory history buffer")
+    parser.add_argument("--http-port", type=int,
+                        help="Serve /snapshot, /history and /metrics on this port")
+    parser.add_argument("--http-host", help="Address for the HTTP endpoint "
+                        "(default 127.0.0.1)")
+    parser.add_argument("--data-dir", help="Directory for the on-disk metrics log")
+    parser.add_argument("--no-storage", action="store_false", dest="storage_enabled",
+                        default=None, help="Keep history in memory only")
+    parser.add_argument("--export", metavar="PATH",
+                        help="On exit, write the history to PATH (.csv, .ndjson, .npz"
+                        " or .parquet)")
+    parser.add_argument("--export-range", type=float, metavar="SECONDS",
+                        help="Only export the last SECONDS of history")
+    parser.add_argument("--duration", type=float,
+                        help="Stop after this many seconds (default: run until signalled)")
+    parser.add_argument("--log-interval", type=float, default=60,
+                        help="Seconds between status lines (0 disables them)")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    return parser.parse_args(argv)
+
+
+def load_config(args):
+    """Merge the JSON config file with CLI flags; flags win"""
+    config = {}
+    if args.config:
+        with open(args.config, "r") as f:
+            config.update(json.load(f))
+    for key in ("cpu_mon_interval", "memory_mon_interval", "gpu_mon_interval",
+                "process_mon_interval", "adaptive_sampling", "adaptive_min_interval",
+                "adaptive_max_interval", "cpu_threshold",
+                "memory_threshold", "gpu_threshold", "notify_sinks", "notify_file",
+                "notify_webhook", "notify_cooldown", "history_capacity",
+                "http_port", "http_host", "data_dir", "storage_enabled"):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+    # Alerts go to the log unless other sinks were asked for
+    config.setdefault("notify_sinks", ["log"])
+    return config
+
+
+def log_status(collector):
+    history = collector.history
+    if not len(history):
+        return
+    missed = sum(collector.core.missed.values()) if collector.core else 0
+    log.info("samples=%d cpu=%.1f%% memory=%.1f%% gpu=%.1f%% gpu_memory=%.1f%% "
+             "missed_ticks=%d self_cpu=%.1f%% self_rss=%.1fMB",
+             history.version, history.latest('cpu'), history.latest('memory'),
+             history.latest('gpu'), history.latest('gpu_memory'), missed,
+             history.latest('self_cpu'), history.latest('self_rss') / 1048576)
+    for name, summary in collector.instruments.snapshot().items():
+        log.debug("span %s: count=%d mean=%.3fms p99=%.3fms max=%.3fms", name,
+                  summary['count'], summary['mean'] * 1000, summary['p99'] * 1000,
+                  summary['max'] * 1000)
+
+
+def export_history(collector, path, seconds=None):
+    start = time.time() - seconds if seconds else None
+    try:
+        job = ExportJob(collector.history, path, start=start,
+                        instruments=collector.instruments)
+    except ValueError as e:
+        log.error("Export failed: %s", e)
+        return
+    job.run()
+    if job.error is not None:
+        log.error("Export failed: %s", job.error)
+    else:
+        log.info("Exported %d samples to %s in %.1fs", job.rows, path, job.elapsed)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    collector = Collector(load_config(args))
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    if args.duration:
+        timer = threading.Timer(args.duration, stop.set)
+        timer.daemon = True
+        timer.start()
+
+    if collector.ADAPTIVE_SAMPLING:
+        log.info("Collector started (adaptive interval %s-%ss)",
+                 collector.ADAPTIVE_MIN_INTERVAL, collector.ADAPTIVE_MAX_INTERVAL)
+    else:
+        log.info("Collector started (interval %ss)", collector.CPU_MON_INTERVAL)
+    collector.start_collecting()
+    if collector.http_server is not None:
+        log.info("Serving metrics on http://%s:%d/metrics",
+                 collector.http_server.host, collector.http_server.port)
+    try:
+        while not stop.wait(args.log_interval or None):
+            log_status(collector)
+    finally:
+        collector.shutdown()
+        log_status(collector)
+        if args.export:
+            export_history(collector, args.export, args.export_range)
+        log.info("Collector stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import math
+import numpy as np
+
+# Columns whose movement between two ticks counts as a change
+WATCHED_COLUMNS = ('cpu', 'memory', 'gpu', 'gpu_memory')
+
+
+class AdaptiveInterval:
+    """Sampling interval that widens while the host is quiet.
+
+    ``update`` is called with every CPU tick's values and the alert
+    engine's headroom. The interval snaps back to ``minimum`` when a
+    watched column moved by ``change`` percentage points or more since the
+    previous tick, or when an alert rule is within ``margin`` of its
+    threshold (as a fraction of the rule's range); otherwise it grows by
+    ``backoff`` per tick up to ``maximum``.
+    """
+
+    def __init__(self, minimum=0.5, maximum=5.0, change=5.0, margin=0.1, backoff=1.5,
+                 columns=WATCHED_COLUMNS):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.change = change
+        self.margin = margin
+        self.backoff = backoff
+        self.columns = list(columns)
+        self.interval = minimum
+        self.reason = None  # why the interval was last tightened
+        self._previous = None
+
+    def update(self, values, headroom=()):
+        """Fold in one tick; returns the interval until the next one"""
+        vector = np.array([values.get(name, math.nan) for name in self.columns],
+                          dtype=np.float64)
+        previous, self._previous = self._previous, vector
+        with np.errstate(invalid='ignore'):
+            moved = previous is not None and bool(
+                (np.abs(vector - previous) >= self.change).any())
+            near = bool((np.asarray(headroom) < self.margin).any())
+
+        if moved or near:
+            self.reason = 'change' if moved else 'threshold'
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.interval * self.backoff, self.maximum)
+        return self.interval
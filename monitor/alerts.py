@@ -0,0 +1,265 @@
+import numpy as np
+from .history import FIRST_SAMPLE_WEIGHT, MAX_SAMPLE_WEIGHT
+
+RULE_KINDS = ('sustained', 'rate', 'p95', 'hysteresis')
+
+# Samples kept per watched column; windows longer than this many samples
+# are evaluated over the most recent RING_SIZE samples only
+RING_SIZE = 4096
+P95_BINS = 200
+
+
+class AlertRule:
+    """One declarative alert rule.
+
+    kind:
+      sustained   ``column`` beyond ``threshold`` for ``duration`` seconds
+      rate        change of ``column`` over the last ``window`` seconds,
+                  per second, beyond ``threshold``
+      p95         95th percentile of ``column`` over ``window`` seconds beyond
+                  ``threshold``; values are binned over ``value_range`` and
+                  weighted by the time each sample stands for
+      hysteresis  fires beyond ``threshold`` and clears only once back past
+                  ``clear``
+
+    ``threshold`` is a number or the name of a collector setting such as
+    ``'CPU_THRESHOLD'``, read on every tick so changes apply immediately.
+    ``below=True`` turns "above" into "below" for every kind.
+    """
+
+    def __init__(self, name, column, kind, threshold, duration=0, window=60,
+                 clear=None, below=False, value_range=(0, 100), title=None, message=None):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"unknown alert kind {kind!r}")
+        self.name = name
+        self.column = column
+        self.kind = kind
+        self.threshold = threshold
+        self.duration = duration
+        self.window = window
+        self.clear = clear
+        self.below = below
+        self.value_range = value_range
+        self.title = title or f"{column} alert"
+        self.message = message or f"{name}: {{value:.1f}} (threshold {{threshold:g}})"
+
+    def format(self, value, threshold):
+        return self.message.format(value=value, threshold=threshold,
+                                   duration=self.duration, window=self.window)
+
+
+def default_rules():
+    """The classic sustained-threshold alerts, tied to the GUI thresholds"""
+    return [
+        AlertRule('cpu_sustained', 'cpu', 'sustained', 'CPU_THRESHOLD', duration=60,
+                  title="CPU Alert",
+                  message="CPU usage over {threshold:g}% for {duration}s"),
+        AlertRule('memory_sustained', 'memory', 'sustained', 'MEMORY_THRESHOLD',
+                  duration=120, title="Memory Alert",
+                  message="Memory usage over {threshold:g}% for {duration}s"),
+        AlertRule('gpu_sustained', 'gpu', 'sustained', 'GPU_THRESHOLD', duration=60,
+                  title="GPU Alert",
+                  message="GPU usage over {threshold:g}% for {duration}s"),
+    ]
+
+
+class AlertEngine:
+    """Evaluates every rule in one vectorised pass per sample.
+
+    The engine keeps a mirrored ring of recent values for the columns its
+    rules watch, so the samples inside any window are one contiguous slice.
+    Per tick it finds every rule's window start with a single searchsorted,
+    keeps sustained-since times and hysteresis states as arrays, and keeps
+    a histogram per p95 rule that is updated only by the samples entering
+    and leaving the window. The work per sample therefore depends on the
+    number of rules, never on how long their windows are.
+
+    ``evaluate`` returns the rules that started firing on this sample; a
+    rule fires again only after it has cleared.
+    """
+
+    def __init__(self, rules, settings=None):
+        self.rules = list(rules)
+        self.settings = settings
+        self.columns = sorted({rule.column for rule in self.rules})
+        count = len(self.rules)
+        kinds = np.array([rule.kind for rule in self.rules], dtype=object)
+
+        self._column = np.array([self.columns.index(rule.column) for rule in self.rules],
+                                dtype=np.int64)
+        self._sign = np.array([-1.0 if rule.below else 1.0 for rule in self.rules])
+        self._duration = np.array([rule.duration for rule in self.rules], dtype=np.float64)
+        self._window = np.array([rule.window for rule in self.rules], dtype=np.float64)
+        self._range = np.array([rule.value_range[1] - rule.value_range[0]
+                                for rule in self.rules], dtype=np.float64)
+        self._sustained = kinds == 'sustained'
+        self._rate = kinds == 'rate'
+        self._p95 = kinds == 'p95'
+        self._hysteresis = kinds == 'hysteresis'
+        self._windowed = self._rate | self._p95
+
+        self._since = np.full(count, np.nan)  # sustained: first time beyond threshold
+        self._active = np.zeros(count, dtype=bool)
+        self.values = np.full(count, np.nan)  # last evaluated value per rule
+        self.thresholds = None  # thresholds used in the last evaluation
+
+        # Mirrored ring: sample i lives at slot and slot + RING_SIZE
+        self._ring = np.full((2 * RING_SIZE, max(1, len(self.columns))), np.nan)
+        self._times = np.zeros(2 * RING_SIZE)
+        self._weights = np.zeros(2 * RING_SIZE)  # seconds each sample stands for
+        self._seq = 0  # samples pushed so far
+        self._tail = np.zeros(count, dtype=np.int64)  # first sequence number in window
+
+        self._p95_rules = np.flatnonzero(self._p95)
+        self._p95_low = np.array([self.rules[i].value_range[0] for i in self._p95_rules],
+                                 dtype=np.float64)
+        self._p95_span = np.array([self.rules[i].value_range[1] - self.rules[i].value_range[0]
+                                   for i in self._p95_rules], dtype=np.float64)
+        self._histogram = np.zeros((len(self._p95_rules), P95_BINS))
+
+    def _thresholds(self, attribute='threshold'):
+        values = []
+        for rule in self.rules:
+            value = getattr(rule, attribute)
+            if value is None:
+                value = rule.threshold
+            if isinstance(value, str):
+                value = getattr(self.settings, value)
+            values.append(float(value))
+        return np.array(values)
+
+    def _bins(self, values, owners):
+        """Histogram bin of each value for the p95 rules in ``owners``; NaN is -1"""
+        scaled = (values - self._p95_low[owners]) / self._p95_span[owners] * P95_BINS
+        bins = np.clip(np.nan_to_num(scaled, nan=-1), -1, P95_BINS - 1).astype(np.int64)
+        bins[np.isnan(values)] = -1
+        return bins
+
+    def _slot(self, seq):
+        return seq % RING_SIZE
+
+    def _expire(self, new_tail):
+        """Drop the samples that slid out of each p95 window, all rules at once"""
+        rules = self._p95_rules
+        old_tail = self._tail[rules]
+        leaving = np.maximum(new_tail[rules] - old_tail, 0)
+        if leaving.any():
+            owners = np.repeat(np.arange(len(rules)), leaving)
+            offsets = np.arange(leaving.sum()) - np.repeat(np.cumsum(leaving) - leaving,
+                                                           leaving)
+            seqs = old_tail[owners] + offsets
+            slots = self._slot(seqs)
+            values = self._ring[slots, self._column[rules][owners]]
+            bins = self._bins(values, owners)
+            valid = bins >= 0
+            np.subtract.at(self._histogram, (owners[valid], bins[valid]),
+                           self._weights[slots][valid])
+            self._tail[rules] = np.maximum(new_tail[rules], old_tail)
+
+    def _push(self, vector, timestamp):
+        # Samples about to be overwritten leave every window first
+        oldest_kept = self._seq + 1 - RING_SIZE
+        if oldest_kept > 0 and len(self._p95_rules):
+            self._expire(np.maximum(self._tail, oldest_kept))
+        self._tail = np.where(self._windowed, np.maximum(self._tail, oldest_kept),
+                              self._tail)
+
+        weight = FIRST_SAMPLE_WEIGHT
+        if self._seq:
+            elapsed = timestamp - self._times[self._slot(self._seq - 1)]
+            weight = min(max(elapsed, 0.0), MAX_SAMPLE_WEIGHT)
+
+        slot = self._slot(self._seq)
+        self._ring[slot] = vector
+        self._ring[slot + RING_SIZE] = vector
+        self._times[slot] = timestamp
+        self._times[slot + RING_SIZE] = timestamp
+        self._weights[slot] = weight
+        self._weights[slot + RING_SIZE] = weight
+        self._seq += 1
+
+        rules = self._p95_rules
+        if len(rules):
+            owners = np.arange(len(rules))
+            bins = self._bins(vector[self._column[rules]], owners)
+            valid = bins >= 0
+            np.add.at(self._histogram, (owners[valid], bins[valid]), weight)
+
+    def _p95_values(self):
+        cumulative = np.cumsum(self._histogram, axis=1)
+        totals = cumulative[:, -1]
+        # Tolerate the rounding left behind by adding and removing weights
+        index = np.argmax(cumulative >= (0.95 * totals - 1e-9)[:, None], axis=1)
+        p95 = self._p95_low + (index + 1) / P95_BINS * self._p95_span
+        return np.where(totals > 1e-9, p95, np.nan)
+
+    def evaluate(self, values, timestamp):
+        """Fold in one sample; return [(rule, value, threshold)] newly firing"""
+        if not self.rules:
+            return []
+        vector = np.array([values.get(name, np.nan) for name in self.columns],
+                          dtype=np.float64)
+        self._push(vector, timestamp)
+        current = vector[self._column]
+        threshold = self._thresholds()
+
+        # Window starts for every rule with one binary search
+        held = min(self._seq, RING_SIZE)
+        end = self._slot(self._seq - 1) + RING_SIZE + 1
+        times = self._times[end - held:end]
+        first = np.searchsorted(times, timestamp - self._window, side='left')
+        # Never move backwards, even if the wall clock does
+        new_tail = np.where(self._windowed,
+                            np.maximum(self._seq - held + first, self._tail), self._tail)
+
+        if len(self._p95_rules):
+            self._expire(new_tail)
+        self._tail = new_tail
+
+        value = current.copy()
+        if self._rate.any():
+            rows = self._slot(new_tail[self._rate])
+            then = self._ring[rows, self._column[self._rate]]
+            elapsed = timestamp - self._times[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value[self._rate] = np.where(elapsed > 0,
+                                             (current[self._rate] - then) / elapsed, np.nan)
+        if len(self._p95_rules):
+            value[self._p95_rules] = self._p95_values()
+
+        with np.errstate(invalid='ignore'):
+            beyond = self._sign * value > self._sign * threshold
+
+            # Sustained: remember when the value first went beyond the threshold
+            self._since = np.where(beyond, np.where(np.isnan(self._since), timestamp,
+                                                    self._since), np.nan)
+            firing = np.where(self._sustained,
+                              beyond & (timestamp - self._since >= self._duration), beyond)
+
+            # Hysteresis: once active, stay active until back past the clear level
+            if self._hysteresis.any():
+                clear = self._thresholds('clear')
+                still = self._sign * value > self._sign * clear
+                firing = np.where(self._hysteresis & self._active, still, firing)
+
+        started = firing & ~self._active
+        self._active = firing
+        self.values = value
+        self.thresholds = threshold
+        return [(self.rules[i], float(value[i]), float(threshold[i]))
+                for i in np.flatnonzero(started)]
+
+    def headroom(self):
+        """Distance of each rule's last value from its threshold as a fraction
+        of the rule's value range; zero or less once beyond it, NaN if unknown.
+        Rate rules are NaN too: their values are not on the column's scale."""
+        if not self.rules or self.thresholds is None:
+            return np.full(len(self.rules), np.nan)
+        with np.errstate(invalid='ignore'):
+            headroom = self._sign * (self.thresholds - self.values) / self._range
+        headroom[self._rate] = np.nan
+        return headroom
+
+    def active(self):
+        """Names of the rules currently firing"""
+        return [self.rules[i].name for i in np.flatnonzero(self._active)]
@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+import numpy as np
+import psutil
+from .core import CollectionCore
+from .history import CoreHistory, HistoryBuffer
+from .rollup import RollupStore
+from .hardware import get_capabilities
+from .gpu_backends import GpuSampler
+from .http_server import MetricsServer
+from .storage import SegmentLog, list_segments
+from .processes import ProcessTracker
+from .io_rates import (CounterRates, DEVICE_LABELS, DISK_FIELDS, NET_FIELDS,
+                       PARTITION_PATTERN, VIRTUAL_NIC_PATTERN)
+from .process_history import ProcessHistoryStore
+from .alerts import AlertEngine, AlertRule, default_rules
+from .notifications import NotificationDispatcher, build_sinks
+from .instrumentation import SELF_COLUMNS, Instrumentation
+from .adaptive import AdaptiveInterval
+
+METRICS = ['cpu', 'memory', 'gpu', 'gpu_memory', 'disk_read', 'disk_write', 'net_rx', 'net_tx']
+
+# Recorded in the raw history only, without rollup tiers
+IO_COUNT_COLUMNS = ['disk_iops', 'net_rx_packets', 'net_tx_packets']
+
+log = logging.getLogger("system_resource_monitor")
+
+
+class Collector:
+    """Sampling, alerting and storage pipeline without any GUI dependency.
+
+    ``config`` maps setting names (case-insensitive, e.g. ``cpu_threshold``)
+    to values and is applied before any buffer is allocated.
+    """
+
+    def __init__(self, config=None):
+        self.CPU_THRESHOLD = 85
+        self.MEMORY_THRESHOLD = 90
+        self.GPU_THRESHOLD = 99.5
+        # AlertRule keyword dicts; None keeps the sustained CPU/memory/GPU alerts
+        self.ALERT_RULES = None
+        # Alert delivery: 'desktop', 'log', 'file' (NOTIFY_FILE, JSON lines) or
+        # 'webhook' (NOTIFY_WEBHOOK); sinks run on the dispatcher's own thread
+        self.NOTIFY_SINKS = ['desktop']
+        self.NOTIFY_FILE = os.path.join(os.path.expanduser('~'), '.system_resource_monitor',
+                                        'alerts.jsonl')
+        self.NOTIFY_WEBHOOK = None
+        self.NOTIFY_TIMEOUT = 5
+        self.NOTIFY_COOLDOWN = 300  # seconds before the same rule notifies again
+        self.NOTIFY_BATCH_WINDOW = 2  # alerts within this many seconds share one batch
+        self.HISTORY_LENGTH = 60
+        self.HISTORY_CAPACITY = 86400  # one day of samples at a 1 s interval
+        self.CORE_HISTORY_LENGTH = 300  # per-core samples kept for the heatmap
+        # Each metric is sampled at its own rate; one history row per CPU tick
+        self.CPU_MON_INTERVAL = 1
+        self.MEMORY_MON_INTERVAL = 1
+        self.GPU_MON_INTERVAL = 2
+        self.PROCESS_MON_INTERVAL = 2  # None or 0 disables process scanning
+        self.DISK_MON_INTERVAL = 1
+        self.NETWORK_MON_INTERVAL = 1
+        self.SELF_MON_INTERVAL = 1  # the monitor's own CPU, RSS and threads
+        # Adaptive mode: CPU, memory, disk and network share one interval that
+        # grows while values are stable and drops to the minimum on a change
+        # of ADAPTIVE_CHANGE points or within ADAPTIVE_MARGIN of an alert
+        self.ADAPTIVE_SAMPLING = False
+        self.ADAPTIVE_MIN_INTERVAL = 0.5
+        self.ADAPTIVE_MAX_INTERVAL = 5
+        self.ADAPTIVE_CHANGE = 5  # percentage points between two ticks
+        self.ADAPTIVE_MARGIN = 0.1  # fraction of an alert rule's value range
+        self.IO_MAX_DEVICES = 4  # disks and NICs (each) with their own history columns
+        self.EXECUTOR_WORKERS = 2  # threads for blocking psutil calls
+        self.PROCESS_SCANNER = 'auto'  # 'procfs' (Linux fast path), 'psutil' or 'auto'
+        self.PROCESS_EXPORT_COUNT = 20  # rows written by Export Processes
+        self.PROCESS_HISTORY_SLOTS = 64  # busiest processes that keep a history
+        self.PROCESS_HISTORY_LENGTH = 120  # scans kept per process
+        self.HOTPLUG_INTERVAL = 300  # seconds between background GPU re-probes
+        self.HTTP_HOST = '127.0.0.1'
+        self.HTTP_PORT = None  # set to serve /snapshot, /history and /metrics
+        self.STORAGE_ENABLED = True
+        self.DATA_DIR = os.path.join(os.path.expanduser('~'), '.system_resource_monitor',
+                                     'segments')
+        self.SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+        self.SEGMENT_MAX_AGE = 6 * 3600
+        self.FSYNC_INTERVAL = 5
+        self.STORAGE_RETENTION_BYTES = 256 * 1024 * 1024
+
+        for key, value in (config or {}).items():
+            setattr(self, key.upper(), value)
+
+        # Probe GPUs and backends (including NVML init) on the hot-plug timer
+        # thread right away, so startup never waits on it; everything else
+        # reads the cached result
+        self.capabilities = get_capabilities()
+        self.capabilities.start_hotplug_timer(self.HOTPLUG_INTERVAL, first=0)
+        self.instruments = Instrumentation()
+        self.gpu_sampler = GpuSampler(self.capabilities, self.GPU_MON_INTERVAL,
+                                      self.instruments)
+
+        self.history = HistoryBuffer(METRICS, capacity=self.HISTORY_CAPACITY)
+        for name in IO_COUNT_COLUMNS:
+            self.history.add_column(name)
+        # Sampler ticks skipped because the previous one overran
+        self.history.add_column('missed_ticks')
+        for name in SELF_COLUMNS:
+            self.history.add_column(name)
+        self.rollups = RollupStore(self.history, METRICS)
+        self.core_history = CoreHistory(psutil.cpu_count() or 1, self.CORE_HISTORY_LENGTH)
+        self.gpu_devices = {}  # device index -> name, filled as devices report
+        self.disk_rates = CounterRates(DISK_FIELDS, PARTITION_PATTERN)
+        self.net_rates = CounterRates(NET_FIELDS, VIRTUAL_NIC_PATTERN)
+        # 'disk'/'net' -> device names that have per-device history columns
+        self.io_devices = {'disk': [], 'net': []}
+        self.process_tracker = ProcessTracker(self.PROCESS_SCANNER)
+        self.process_history = ProcessHistoryStore(self.PROCESS_HISTORY_SLOTS,
+                                                   self.PROCESS_HISTORY_LENGTH)
+        if self.ALERT_RULES is None:
+            rules = default_rules()
+        else:
+            rules = [AlertRule(**rule) for rule in self.ALERT_RULES]
+        self.alerts = AlertEngine(rules, self)
+        self.adaptive = AdaptiveInterval(self.ADAPTIVE_MIN_INTERVAL, self.ADAPTIVE_MAX_INTERVAL,
+                                         self.ADAPTIVE_CHANGE, self.ADAPTIVE_MARGIN)
+        self.notifications = NotificationDispatcher(build_sinks(self), self.NOTIFY_COOLDOWN,
+                                                    self.NOTIFY_BATCH_WINDOW)
+
+        self.storage = None
+        if self.STORAGE_ENABLED:
+            try:
+                self.storage = SegmentLog(self.DATA_DIR, self.SEGMENT_MAX_BYTES,
+                                          self.SEGMENT_MAX_AGE, self.FSYNC_INTERVAL,
+                                          self.STORAGE_RETENTION_BYTES)
+                segments = list_segments(self.storage.directory)
+            except OSError:
+                self.storage = None
+
+        self.monitoring = False
+        self.core = None
+        self.snapshot = None  # latest consistent sample, replaced once per tick
+        self.http_server = None
+
+        # Replaying a long log takes a while, so it runs off the constructor
+        # and merges in ahead of whatever has been sampled by the time it ends
+        self.restore_thread = None
+        if self.storage is not None:
+            self.restore_thread = threading.Thread(target=self.restore_history, args=(segments,),
+                                                   name='restore-history', daemon=True)
+            self.restore_thread.start()
+
+    def restore_history(self, segments):
+        """Reload the most recent samples from the on-disk ``segments``
+        (those present at start) in front of the live history"""
+        try:
+            chunks = self.storage.read_recent(self.HISTORY_CAPACITY, segments)
+        except OSError:
+            return
+        if not chunks:
+            return
+
+        columns = []
+        for segment, _ in chunks:
+            columns.extend(name for name in segment.columns if name not in columns)
+        timestamps = np.concatenate([records['ts'] for _, records in chunks])
+        values = {name: np.concatenate([
+            records[name] if name in segment.columns else np.full(len(records), np.nan)
+            for segment, records in chunks]) for name in columns}
+
+        with self.history.lock:
+            for name in columns:
+                self.history.add_column(name)
+            for segment, _ in chunks:
+                for index, name in segment.meta.get('gpu_devices', {}).items():
+                    self.gpu_devices.setdefault(int(index), name)
+                for prefix, names in segment.meta.get('io_devices', {}).items():
+                    tracked = self.io_devices.setdefault(prefix, [])
+                    for name in names:
+                        if name in tracked:
+                            continue
+                        # Also the columns an older log did not have yet
+                        for label in DEVICE_LABELS.get(prefix, ()):
+                            self.history.add_column(f"{prefix}_{name}_{label}")
+                        tracked.append(name)
+
+        keep = len(timestamps)
+        while keep:
+            # Fold the restored samples into fresh tiers before taking the lock;
+            # the store is private until it replaces the live one below
+            rollups = RollupStore(self.history, METRICS)
+            rollups.lock = threading.RLock()
+            rollups.extend(timestamps[:keep] / 1000,
+                           {name: data[:keep] for name, data in values.items()})
+
+            with self.history.lock:
+                live_timestamps, live = self.history.read(METRICS)
+                if len(live_timestamps):
+                    # Only samples older than the first live one go in front
+                    older = int(np.searchsorted(timestamps[:keep], live_timestamps[0], 'left'))
+                    if older < keep:
+                        keep = older
+                        continue  # rebuild the tiers without the overlap
+                self.history.prepend(timestamps[:keep],
+                                     {name: data[:keep] for name, data in values.items()})
+                rollups.lock = self.history.lock
+                rollups.extend(live_timestamps / 1000, live)
+                self.rollups = rollups
+                return
+
+    def notify(self, title, message, key=None):
+        """Queue an alert for the notification sinks; never blocks"""
+        self.notifications.submit(title, message, key)
+
+    def publish_processes(self, records):
+        """Called with every process scan; views override this to show them"""
+
+    def start_collecting(self):
+        """Start the GPU backend and the collection core"""
+        if self.monitoring:
+            return
+        self.monitoring = True
+        self.gpu_sampler.start()
+        self.notifications.start()
+        if self.storage is not None:
+            self.storage.start()
+        self.core = CollectionCore(self, self.EXECUTOR_WORKERS)
+        self.core.start()
+
+        if self.HTTP_PORT is not None and self.http_server is None:
+            server = MetricsServer(self, self.HTTP_HOST, self.HTTP_PORT)
+            try:
+                server.start()
+            except OSError as e:
+                log.error("Could not serve metrics on %s:%s: %s",
+                          self.HTTP_HOST, self.HTTP_PORT, e)
+            else:
+                self.http_server = server
+
+    def stop_collecting(self):
+        self.monitoring = False
+        if self.core is not None:
+            # Returns once in-flight samples are recorded, before the log closes
+            self.core.stop()
+        self.gpu_sampler.stop()
+        self.notifications.stop()
+        if self.storage is not None:
+            self.storage.close()
+
+    def shutdown(self):
+        """Stop sampling and every background timer"""
+        self.stop_collecting()
+        self.capabilities.stop_hotplug_timer()
+        if self.http_server is not None:
+            self.http_server.stop()
+            self.http_server = None
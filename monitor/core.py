@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+
+from .monitor import (disk_values, gpu_device_values, network_values, record_sample,
+                      scan_processes)
+from .sampling import CpuSampler
+
+MIN_INTERVAL = 0.05
+# Collectors that follow the adaptive interval when it is enabled
+ADAPTIVE_COLLECTORS = ('memory', 'disk', 'network', 'cpu')
+
+
+class CollectionCore:
+    """asyncio collection core: one task per collector on a private loop.
+
+    CPU, memory, GPU, process, disk and network collectors each run as a
+    task at their own rate on monotonic deadlines; overrun ticks are
+    skipped and counted in ``missed``, and every run is timed into the
+    ``collect.<name>`` span. Blocking psutil calls go to a small bounded
+    thread pool, so a slow process scan never delays a CPU tick.
+    Collectors only ever write to ``latest`` from the loop thread; the CPU
+    task turns it into one snapshot per tick, which is recorded to the
+    history and published as ``collector.snapshot``.
+
+    With ``ADAPTIVE_SAMPLING`` the CPU, memory, disk and network collectors
+    share the interval of ``collector.adaptive`` instead of their fixed
+    ones; when the CPU tick tightens it, the others are woken to sample
+    right away rather than at the end of their longer sleep.
+
+    ``stop()`` cancels every task, waits for them and the pool to finish
+    and only then returns, so the history and disk log are quiet
+    afterwards.
+    """
+
+    def __init__(self, collector, max_workers=2):
+        self.collector = collector
+        self.max_workers = max_workers
+        self.latest = {}
+        self.missed = {}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._executor = None
+        self._started = threading.Event()
+        self._wake = None  # set (and replaced) when the adaptive interval tightens
+
+    def _collectors(self):
+        """(name, interval getter, coroutine function) for every collector"""
+        c = self.collector
+
+        def sampled(setting):
+            return lambda: c.adaptive.interval if c.ADAPTIVE_SAMPLING else getattr(c, setting)
+
+        collectors = [
+            ('memory', sampled('MEMORY_MON_INTERVAL'), self._collect_memory),
+            ('gpu', lambda: c.GPU_MON_INTERVAL, self._collect_gpu),
+            ('disk', sampled('DISK_MON_INTERVAL'), self._collect_disk),
+            ('network', sampled('NETWORK_MON_INTERVAL'), self._collect_network),
+            ('cpu', sampled('CPU_MON_INTERVAL'), self._collect_cpu),
+            ('self', lambda: c.SELF_MON_INTERVAL, self._collect_self),
+        ]
+        if c.PROCESS_MON_INTERVAL:
+            collectors.append(('processes', lambda: c.PROCESS_MON_INTERVAL,
+                               self._collect_processes))
+        return collectors
+
+    def _blocking(self, func, *args):
+        return self._loop.run_in_executor(self._executor, func, *args)
+
+    async def _every(self, name, interval, collect, first=0.0):
+        """Run ``collect(timestamp, missed)`` on a drift-free deadline grid,
+        starting ``first`` seconds from now"""
+        c = self.collector
+        instruments = c.instruments
+        span = f'collect.{name}'
+        adaptive = name in ADAPTIVE_COLLECTORS
+        if first:
+            await asyncio.sleep(first)
+        deadline = self._loop.time()
+        while True:
+            step = max(float(interval()), MIN_INTERVAL)
+            missed = max(0, int((self._loop.time() - deadline) // step))
+            deadline += missed * step
+            self.missed[name] += missed
+            started = time.perf_counter_ns()
+            try:
+                await collect(time.time(), missed)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            instruments.record(span, time.perf_counter_ns() - started)
+            # Re-read: the interval may have changed during this run
+            deadline += max(float(interval()), MIN_INTERVAL)
+            delay = max(0.0, deadline - self._loop.time())
+            if not (adaptive and c.ADAPTIVE_SAMPLING):
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                deadline = self._loop.time()  # sample now, on a new grid
+
+    def _tighten(self):
+        """Wake every sleeping collector to sample at the new, shorter interval"""
+        self._wake.set()
+        self._wake = asyncio.Event()
+
+    async def _collect_memory(self, timestamp, missed):
+        memory = await self._blocking(psutil.virtual_memory)
+        self.latest['memory'] = memory.percent
+
+    async def _collect_gpu(self, timestamp, missed):
+        # Published by the GPU backend's own thread; never blocks on GPU I/O.
+        # The aggregate series follow the busiest device.
+        sampler = self.collector.gpu_sampler
+        self.latest['gpu_devices'] = sampler.read_devices()
+        self.latest['gpu'], self.latest['gpu_memory'] = sampler.read()
+
+    async def _collect_disk(self, timestamp, missed):
+        counters = await self._blocking(psutil.disk_io_counters, True)
+        self.collector.disk_rates.update(counters, time.monotonic())
+        self.latest['disk'] = disk_values(self.collector, self.collector.disk_rates)
+
+    async def _collect_network(self, timestamp, missed):
+        counters = await self._blocking(psutil.net_io_counters, True)
+        self.collector.net_rates.update(counters, time.monotonic())
+        self.latest['network'] = network_values(self.collector, self.collector.net_rates)
+
+    async def _collect_processes(self, timestamp, missed):
+        await self._blocking(scan_processes, self.collector)
+
+    async def _collect_self(self, timestamp, missed):
+        self.latest['self'] = await self._blocking(
+            self.collector.instruments.sample_process)
+
+    async def _collect_cpu(self, timestamp, missed):
+        c = self.collector
+        cpu_percent_per_core = await self._blocking(self._cpu_sampler.sample)
+        latest = self.latest
+        values = {
+            'cpu': float(cpu_percent_per_core.mean()),
+            'memory': latest.get('memory', float('nan')),
+            'gpu': latest.get('gpu', 0.0),
+            'gpu_memory': latest.get('gpu_memory', 0.0),
+            'missed_ticks': missed,
+        }
+        values.update(gpu_device_values(c, latest.get('gpu_devices', ())))
+        values.update(latest.get('disk', {}))
+        values.update(latest.get('network', {}))
+        values.update(latest.get('self', {}))
+
+        record_sample(c, values, timestamp)
+        c.core_history.append(cpu_percent_per_core)
+        c.snapshot = {'timestamp': timestamp, 'values': values,
+                      'per_core': cpu_percent_per_core}
+        for rule, value, threshold in c.alerts.evaluate(values, timestamp):
+            c.notify(rule.title, rule.format(value, threshold), rule.name)
+        if c.ADAPTIVE_SAMPLING:
+            previous = c.adaptive.interval
+            if c.adaptive.update(values, c.alerts.headroom()) < previous:
+                self._tighten()
+
+    async def _main(self):
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._cpu_sampler = CpuSampler()
+        tasks = []
+        for name, interval, collect in self._collectors():
+            self.missed.setdefault(name, 0)
+            # The CPU sampler was primed just now; its first delta needs a
+            # full interval to mean anything
+            first = max(float(interval()), MIN_INTERVAL) if name == 'cpu' else 0.0
+            tasks.append(asyncio.create_task(self._every(name, interval, collect, first),
+                                             name=f'collect-{name}'))
+        self._started.set()
+
+        await self._stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='collector')
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            # Blocking calls already handed to the pool finish before we return
+            self._executor.shutdown(wait=True)
+            self._loop.close()
+            self._started.set()
+
+    def start(self):
+        """Start the loop thread; returns once every collector task exists"""
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name='collection-core',
+                                        daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+
+    def stop(self, timeout=10):
+        """Cancel every collector and wait for in-flight work to finish"""
+        if self._thread is None:
+            return
+        if self._loop is not None and self._stop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                pass  # the loop already exited
+        self._thread.join(timeout=timeout)
+        self._thread = None
@@ -0,0 +1,284 @@
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import numpy as np
+
+from .gpu_backends import GPU_FIELDS
+
+# pyarrow is only imported when a Parquet export actually runs
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# File extension -> export format
+EXPORT_FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.npz': 'npz',
+                  '.parquet': 'parquet'}
+CHUNK_ROWS = 8192  # samples copied out of the history per lock
+
+COLUMN_LABELS = {
+    'cpu': "CPU (%)",
+    'memory': "Memory (%)",
+    'gpu': "GPU (%)",
+    'gpu_memory': "GPU Memory (%)",
+    'disk_read': "Disk Read (B/s)",
+    'disk_write': "Disk Write (B/s)",
+    'disk_iops': "Disk IOPS",
+    'net_rx': "Net RX (B/s)",
+    'net_tx': "Net TX (B/s)",
+    'net_rx_packets': "Net RX (packets/s)",
+    'net_tx_packets': "Net TX (packets/s)",
+    'missed_ticks': "Missed Ticks",
+    'self_cpu': "Monitor CPU (% of one core)",
+    'self_rss': "Monitor RSS (B)",
+    'self_threads': "Monitor Threads",
+}
+GPU_DEVICE_LABELS = dict(zip(GPU_FIELDS, ("Util (%)", "Memory (%)", "Temp (C)", "Power (W)")))
+IO_DEVICE_LABELS = {('disk', 'read'): "Read (B/s)", ('disk', 'write'): "Write (B/s)",
+                    ('disk', 'read_ops'): "Reads/s", ('disk', 'write_ops'): "Writes/s",
+                    ('net', 'rx'): "RX (B/s)", ('net', 'tx'): "TX (B/s)",
+                    ('net', 'rx_packets'): "RX (packets/s)",
+                    ('net', 'tx_packets'): "TX (packets/s)"}
+
+
+def column_label(name):
+    """CSV header for a history column or a ``<column>:<stat>`` rollup"""
+    column, _, stat = name.partition(':')
+    if stat:
+        return f"{column_label(column)} {stat}"
+    if name in COLUMN_LABELS:
+        return COLUMN_LABELS[name]
+    prefix, _, field = name.partition('_')
+    if prefix[:3] == 'gpu' and prefix[3:].isdigit() and field in GPU_DEVICE_LABELS:
+        return f"GPU{prefix[3:]} {GPU_DEVICE_LABELS[field]}"
+    for (device_prefix, label), text in IO_DEVICE_LABELS.items():
+        device = field[:-len(label) - 1]
+        if prefix == device_prefix and device and field == f"{device}_{label}":
+            return f"{device} {text}"
+    return name
+
+
+def export_format(path):
+    fmt = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"unsupported export file type: {path}")
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ValueError("Parquet export needs pyarrow")
+    return fmt
+
+
+def iter_chunks(history, names, first, stop, chunk_rows=CHUNK_ROWS):
+    """Yield (timestamps, columns) copies of samples first..stop, chunk by chunk.
+
+    Only one chunk is copied at a time and the history lock is held just
+    for that copy, so sampling continues during a long export.
+    """
+    while first < stop:
+        read_from, timestamps, columns = history.read_sequence(
+            names, first, min(first + chunk_rows, stop))
+        if not len(timestamps):
+            break
+        first = read_from + len(timestamps)
+        yield timestamps, columns
+
+
+def _text_column(values, fmt, missing):
+    """Format a numeric column as strings in one vectorised call"""
+    text = np.char.mod(fmt, values).astype(object)
+    text[np.isnan(values)] = missing
+    return text
+
+
+def _local_times(timestamps):
+    """'YYYY-MM-DD HH:MM:SS.mmm' local times for epoch-ms timestamps; the
+    milliseconds keep sub-second (adaptive) samples apart"""
+    offset = time.localtime(timestamps[0] / 1000).tm_gmtoff * 1000
+    text = np.datetime_as_string((timestamps + offset).astype('datetime64[ms]'), unit='ms')
+    return np.char.replace(text, 'T', ' ').astype(object)
+
+
+def _write_rows(f, fields):
+    rows = fields[0]
+    for field in fields[1:]:
+        rows = rows + field
+    f.write(''.join(rows))
+
+
+def write_csv(f, names, chunks, progress):
+    f.write(','.join(["Time"] + [column_label(name) for name in names]) + "\n")
+    for timestamps, columns in chunks:
+        fields = [_local_times(timestamps)]
+        for name in names:
+            fields.append(',' + _text_column(columns[name], '%.2f', ''))
+        fields.append('\n')
+        _write_rows(f, fields)
+        progress(len(timestamps))
+
+
+def write_ndjson(f, names, chunks, progress):
+    keys = [json.dumps(name) for name in names]
+    for timestamps, columns in chunks:
+        fields = ['{"timestamp": ' + np.char.mod('%d', timestamps).astype(object)]
+        for key, name in zip(keys, names):
+            fields.append(f', {key}: ' + _text_column(columns[name], '%.6g', 'null'))
+        fields.append('}\n')
+        _write_rows(f, fields)
+        progress(len(timestamps))
+
+
+def write_npz(path, names, chunks, progress):
+    """One .npy member per column, as ``np.load`` expects.
+
+    Columns are spilled to temporary files while the chunks stream in,
+    because a zip member has to be written in one go with its final size.
+    """
+    arrays = [('timestamp', np.dtype(np.int64))] + [(name, np.dtype(np.float32))
+                                                      for name in names]
+    spills = [tempfile.TemporaryFile() for _ in arrays]
+    try:
+        rows = 0
+        for timestamps, columns in chunks:
+            spills[0].write(timestamps.tobytes())
+            for spill, name in zip(spills[1:], names):
+                spill.write(columns[name].tobytes())
+            rows += len(timestamps)
+            progress(len(timestamps))
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for (name, dtype), spill in zip(arrays, spills):
+                spill.seek(0)
+                with archive.open(f"{name}.npy", 'w', force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(
+                        member, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                 'fortran_order': False, 'shape': (rows,)})
+                    shutil.copyfileobj(spill, member)
+    finally:
+        for spill in spills:
+            spill.close()
+
+
+def write_parquet(path, names, chunks, progress):
+    """One Parquet row group per chunk"""
+    import pyarrow
+    import pyarrow.parquet
+    schema = pyarrow.schema([('timestamp', pyarrow.timestamp('ms'))] +
+                            [(name, pyarrow.float32()) for name in names])
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for timestamps, columns in chunks:
+            arrays = [pyarrow.array(timestamps.astype('datetime64[ms]'))]
+            arrays.extend(pyarrow.array(columns[name], from_pandas=True) for name in names)
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            progress(len(timestamps))
+
+
+class ExportJob:
+    """Streams the raw history to a file on a background thread.
+
+    The sample range is fixed when the job is created (optionally limited
+    to ``start``..``end`` epoch seconds) and copied out CHUNK_ROWS samples
+    at a time, so memory use does not depend on how long the session has
+    been running. ``progress`` goes from 0 to 1; the file is written under
+    a temporary name and only renamed into place when complete. With
+    ``instruments`` set, the run is timed into the ``export.<format>`` span.
+    """
+
+    def __init__(self, history, path, names=None, start=None, end=None,
+                 chunk_rows=CHUNK_ROWS, instruments=None):
+        self.history = history
+        self.path = path
+        self.format = export_format(path)
+        self.names = list(names) if names is not None else list(history.columns)
+        self.chunk_rows = chunk_rows
+        self.instruments = instruments
+        self.first, self.stop = history.sequence_range(start, end)
+        self.total = self.stop - self.first
+        self.span = f'export.{self.format}'
+        self.rows = 0
+        self.error = None
+        self.elapsed = None
+        self.done = threading.Event()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def progress(self):
+        return min(1.0, self.rows / self.total) if self.total else 1.0
+
+    def _advance(self, rows):
+        if self._cancel.is_set():
+            raise InterruptedError("export cancelled")
+        self.rows += rows
+
+    def _chunks(self):
+        return iter_chunks(self.history, self.names, self.first, self.stop, self.chunk_rows)
+
+    def run(self):
+        """Write the file on the calling thread"""
+        began = time.perf_counter()
+        partial = self.path + '.part'
+        try:
+            chunks = self._chunks()
+            if self.format in ('csv', 'ndjson'):
+                writer = write_csv if self.format == 'csv' else write_ndjson
+                with open(partial, 'w', newline='') as f:
+                    writer(f, self.names, chunks, self._advance)
+            elif self.format == 'npz':
+                write_npz(partial, self.names, chunks, self._advance)
+            else:
+                write_parquet(partial, self.names, chunks, self._advance)
+            os.replace(partial, self.path)
+        except Exception as e:
+            self.error = e
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            self.elapsed = time.perf_counter() - began
+            if self.instruments is not None:
+                self.instruments.record(self.span, int(self.elapsed * 1e9))
+            self.done.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='export', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+
+class RollupExportJob(ExportJob):
+    """Exports min/avg/max/p95 rollups of ``rollups``' columns instead of
+    raw samples, for ranges that reach back past the raw history.
+
+    At most ``max_points`` rows are written; they are queried on the job's
+    thread, so it runs, reports progress and cancels like ``ExportJob``.
+    """
+
+    def __init__(self, rollups, path, start, end, max_points, chunk_rows=CHUNK_ROWS,
+                 instruments=None):
+        self.rollups = rollups
+        self.start_time = start
+        self.end_time = end
+        self.max_points = max_points
+        names = [f"{column}:{stat}" for column in rollups.columns
+                 for stat in ('min', 'avg', 'max', 'p95')]
+        super().__init__(rollups.raw, path, names, start, end, chunk_rows, instruments)
+        self.total = max_points  # an upper bound until the rollups are queried
+        self.span = 'export.rollups'
+
+    def _chunks(self):
+        series = {column: self.rollups.query(column, self.start_time, self.end_time,
+                                             self.max_points)
+                  for column in self.rollups.columns}
+        # Every column comes from the same tier, so the timestamps agree
+        timestamps = next(iter(series.values()))['timestamps']
+        self.total = len(timestamps)
+        columns = {}
+        for name in self.names:
+            column, _, stat = name.partition(':')
+            columns[name] = series[column][stat].astype(np.float32)
+        for lo in range(0, len(timestamps), self.chunk_rows):
+            hi = lo + self.chunk_rows
+            yield timestamps[lo:hi], {name: values[lo:hi] for name, values in columns.items()}
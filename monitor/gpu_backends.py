@@ -0,0 +1,328 @@
+import glob
+import math
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from .hardware import get_capabilities, load_nvml
+
+# One device's reading; percentages for utilization/memory, °C and watts,
+# NaN when the backend cannot report a field
+GpuReading = namedtuple('GpuReading',
+                        'index name utilization memory temperature power')
+
+GPU_FIELDS = ('utilization', 'memory', 'temperature', 'power')
+
+
+def _clamp_percent(value):
+    return min(max(value, 0.0), 100.0)
+
+
+class GpuBackend:
+    """Long-lived GPU sampler running on its own thread and cadence.
+
+    Subclasses implement ``open``, ``read`` and ``close``. ``read`` returns
+    a list of ``GpuReading``, one per device, gathered in a single pass; the
+    latest list is published on ``self.latest`` so callers never wait on
+    GPU I/O.
+    """
+
+    name = 'none'
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self.latest = None  # (tuple of GpuReading, epoch seconds)
+        self.errors = 0
+        self.instruments = None  # each read is timed into the gpu.<name> span
+        self._stop = threading.Event()
+        self._thread = None
+
+    def open(self):
+        pass
+
+    def read(self):
+        return []
+
+    def close(self):
+        pass
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"gpu-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _publish(self, readings):
+        # A single tuple assignment, so readers never see a torn value
+        self.latest = (tuple(reading._replace(
+            utilization=_clamp_percent(reading.utilization),
+            memory=_clamp_percent(reading.memory)) for reading in readings),
+            time.time())
+
+    def _run(self):
+        try:
+            self.open()
+        except Exception:
+            self.errors += 1
+            return
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter_ns()
+                try:
+                    self._publish(self.read())
+                except Exception:
+                    self.errors += 1
+                if self.instruments is not None:
+                    self.instruments.record(f'gpu.{self.name}',
+                                            time.perf_counter_ns() - started)
+                self._stop.wait(self.interval)
+        finally:
+            try:
+                self.close()
+            except Exception:
+                pass
+
+
+class NullBackend(GpuBackend):
+    """Used when no GPU backend is available; never starts a thread"""
+
+    def start(self):
+        pass
+
+
+class NvmlBackend(GpuBackend):
+    """NVIDIA via NVML with every device handle looked up once"""
+
+    name = 'nvml'
+
+    def open(self):
+        self._nvml = nvml = load_nvml()
+        self._devices = []
+        for index in range(nvml.nvmlDeviceGetCount()):
+            handle = nvml.nvmlDeviceGetHandleByIndex(index)
+            name = nvml.nvmlDeviceGetName(handle)
+            if isinstance(name, bytes):
+                name = name.decode(errors='replace')
+            self._devices.append((index, name, handle))
+
+    def read(self):
+        nvml = self._nvml
+        readings = []
+        for index, name, handle in self._devices:
+            util = nvml.nvmlDeviceGetUtilizationRates(handle)
+            mem_info = nvml.nvmlDeviceGetMemoryInfo(handle)
+            try:
+                temperature = float(nvml.nvmlDeviceGetTemperature(
+                    handle, nvml.NVML_TEMPERATURE_GPU))
+            except nvml.NVMLError:
+                temperature = math.nan
+            try:
+                power = nvml.nvmlDeviceGetPowerUsage(handle) / 1000
+            except nvml.NVMLError:
+                power = math.nan
+            readings.append(GpuReading(index, name, float(util.gpu),
+                                       (mem_info.used / mem_info.total) * 100,
+                                       temperature, power))
+        return readings
+
+
+class GpuUtilBackend(GpuBackend):
+    """GPUtil fallback; each read runs nvidia-smi, so keep the cadence slow"""
+
+    name = 'gputil'
+
+    def open(self):
+        import GPUtil
+        self._gputil = GPUtil
+
+    def read(self):
+        return [GpuReading(index, gpu.name, gpu.load * 100, gpu.memoryUtil * 100,
+                           float(gpu.temperature), math.nan)
+                for index, gpu in enumerate(self._gputil.getGPUs())]
+
+
+class SysfsBackend(GpuBackend):
+    """Linux amdgpu sysfs attributes read through descriptors kept open"""
+
+    name = 'sysfs'
+
+    def __init__(self, device_paths, interval=2.0):
+        super().__init__(interval)
+        self.device_paths = list(device_paths)
+        self._devices = []
+
+    @staticmethod
+    def _open_optional(path):
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_number(fd):
+        # sysfs attributes regenerate their contents on every read at offset 0
+        return float(os.pread(fd, 32, 0)) if fd is not None else math.nan
+
+    def open(self):
+        for index, path in enumerate(self.device_paths):
+            busy_fd = self._open_optional(os.path.join(path, 'gpu_busy_percent'))
+            if busy_fd is None:
+                continue
+            vram_total = math.nan
+            try:
+                with open(os.path.join(path, 'mem_info_vram_total'), 'r') as f:
+                    vram_total = int(f.read().strip())
+            except (OSError, ValueError):
+                pass
+            if not vram_total > 0:
+                vram_total = math.nan  # some APUs report 0; memory % is unknown
+            hwmon = sorted(glob.glob(os.path.join(path, 'hwmon', 'hwmon*')))
+            hwmon = hwmon[0] if hwmon else path
+            self._devices.append({
+                'index': index,
+                'name': os.path.basename(os.path.dirname(path)),
+                'busy': busy_fd,
+                'vram_used': self._open_optional(os.path.join(path, 'mem_info_vram_used')),
+                'vram_total': vram_total,
+                'temperature': self._open_optional(os.path.join(hwmon, 'temp1_input')),
+                'power': self._open_optional(os.path.join(hwmon, 'power1_average')),
+            })
+
+    def read(self):
+        readings = []
+        for device in self._devices:
+            readings.append(GpuReading(
+                device['index'], device['name'],
+                self._read_number(device['busy']),
+                self._read_number(device['vram_used']) / device['vram_total'] * 100,
+                self._read_number(device['temperature']) / 1000,  # millidegrees
+                self._read_number(device['power']) / 1e6))        # microwatts
+        return readings
+
+    def close(self):
+        for device in self._devices:
+            for key in ('busy', 'vram_used', 'temperature', 'power'):
+                if device[key] is not None:
+                    os.close(device[key])
+        self._devices = []
+
+
+class CounterStreamBackend(GpuBackend):
+    """Windows performance counters from one long-running Get-Counter stream.
+
+    Instead of starting PowerShell for every sample, a single process runs
+    ``Get-Counter -Continuous`` and prints one value per interval, which this
+    backend reads line by line. The process is restarted if it exits. The
+    counters are reported as a single device.
+    """
+
+    name = 'counters'
+    SCRIPT = (
+        'Get-Counter "\\GPU Engine(*)\\Utilization Percentage" -Continuous '
+        '-SampleInterval {interval} -ErrorAction SilentlyContinue | '
+        'ForEach-Object {{ [Console]::WriteLine('
+        '($_.CounterSamples | Measure-Object CookedValue -Maximum).Maximum) }}'
+    )
+
+    def __init__(self, interval=2.0):
+        super().__init__(interval)
+        self._process = None
+
+    def _spawn(self):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+
+        return subprocess.Popen([
+            'powershell', '-NoProfile', '-Command',
+            self.SCRIPT.format(interval=max(1, int(round(self.interval))))
+        ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+           startupinfo=startupinfo,
+           creationflags=subprocess.CREATE_NO_WINDOW)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._process = self._spawn()
+                for line in self._process.stdout:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self._publish([GpuReading(0, 'GPU', float(line.strip()), 0.0,
+                                                  math.nan, math.nan)])
+                    except ValueError:
+                        continue
+            except Exception:
+                self.errors += 1
+            finally:
+                self.close()
+            # Back off before restarting a stream that died
+            self._stop.wait(max(self.interval, 5))
+
+    def stop(self):
+        self._stop.set()
+        self.close()
+        super().stop()
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.kill()
+
+
+def create_backend(capabilities=None, interval=2.0):
+    """Pick the best available backend for the detected hardware"""
+    info = (capabilities or get_capabilities()).info
+    backends = info['backends']
+
+    if backends['nvml']:
+        return NvmlBackend(interval)
+    if backends['gputil']:
+        return GpuUtilBackend(interval)
+    if backends['sysfs']:
+        return SysfsBackend(info['sysfs_cards'], interval)
+    if backends['counters'] and platform.system() == 'Windows':
+        return CounterStreamBackend(interval)
+    return NullBackend(interval)
+
+
+class GpuSampler:
+    """Owns the active backend and hands out its latest published reading"""
+
+    def __init__(self, capabilities=None, interval=2.0, instruments=None):
+        self.capabilities = capabilities or get_capabilities()
+        self.interval = interval
+        self.instruments = instruments
+        self.backend = None
+
+    def start(self):
+        if self.backend is None:
+            self.backend = create_backend(self.capabilities, self.interval)
+            self.backend.instruments = self.instruments
+        self.backend.start()
+
+    def stop(self):
+        if self.backend is not None:
+            self.backend.stop()
+
+    def read_devices(self):
+        """Return the latest per-device readings without blocking"""
+        latest = self.backend.latest if self.backend is not None else None
+        return latest[0] if latest is not None else ()
+
+    def read(self):
+        """Return the busiest device's (usage, memory) without blocking"""
+        devices = self.read_devices()
+        usage = [d.utilization for d in devices if not math.isnan(d.utilization)]
+        memory = [d.memory for d in devices if not math.isnan(d.memory)]
+        return max(usage, default=0.0), max(memory, default=0.0)
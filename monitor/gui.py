@@ -1,15 +1,39 @@
+import time
 import tkinter as tk
 from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from utils.utils import gather_system_info
-import requests
-from tkinter import messagebox
+import numpy as np
+from .monitor import query_range
+from .process_view import ProcessTable
+
+# (history column, axes attribute, line color, label, threshold attribute)
+GRAPH_PANELS = (
+    ('cpu', 'ax1', '#0078d4', 'CPU Usage', 'CPU_THRESHOLD'),
+    ('memory', 'ax2', '#107c10', 'Memory Usage', 'MEMORY_THRESHOLD'),
+    ('gpu', 'ax3', '#ca5010', 'GPU Usage', 'GPU_THRESHOLD'),
+    ('gpu_memory', 'ax4', '#8764b8', 'GPU Memory', None),
+)
+
+# (axes title, ((history column, label, color), ...), unit, scale from raw value)
+IO_PANELS = (
+    ('Disk Throughput', (('disk_read', 'Read', '#0078d4'),
+                         ('disk_write', 'Write', '#ca5010')), 'MB/s', 1 / 1048576),
+    ('Disk IOPS', (('disk_iops', 'Read + Write', '#107c10'),), 'ops/s', 1),
+    ('Network Throughput', (('net_rx', 'Received', '#8764b8'),
+                            ('net_tx', 'Sent', '#038387')), 'MB/s', 1 / 1048576),
+    ('Network Packets', (('net_rx_packets', 'Received', '#8764b8'),
+                         ('net_tx_packets', 'Sent', '#038387')), 'packets/s', 1),
+)
+
+GPU_DEVICE_COLORS = ('#ca5010', '#8764b8', '#038387', '#c239b3',
+                     '#498205', '#0063b1', '#da3b01', '#7a7574')
 
 def create_gui(self):
-    # Configure matplotlib for modern look
-    plt.style.use('default')
-    
+    """Build the window; the matplotlib figures follow once it is on screen.
+
+    Importing matplotlib and creating the figures is most of the startup
+    time, so each graph tab only gets its figure when it is first shown
+    (see ``build_tab``) and the first one right after the window appears.
+    """
     # Main container with padding
     main_frame = ttk.Frame(self.root)
     main_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -95,6 +119,58 @@ def create_gui(self):
             interval_entry.delete(0, "end")
             interval_entry.insert(0, str(self.CPU_MON_INTERVAL))
 
+    # Graph time range
+    ttk.Label(threshold_grid, text="Graph Range:").grid(
+        row=2, column=0, padx=5, pady=5, sticky="w")
+    range_options = {
+        "Live (last 60 samples)": None,
+        "Last hour": 3600,
+        "Last 24 hours": 24 * 3600,
+        "Last 7 days": 7 * 24 * 3600,
+        "Last 30 days": 30 * 24 * 3600,
+    }
+    range_combo = ttk.Combobox(threshold_grid, values=list(range_options),
+                               state="readonly", width=22)
+    range_combo.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+    range_combo.current(0)
+
+    def save_graph_range(event):
+        self.GRAPH_RANGE = range_options[range_combo.get()]
+
+    range_combo.bind('<<ComboboxSelected>>', save_graph_range)
+
+    # Redraw rate, independent of the sampling interval
+    ttk.Label(threshold_grid, text="Max Redraw Rate (fps):").grid(
+        row=2, column=2, padx=5, pady=5, sticky="w")
+    refresh_entry = ttk.Entry(threshold_grid, width=10)
+    refresh_entry.grid(row=2, column=3, padx=5, pady=5)
+    refresh_entry.insert(0, str(self.REFRESH_RATE))
+
+    def save_refresh_rate(event):
+        try:
+            rate = float(refresh_entry.get())
+            if rate <= 0:
+                raise ValueError
+            self.REFRESH_RATE = rate
+        except ValueError:
+            refresh_entry.delete(0, "end")
+            refresh_entry.insert(0, str(self.REFRESH_RATE))
+
+    refresh_entry.bind('<FocusOut>', save_refresh_rate)
+
+    # Adaptive sampling replaces the update interval while enabled
+    adaptive_var = tk.BooleanVar(value=self.ADAPTIVE_SAMPLING)
+
+    def save_adaptive():
+        self.ADAPTIVE_SAMPLING = adaptive_var.get()
+        interval_entry.config(state="disabled" if self.ADAPTIVE_SAMPLING else "normal")
+
+    ttk.Checkbutton(threshold_grid, variable=adaptive_var, command=save_adaptive,
+                    text=f"Adaptive interval ({self.ADAPTIVE_MIN_INTERVAL:g}–"
+                         f"{self.ADAPTIVE_MAX_INTERVAL:g} s, faster on change)").grid(
+        row=3, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+    save_adaptive()
+
     # Bind events
     cpu_entry.bind('<FocusOut>', save_cpu_threshold)
     memory_entry.bind('<FocusOut>', save_memory_threshold)
@@ -118,11 +194,83 @@ def create_gui(self):
                               command=self.export_data, style='Modern.TButton')
     export_button.pack(side="left", padx=5)
 
+    # Shown only while an export is running
+    self.export_progress = ttk.Progressbar(button_frame, length=140, mode='determinate',
+                                           maximum=1.0)
+
     # Graph Frame with modern styling
     graph_frame = ttk.LabelFrame(monitor_tab, text="Real-time Resource Usage", 
                                 padding=10)
     graph_frame.pack(fill="both", expand=True)
 
+    loading_label(graph_frame)
+
+    # ==================== CPU CORES TAB ====================
+    cores_tab = ttk.Frame(self.tab_control)
+    self.tab_control.add(cores_tab, text="🔥 CPU Cores")
+    loading_label(cores_tab)
+
+    # ==================== DISK & NETWORK TAB ====================
+    io_tab = ttk.Frame(self.tab_control)
+    self.tab_control.add(io_tab, text="💽 Disk & Network")
+    loading_label(io_tab)
+
+    # ==================== PROCESSES TAB ====================
+    processes_tab = ttk.Frame(self.tab_control)
+    self.tab_control.add(processes_tab, text="🔧 Top Processes")
+
+    # Process info frame
+    process_info_frame = ttk.LabelFrame(processes_tab,
+                                       text="Processes (click a column to sort)",
+                                       padding=10)
+    process_info_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Virtualised process table, rows keyed by PID
+    self.process_table = ProcessTable(process_info_frame, history=self.process_history)
+    self.process_table.pack(fill="both", expand=True)
+
+    # Export button for processes
+    export_proc_button = ttk.Button(processes_tab, text="💾 Export Processes", 
+                                   command=self.export_top_processes,
+                                   style='Modern.TButton')
+    export_proc_button.pack(pady=10)
+
+    # ==================== DIAGNOSTICS TAB ====================
+    diagnostics_tab = ttk.Frame(self.tab_control)
+    self.tab_control.add(diagnostics_tab, text="🩺 Diagnostics")
+    create_diagnostics(self, diagnostics_tab)
+
+    # Graph tabs are built on first view; the first one once the window is up
+    self.tab_builders = {0: (create_monitor_graphs, graph_frame),
+                         1: (create_core_heatmap, cores_tab),
+                         2: (create_io_dashboard, io_tab)}
+    self.tab_control.bind('<<NotebookTabChanged>>',
+                          lambda event: build_tab(self, self.tab_control.index('current')))
+    self.root.after_idle(self.root.after, 0, build_tab, self, 0)
+
+    # Schedule updates
+    self.update_process_info()
+
+def loading_label(parent):
+    ttk.Label(parent, text="Loading graphs…", name='loading',
+              font=('Segoe UI', 11)).pack(expand=True)
+
+def build_tab(self, index):
+    """Create a graph tab's figure the first time it is needed"""
+    if index not in self.tab_builders:
+        return
+    builder, parent = self.tab_builders.pop(index)
+    parent.nametowidget('loading').destroy()
+    builder(self, parent)
+
+def create_monitor_graphs(self, graph_frame):
+    """The four resource panels of the main tab"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    # Configure matplotlib for modern look
+    plt.style.use('default')
+
     # Create figure with subplots for better organization
     self.fig, ((self.ax1, self.ax2), (self.ax3, self.ax4)) = plt.subplots(2, 2, 
                                                                           figsize=(12, 8))
@@ -141,44 +289,429 @@ def create_gui(self):
     
     self.ax3.set_title('GPU Usage', fontweight='bold')
     self.ax3.set_ylabel('Percentage (%)')
-    self.ax3.set_xlabel('Time')
     
     self.ax4.set_title('GPU Memory', fontweight='bold')
     self.ax4.set_ylabel('Percentage (%)')
-    self.ax4.set_xlabel('Time')
 
-    plt.tight_layout()
-    
     self.canvas = FigureCanvasTkAgg(self.fig, master=graph_frame)
     self.canvas.get_tk_widget().pack(fill='both', expand=True)
+    create_graph_artists(self)
 
-    # ==================== PROCESSES TAB ====================
-    processes_tab = ttk.Frame(self.tab_control)
-    self.tab_control.add(processes_tab, text="🔧 Top Processes")
+def create_graph_artists(self):
+    """Create the artists that every frame updates in place and hook up blitting"""
+    from matplotlib.collections import PolyCollection
+    self.lines = {}
+    self.bands = {}
+    self.threshold_lines = {}
+    self.device_lines = {}
+    self._background = None
+    self._layout_state = None
 
-    # Process info frame
-    process_info_frame = ttk.LabelFrame(processes_tab, text="Top 20 Processes by CPU Usage", 
-                                       padding=10)
-    process_info_frame.pack(fill="both", expand=True, padx=10, pady=10)
+    for name, ax_name, color, label, threshold_attr in GRAPH_PANELS:
+        ax = getattr(self, ax_name)
+        ax.set_ylim(0, 100)
 
-    # Process list with modern styling
-    process_container = ttk.Frame(process_info_frame)
-    process_container.pack(fill="both", expand=True)
+        band = PolyCollection([], facecolors='#8a8886', alpha=0.2, animated=True)
+        ax.add_collection(band)
+        self.bands[name] = band
 
-    process_scrollbar = ttk.Scrollbar(process_container, orient="vertical")
-    process_scrollbar.pack(side="right", fill="y")
+        self.lines[name], = ax.plot([], [], color=color, linewidth=2,
+                                    label=label, animated=True)
 
-    self.process_list = tk.Text(process_container, height=25, state="disabled", 
-                               yscrollcommand=process_scrollbar.set,
-                               font=('Consolas', 9), bg='#fafafa')
-    self.process_list.pack(side="left", fill="both", expand=True)
-    process_scrollbar.config(command=self.process_list.yview)
+        if threshold_attr:
+            threshold = getattr(self, threshold_attr)
+            # The GPU threshold is only shown once there is GPU data
+            self.threshold_lines[name] = ax.axhline(
+                y=threshold, color='#d13438', linestyle='--', alpha=0.7,
+                label=f'Threshold ({threshold}%)', animated=(name == 'gpu'))
+        ax.legend(loc='upper left')
 
-    # Export button for processes
-    export_proc_button = ttk.Button(processes_tab, text="💾 Export Processes", 
-                                   command=self.export_top_processes,
-                                   style='Modern.TButton')
-    export_proc_button.pack(pady=10)
+    self.gpu_status_texts = {
+        name: getattr(self, ax_name).text(
+            0.5, 0.5, '', transform=getattr(self, ax_name).transAxes,
+            ha='center', va='center', fontsize=11, alpha=0.7, animated=True)
+        for name, ax_name in (('gpu', 'ax3'), ('gpu_memory', 'ax4'))
+    }
 
-    # Schedule updates
-    self.update_process_info()
\ No newline at end of file
+    def on_draw(event):
+        # Every full draw (first show, resize, layout change) refreshes the
+        # static background the frames are blitted onto
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        draw_animated(self)
+
+    def on_resize(event):
+        self.fig.tight_layout()
+
+    self.canvas.mpl_connect('draw_event', on_draw)
+    self.canvas.mpl_connect('resize_event', on_resize)
+    sync_layout(self)
+
+def create_core_heatmap(self, parent):
+    """Per-core CPU heatmap: one image artist whatever the core count"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    heatmap_frame = ttk.LabelFrame(parent, text="Per-core CPU Usage", padding=10)
+    heatmap_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    cores = self.core_history.cores
+    length = self.core_history.capacity
+    self.heatmap_fig, self.heatmap_ax = plt.subplots(figsize=(12, 8))
+    # Columns not yet sampled stay NaN and are drawn in the background color
+    self.heatmap_frame = np.full((cores, length), np.nan, dtype=np.float32)
+    cmap = plt.get_cmap('inferno').copy()
+    cmap.set_bad('#fafafa')
+    self.heatmap_image = self.heatmap_ax.imshow(
+        self.heatmap_frame, aspect='auto', interpolation='nearest', origin='lower',
+        cmap=cmap, vmin=0, vmax=100, extent=(-length, 0, -0.5, cores - 0.5),
+        animated=True)
+    self.heatmap_ax.set_title(f'CPU Usage per Core ({cores} cores)', fontweight='bold')
+    self.heatmap_ax.set_xlabel('Samples ago')
+    self.heatmap_ax.set_ylabel('Core')
+    self.heatmap_fig.colorbar(self.heatmap_image, ax=self.heatmap_ax, label='Usage (%)')
+    self.heatmap_fig.tight_layout()
+
+    self.heatmap_canvas = FigureCanvasTkAgg(self.heatmap_fig, master=heatmap_frame)
+    self.heatmap_canvas.get_tk_widget().pack(fill='both', expand=True)
+    self._heatmap_background = None
+
+    def on_draw(event):
+        self._heatmap_background = self.heatmap_canvas.copy_from_bbox(self.heatmap_fig.bbox)
+        self.heatmap_ax.draw_artist(self.heatmap_image)
+
+    def on_resize(event):
+        self.heatmap_fig.tight_layout()
+
+    self.heatmap_canvas.mpl_connect('draw_event', on_draw)
+    self.heatmap_canvas.mpl_connect('resize_event', on_resize)
+
+def draw_heatmap(self):
+    """Copy the latest per-core samples into the image and blit the axes"""
+    if self._heatmap_background is None:
+        self.heatmap_canvas.draw_idle()
+        return
+    samples = self.core_history.read()
+    self.heatmap_frame[:, :self.heatmap_frame.shape[1] - len(samples)] = np.nan
+    if len(samples):
+        self.heatmap_frame[:, -len(samples):] = samples.T
+    self.heatmap_image.set_data(self.heatmap_frame)
+
+    self.heatmap_canvas.restore_region(self._heatmap_background)
+    self.heatmap_ax.draw_artist(self.heatmap_image)
+    self.heatmap_canvas.blit(self.heatmap_ax.bbox)
+
+def create_io_dashboard(self, parent):
+    """Disk and network throughput panels plus a per-device rate table"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    graph_frame = ttk.LabelFrame(parent, text="Disk & Network I/O", padding=10)
+    graph_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+    self.io_fig, axes = plt.subplots(2, 2, figsize=(12, 6))
+    self.io_axes = list(axes.flat)
+    self.io_lines = {}
+    for ax, (title, columns, unit, _) in zip(self.io_axes, IO_PANELS):
+        ax.grid(True, alpha=0.3)
+        ax.set_facecolor('#fafafa')
+        ax.set_title(title, fontweight='bold')
+        ax.set_ylabel(unit)
+        ax.set_ylim(0, 1)
+        for column, label, color in columns:
+            self.io_lines[column], = ax.plot([], [], color=color, linewidth=2,
+                                             label=label, animated=True)
+        ax.legend(loc='upper left')
+    for ax in self.io_axes[2:]:
+        ax.set_xlabel('Seconds ago')
+    self.io_fig.tight_layout()
+
+    self.io_canvas = FigureCanvasTkAgg(self.io_fig, master=graph_frame)
+    self.io_canvas.get_tk_widget().pack(fill='both', expand=True)
+    self._io_background = None
+    self._io_window = None
+
+    def on_draw(event):
+        self._io_background = self.io_canvas.copy_from_bbox(self.io_fig.bbox)
+        draw_io_lines(self)
+
+    def on_resize(event):
+        self.io_fig.tight_layout()
+
+    self.io_canvas.mpl_connect('draw_event', on_draw)
+    self.io_canvas.mpl_connect('resize_event', on_resize)
+
+    table_frame = ttk.LabelFrame(parent, text="Per-device Rates", padding=10)
+    table_frame.pack(fill="x", padx=10, pady=(5, 10))
+    columns = ('kind', 'in', 'out', 'ops')
+    self.io_table = ttk.Treeview(table_frame, columns=columns, height=6)
+    self.io_table.heading('#0', text='Device')
+    for column, heading in zip(columns, ('Type', 'Read / Rx', 'Write / Tx',
+                                         'IOPS / Packets')):
+        self.io_table.heading(column, text=heading)
+        self.io_table.column(column, width=120, anchor='e')
+    io_scrollbar = ttk.Scrollbar(table_frame, orient="vertical",
+                                 command=self.io_table.yview)
+    self.io_table.configure(yscrollcommand=io_scrollbar.set)
+    io_scrollbar.pack(side="right", fill="y")
+    self.io_table.pack(fill="x", expand=True)
+    self._io_rows = {}
+
+def create_diagnostics(self, parent):
+    """The monitor's own CPU, memory and threads plus its span timings"""
+    usage_frame = ttk.LabelFrame(parent, text="Monitor Process", padding=10)
+    usage_frame.pack(fill="x", padx=10, pady=(10, 5))
+    self.diagnostics_label = ttk.Label(usage_frame, text="Waiting for samples…",
+                                       font=('Segoe UI', 10))
+    self.diagnostics_label.pack(anchor="w")
+
+    table_frame = ttk.LabelFrame(parent, text="Timing Spans", padding=10)
+    table_frame.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+    columns = ('count', 'mean', 'p50', 'p99', 'max')
+    self.span_table = ttk.Treeview(table_frame, columns=columns)
+    self.span_table.heading('#0', text='Span')
+    self.span_table.column('#0', width=180)
+    for column, heading in zip(columns, ('Count', 'Mean (ms)', 'p50 (ms)', 'p99 (ms)',
+                                         'Max (ms)')):
+        self.span_table.heading(column, text=heading)
+        self.span_table.column(column, width=100, anchor='e')
+    span_scrollbar = ttk.Scrollbar(table_frame, orient="vertical",
+                                   command=self.span_table.yview)
+    self.span_table.configure(yscrollcommand=span_scrollbar.set)
+    span_scrollbar.pack(side="right", fill="y")
+    self.span_table.pack(fill="both", expand=True)
+
+def draw_diagnostics(self):
+    """Refresh the diagnostics tab from the self_* columns and the span histograms"""
+    cpu, rss, threads = (self.history.latest(name)
+                         for name in ('self_cpu', 'self_rss', 'self_threads'))
+    missed = sum(self.core.missed.values()) if self.core else 0
+    if not np.isnan(rss):
+        self.diagnostics_label.config(
+            text=f"CPU: {np.nan_to_num(cpu):.1f}% of one core   "
+                 f"RSS: {rss / 1048576:.1f} MB   Threads: {threads:.0f}   "
+                 f"Missed ticks: {missed}")
+
+    for name, summary in self.instruments.snapshot().items():
+        values = (summary['count'],) + tuple(f"{summary[key] * 1000:.3f}"
+                                              for key in ('mean', 'p50', 'p99', 'max'))
+        if self.span_table.exists(name):
+            self.span_table.item(name, values=values)
+        else:
+            self.span_table.insert('', 'end', iid=name, text=name, values=values)
+
+def draw_io_lines(self):
+    for ax, (_, columns, _, _) in zip(self.io_axes, IO_PANELS):
+        for column, _, _ in columns:
+            ax.draw_artist(self.io_lines[column])
+
+def draw_io(self):
+    """Update the I/O panels in place; rescale with a full redraw only when needed"""
+    window = self.HISTORY_LENGTH * self.CPU_MON_INTERVAL
+    names = [column for _, columns, _, _ in IO_PANELS for column, _, _ in columns]
+    now = time.time()
+    timestamps, data = self.history.read_since(names, now - window)
+    x = (timestamps - now * 1000) / 1000
+
+    rescale = window != self._io_window
+    self._io_window = window
+    for ax, (_, columns, _, scale) in zip(self.io_axes, IO_PANELS):
+        peak = 0.0
+        for column, _, _ in columns:
+            y = data[column] * scale
+            self.io_lines[column].set_data(x, y)
+            if len(y) and not np.isnan(y).all():
+                peak = max(peak, float(np.nanmax(y)))
+        # Grow when the data outgrows the axis, shrink once it uses a quarter
+        top = ax.get_ylim()[1]
+        if peak > top or (top > 1 and peak < top / 4):
+            ax.set_ylim(0, max(1.0, peak * 1.25))
+            rescale = True
+        ax.set_xlim(-window, 0)
+
+    update_io_table(self)
+    if rescale or self._io_background is None:
+        self.io_canvas.draw_idle()
+        return
+    self.io_canvas.restore_region(self._io_background)
+    draw_io_lines(self)
+    for ax in self.io_axes:
+        self.io_canvas.blit(ax.bbox)
+
+def update_io_table(self):
+    """Rewrite only the per-device rows whose values changed"""
+    shown = set()
+    for kind, counter_rates in (('disk', self.disk_rates), ('net', self.net_rates)):
+        devices, rates, physical = counter_rates.latest
+        for name, row, is_physical in zip(devices, rates, physical):
+            if not is_physical:
+                continue
+            iid = f"{kind}:{name}"
+            values = ('Disk' if kind == 'disk' else 'Network',
+                      f"{row[0] / 1048576:.2f} MB/s", f"{row[1] / 1048576:.2f} MB/s",
+                      f"{row[2] + row[3]:.0f}/s")
+            shown.add(iid)
+            if iid not in self._io_rows:
+                self.io_table.insert('', 'end', iid=iid, text=name, values=values)
+            elif self._io_rows[iid] != values:
+                self.io_table.item(iid, values=values)
+            self._io_rows[iid] = values
+    for iid in [iid for iid in self._io_rows if iid not in shown]:
+        self.io_table.delete(iid)
+        del self._io_rows[iid]
+
+def panel_legend(self, ax):
+    """Build an axes legend, listing GPU devices instead of the aggregate line"""
+    if not self.device_lines or ax not in (self.ax3, self.ax4):
+        ax.legend(loc='upper left')
+        return
+    column = 0 if ax is self.ax3 else 1
+    handles = [lines[column] for lines in self.device_lines.values()]
+    if ax is self.ax3:
+        handles.append(self.threshold_lines['gpu'])
+    ax.legend(handles=handles, loc='upper left', fontsize=7, ncol=2)
+
+def sync_gpu_lines(self):
+    """Add one line per GPU device to the GPU panels once several devices report"""
+    devices = sorted(self.gpu_devices.items())
+    if len(devices) < 2 or len(devices) == len(self.device_lines):
+        return
+    for index, name in devices:
+        if index in self.device_lines:
+            continue
+        color = GPU_DEVICE_COLORS[index % len(GPU_DEVICE_COLORS)]
+        self.device_lines[index] = tuple(
+            ax.plot([], [], color=color, linewidth=1.5,
+                    label=f'GPU {index}: {name}', animated=True)[0]
+            for ax in (self.ax3, self.ax4))
+    for ax in (self.ax3, self.ax4):
+        panel_legend(self, ax)
+    # Force a full redraw so the new legends land in the background
+    self._layout_state = None
+
+def time_scale(seconds):
+    """Return the divisor and axis label used for a time window"""
+    if seconds >= 2 * 24 * 3600:
+        return 24 * 3600, 'Days ago'
+    if seconds >= 2 * 3600:
+        return 3600, 'Hours ago'
+    if seconds >= 2 * 60:
+        return 60, 'Minutes ago'
+    return 1, 'Seconds ago'
+
+def sync_layout(self):
+    """Apply threshold, range or interval changes; returns True if a full redraw was needed"""
+    window = self.GRAPH_RANGE or self.HISTORY_LENGTH * self.CPU_MON_INTERVAL
+    state = (self.CPU_THRESHOLD, self.MEMORY_THRESHOLD, self.GPU_THRESHOLD, window)
+    if state == self._layout_state:
+        return False
+    self._layout_state = state
+
+    divisor, label = time_scale(window)
+    for name, ax_name, _, _, threshold_attr in GRAPH_PANELS:
+        ax = getattr(self, ax_name)
+        ax.set_xlim(-window / divisor, 0)
+        if ax_name in ('ax3', 'ax4'):
+            ax.set_xlabel(label)
+        if threshold_attr:
+            threshold = getattr(self, threshold_attr)
+            self.threshold_lines[name].set_ydata([threshold, threshold])
+            self.threshold_lines[name].set_label(f'Threshold ({threshold}%)')
+            panel_legend(self, ax)
+
+    self.fig.tight_layout()
+    self.canvas.draw_idle()
+    return True
+
+def collect_series(self):
+    """Return x values and avg/min/max arrays for each panel, or None for the band"""
+    window = self.GRAPH_RANGE or self.HISTORY_LENGTH * self.CPU_MON_INTERVAL
+    divisor, _ = time_scale(window)
+    now_ms = time.time() * 1000
+    series = {}
+
+    if self.GRAPH_RANGE:
+        # Long ranges come from the rollup tiers with a bounded point count
+        for name, *_ in GRAPH_PANELS:
+            data = query_range(self, name, self.GRAPH_RANGE, self.GRAPH_MAX_POINTS)
+            x = (data['timestamps'] - now_ms) / (1000 * divisor)
+            series[name] = (x, data['avg'], data['min'], data['max'])
+    else:
+        names = [name for name, *_ in GRAPH_PANELS]
+        for index in self.device_lines:
+            names += [f'gpu{index}_utilization', f'gpu{index}_memory']
+        # By time, not sample count: with adaptive sampling the spacing varies
+        timestamps, columns = self.history.read_since(names, now_ms / 1000 - window)
+        x = (timestamps - now_ms) / (1000 * divisor)
+        for name, *_ in GRAPH_PANELS:
+            series[name] = (x, columns[name], None, None)
+        # Per-device lines are only kept at raw resolution, so they are
+        # drawn in the live view; longer ranges show the aggregate
+        for index in self.device_lines:
+            series[('gpu', index)] = (x, columns[f'gpu{index}_utilization'], None, None)
+            series[('gpu_memory', index)] = (x, columns[f'gpu{index}_memory'], None, None)
+    return series
+
+def draw_animated(self):
+    """Draw the animated artists over the current background"""
+    for name, ax_name, *_ in GRAPH_PANELS:
+        ax = getattr(self, ax_name)
+        ax.draw_artist(self.bands[name])
+        ax.draw_artist(self.lines[name])
+        if name in self.gpu_status_texts:
+            ax.draw_artist(self.gpu_status_texts[name])
+        if name == 'gpu' and self.threshold_lines['gpu'].get_visible():
+            ax.draw_artist(self.threshold_lines['gpu'])
+    for util_line, memory_line in self.device_lines.values():
+        self.ax3.draw_artist(util_line)
+        self.ax4.draw_artist(memory_line)
+
+def draw_frame(self):
+    """Update the graphs in place and blit only the axes regions"""
+    sync_gpu_lines(self)
+    if sync_layout(self) or self._background is None:
+        # The pending full draw repaints everything, including the new data
+        return
+
+    series = collect_series(self)
+    for name, (x, avg, low, high) in series.items():
+        if isinstance(name, tuple):
+            panel, index = name
+            self.device_lines[index][0 if panel == 'gpu' else 1].set_data(x, avg)
+            continue
+        self.lines[name].set_data(x, avg)
+        if low is not None and len(x):
+            verts = np.column_stack((np.concatenate((x, x[::-1])),
+                                     np.concatenate((low, high[::-1]))))
+            self.bands[name].set_verts([verts])
+        else:
+            self.bands[name].set_verts([])
+
+    gpu_detected = self.capabilities.gpu_detected
+    per_device = bool(self.device_lines) and not self.GRAPH_RANGE
+
+    def panel_has_data(panel):
+        return any(np.nan_to_num(data[1]).any() for name, data in series.items()
+                   if name == panel or (per_device and name[:1] == (panel,)))
+
+    has_gpu_data = panel_has_data('gpu')
+    has_gpu_memory_data = panel_has_data('gpu_memory')
+
+    self.lines['gpu'].set_visible(gpu_detected and not per_device)
+    self.lines['gpu_memory'].set_visible(gpu_detected and not per_device)
+    for lines in self.device_lines.values():
+        for line in lines:
+            line.set_visible(per_device)
+    self.threshold_lines['gpu'].set_visible(gpu_detected and has_gpu_data)
+    if not gpu_detected:
+        self.gpu_status_texts['gpu'].set_text('No Dedicated GPU\nDetected')
+        self.gpu_status_texts['gpu_memory'].set_text('No GPU Memory\nMonitoring Available')
+    else:
+        self.gpu_status_texts['gpu'].set_text(
+            '' if has_gpu_data else 'GPU Detected\n(Idle or Limited Monitoring)')
+        self.gpu_status_texts['gpu_memory'].set_text(
+            '' if has_gpu_memory_data else 'GPU Memory\n(Limited Monitoring)')
+
+    self.canvas.restore_region(self._background)
+    draw_animated(self)
+    for _, ax_name, *_ in GRAPH_PANELS:
+        self.canvas.blit(getattr(self, ax_name).bbox)
@@ -0,0 +1,186 @@
+import glob
+import importlib.util
+import os
+import platform
+import subprocess
+import threading
+import time
+
+_nvml = None
+_nvml_loaded = False
+_nvml_lock = threading.Lock()
+
+
+def load_nvml():
+    """Import and initialise NVML on first use; None when it is unavailable.
+
+    nvmlInit can take a noticeable time, so it runs from the capability
+    probe (off the UI thread) instead of at import.
+    """
+    global _nvml, _nvml_loaded
+    with _nvml_lock:
+        if not _nvml_loaded:
+            _nvml_loaded = True
+            try:
+                try:
+                    import pynvml as nvml  # module shipped by nvidia-ml-py3
+                except ImportError:
+                    import nvidia_ml_py3 as nvml
+                nvml.nvmlInit()
+                _nvml = nvml
+            except Exception:
+                _nvml = None
+        return _nvml
+
+
+def gputil_available():
+    """Whether GPUtil is installed, without importing it"""
+    return importlib.util.find_spec('GPUtil') is not None
+
+PCI_VENDORS = {'0x1002': 'AMD', '0x10de': 'NVIDIA', '0x8086': 'Intel'}
+
+GPU_KEYWORDS = {
+    'NVIDIA': ['nvidia', 'geforce', 'quadro', 'rtx', 'gtx'],
+    'AMD': ['amd', 'radeon', 'rx', 'vega', 'navi'],
+    'Intel': ['intel arc', 'intel iris', 'intel xe'],
+}
+
+
+def _probe_windows_video_controllers():
+    """Return the video controller names reported by wmic"""
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+
+    result = subprocess.run([
+        'wmic', 'path', 'win32_VideoController', 'get', 'name'
+    ], capture_output=True, text=True, timeout=5, shell=True,
+       startupinfo=startupinfo,
+       creationflags=subprocess.CREATE_NO_WINDOW)
+
+    if result.returncode != 0 or not result.stdout:
+        return []
+    lines = [line.strip() for line in result.stdout.splitlines()]
+    return [line for line in lines[1:] if line]
+
+
+def _probe_sysfs_cards():
+    """Return (device directory, vendor) for every DRM card on Linux"""
+    cards = []
+    for vendor_path in sorted(glob.glob('/sys/class/drm/card[0-9]*/device/vendor')):
+        if '-' in os.path.basename(os.path.dirname(os.path.dirname(vendor_path))):
+            continue  # connectors such as card0-HDMI-A-1
+        try:
+            with open(vendor_path, 'r') as f:
+                vendor = f.read().strip()
+        except OSError:
+            continue
+        if vendor in PCI_VENDORS:
+            cards.append((os.path.dirname(vendor_path), PCI_VENDORS[vendor]))
+    return cards
+
+
+class HardwareCapabilities:
+    """Cached view of the GPU hardware and the sampling backends available.
+
+    Probing spawns processes on Windows and walks sysfs on Linux, so it runs
+    once and afterwards only on ``refresh()`` or from the slow hot-plug timer.
+    Readers always see a complete result because every probe swaps in a new
+    dict instead of mutating the current one.
+    """
+
+    def __init__(self):
+        self._info = None
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def probe(self):
+        """Probe hardware and backends and publish the result"""
+        system = platform.system()
+        vendors = []
+        sysfs_cards = []
+
+        if system == 'Windows':
+            try:
+                names = ' '.join(_probe_windows_video_controllers()).lower()
+                vendors = [vendor for vendor, keywords in GPU_KEYWORDS.items()
+                           if any(keyword in names for keyword in keywords)]
+            except Exception:
+                pass
+        elif system == 'Linux':
+            try:
+                sysfs_cards = _probe_sysfs_cards()
+                vendors = sorted({vendor for _, vendor in sysfs_cards})
+            except Exception:
+                pass
+
+        nvml_available = load_nvml() is not None
+        gputil = gputil_available()
+        info = {
+            'gpu_detected': bool(vendors),
+            'gpu_type': vendors[0] if vendors else 'Unknown',
+            'vendors': vendors,
+            'platform': system,
+            'nvml_available': nvml_available,
+            'gputil_available': gputil,
+            'backends': {
+                'nvml': nvml_available,
+                'gputil': gputil,
+                'sysfs': any(os.path.exists(os.path.join(path, 'gpu_busy_percent'))
+                             for path, _ in sysfs_cards),
+                'counters': system == 'Windows',
+            },
+            'sysfs_cards': [path for path, _ in sysfs_cards],
+            'probed_at': time.time(),
+        }
+
+        with self._lock:
+            self._info = info
+        return info
+
+    def refresh(self):
+        """Re-probe on explicit request"""
+        return self.probe()
+
+    @property
+    def info(self):
+        info = self._info
+        if info is None:
+            with self._lock:
+                info = self._info
+            if info is None:
+                info = self.probe()
+        return info
+
+    @property
+    def gpu_detected(self):
+        return self.info['gpu_detected']
+
+    def start_hotplug_timer(self, interval, first=None):
+        """Re-probe every ``interval`` seconds in the background; the first
+        probe runs after ``first`` seconds (default ``interval``)"""
+        self.stop_hotplug_timer()
+
+        def run():
+            try:
+                self.probe()
+            except Exception:
+                pass
+            self.start_hotplug_timer(interval)
+
+        self._timer = threading.Timer(interval if first is None else first, run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop_hotplug_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+CAPABILITIES = HardwareCapabilities()
+
+
+def get_capabilities():
+    """Return the shared capability registry"""
+    return CAPABILITIES
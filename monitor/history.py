@@ -0,0 +1,246 @@
+import threading
+import time
+import numpy as np
+
+# A sample stands for the time since the previous one, up to this many
+# seconds; a longer gap means sampling was stopped in between
+MAX_SAMPLE_WEIGHT = 60.0
+# Weight of a sample with no predecessor
+FIRST_SAMPLE_WEIGHT = 1.0
+
+
+def sample_weights(timestamps, previous=None):
+    """Seconds each sample stands for, for time-weighted statistics.
+
+    ``timestamps`` are epoch seconds in order and ``previous`` is the time
+    of the sample before the first one, if any. With a fixed interval every
+    weight is that interval; with adaptive sampling a sample taken after a
+    long quiet stretch counts for the whole stretch.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    before = FIRST_SAMPLE_WEIGHT if previous is None else timestamps[:1] - previous
+    gaps = np.diff(timestamps, prepend=np.nan)
+    gaps[:1] = before
+    return np.clip(gaps, 0.0, MAX_SAMPLE_WEIGHT)
+
+
+class HistoryBuffer:
+    """Fixed-capacity columnar history backed by preallocated numpy arrays.
+
+    Values are stored as float32 columns next to an int64 column of epoch
+    timestamps in milliseconds. Every sample is written twice (at its slot and
+    at slot + capacity) so the most recent ``n`` samples always form one
+    contiguous slice and can be returned as zero-copy views.
+
+    Writers hold ``lock``; readers on other threads take it too while they
+    copy what they need out of a view.
+    """
+
+    def __init__(self, columns, capacity=86400):
+        self.lock = threading.RLock()
+        self.capacity = int(capacity)
+        self.columns = []
+        self.timestamps = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._data = {}
+        self._head = 0
+        self._count = 0
+        # Total number of samples ever appended, used by readers to detect new data
+        self.version = 0
+
+        for name in columns:
+            self.add_column(name)
+
+    def __len__(self):
+        return self._count
+
+    def add_column(self, name):
+        """Add a float32 column; rows recorded before it exist read as NaN."""
+        with self.lock:
+            if name not in self._data:
+                self._data[name] = np.full(2 * self.capacity, np.nan, dtype=np.float32)
+                self.columns.append(name)
+
+    def append(self, values, timestamp=None):
+        """Append one sample in O(1). ``values`` maps column name to value."""
+        if timestamp is None:
+            timestamp = time.time()
+        ts = int(timestamp * 1000)
+        with self.lock:
+            slot = self._head
+            mirror = slot + self.capacity
+            self.timestamps[slot] = ts
+            self.timestamps[mirror] = ts
+            for name, column in self._data.items():
+                value = values.get(name, np.nan)
+                column[slot] = value
+                column[mirror] = value
+
+            self._head = (slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self.version += 1
+
+    def extend(self, timestamps, values):
+        """Append many samples at once with vectorised writes.
+
+        ``timestamps`` are epoch milliseconds and ``values`` maps column
+        name to an array of the same length.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        keep = min(len(timestamps), self.capacity)
+        skip = len(timestamps) - keep
+        if not keep:
+            return
+
+        with self.lock:
+            slots = (self._head + np.arange(keep)) % self.capacity
+            mirrors = slots + self.capacity
+            self.timestamps[slots] = timestamps[skip:]
+            self.timestamps[mirrors] = timestamps[skip:]
+            for name, column in self._data.items():
+                data = values.get(name)
+                data = np.nan if data is None else np.asarray(data)[skip:]
+                column[slots] = data
+                column[mirrors] = data
+
+            self._head = (self._head + keep) % self.capacity
+            self._count = min(self._count + keep, self.capacity)
+            self.version += len(timestamps)
+
+    def prepend(self, timestamps, values):
+        """Insert samples older than every held one (e.g. restored from disk)
+        in front of them, keeping the newest ``capacity`` overall. Sequence
+        numbers of the held samples move up by the number inserted."""
+        with self.lock:
+            held_timestamps, held = self.read(self.columns)
+            self._head = 0
+            self._count = 0
+            self.extend(timestamps, values)
+            self.extend(held_timestamps, held)
+            self.version -= len(held_timestamps)
+
+    def _window(self, n):
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + self.capacity
+        return end - n, end
+
+    def view(self, name, n=None):
+        """Return a read-only view of the latest ``n`` values of a column."""
+        start, end = self._window(n)
+        view = self._data[name][start:end]
+        view.flags.writeable = False
+        return view
+
+    def timestamps_view(self, n=None):
+        """Return a read-only view of the latest ``n`` epoch-ms timestamps."""
+        start, end = self._window(n)
+        view = self.timestamps[start:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, name):
+        """Return the most recent value of a column, or None if empty."""
+        with self.lock:
+            if not self._count:
+                return None
+            return float(self._data[name][self._head + self.capacity - 1])
+
+    def read(self, names, n=None):
+        """Copies of the latest ``n`` timestamps and named columns, taken
+        together under the lock so they describe the same samples."""
+        with self.lock:
+            start, end = self._window(n)
+            return (self.timestamps[start:end].copy(),
+                    {name: self._data[name][start:end].copy() for name in names})
+
+    def read_since(self, names, start):
+        """Like ``read``, for the samples taken at or after ``start`` (epoch
+        seconds); use it for a time window when the interval can vary."""
+        with self.lock:
+            lo, hi = self._window(None)
+            lo += int(np.searchsorted(self.timestamps[lo:hi], int(start * 1000), 'left'))
+            return (self.timestamps[lo:hi].copy(),
+                    {name: self._data[name][lo:hi].copy() for name in names})
+
+    def sequence_range(self, start=None, end=None):
+        """Sequence numbers (first, stop) of the held samples with
+        start <= timestamp <= end (epoch seconds; None leaves a side open).
+
+        Sample ``n`` is the n-th ever appended, so the numbers stay valid
+        while new samples arrive; see ``read_sequence``.
+        """
+        with self.lock:
+            lo, hi = self._window(None)
+            ts = self.timestamps[lo:hi]
+            first = 0 if start is None else int(np.searchsorted(ts, int(start * 1000), 'left'))
+            stop = len(ts) if end is None else int(np.searchsorted(ts, int(end * 1000), 'right'))
+            base = self.version - self._count
+            return base + first, base + max(first, stop)
+
+    def read_sequence(self, names, first, stop):
+        """Copies of samples ``first <= n < stop`` that are still held.
+
+        Returns (first sequence number actually read, timestamps, columns);
+        samples overwritten since ``sequence_range`` are skipped.
+        """
+        with self.lock:
+            first = max(first, self.version - self._count)
+            count = max(0, min(stop, self.version) - first)
+            start = self._head + self.capacity - (self.version - first)
+            return (first, self.timestamps[start:start + count].copy(),
+                    {name: self._data[name][start:start + count].copy() for name in names})
+
+    def nbytes(self):
+        """Return the fixed amount of memory held by the buffer."""
+        return self.timestamps.nbytes + sum(c.nbytes for c in self._data.values())
+
+
+class CoreHistory:
+    """Per-core CPU history as one preallocated [samples, cores] float32 matrix.
+
+    Uses the same mirrored layout as HistoryBuffer, so the latest ``n`` rows
+    are always a single contiguous, zero-copy slice.
+    """
+
+    def __init__(self, cores, capacity=300):
+        self.lock = threading.Lock()
+        self.cores = int(cores)
+        self.capacity = int(capacity)
+        self._data = np.full((2 * self.capacity, self.cores), np.nan, dtype=np.float32)
+        self._head = 0
+        self._count = 0
+        self.version = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, percents):
+        """Append one per-core vector; extra cores are dropped, missing ones NaN"""
+        row = np.full(self.cores, np.nan, dtype=np.float32)
+        values = np.asarray(percents, dtype=np.float32)[:self.cores]
+        row[:len(values)] = values
+
+        with self.lock:
+            slot = self._head
+            self._data[slot] = row
+            self._data[slot + self.capacity] = row
+            self._head = (slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self.version += 1
+
+    def view(self, n=None):
+        """Read-only [n, cores] view of the latest ``n`` samples, oldest first"""
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def read(self, n=None):
+        """Copy of the latest ``n`` samples, taken under the lock"""
+        with self.lock:
+            return np.array(self.view(n))
+
+    def nbytes(self):
+        return self._data.nbytes
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .instrumentation import SPAN_BUCKETS, bucket_bound
+
+log = logging.getLogger("system_resource_monitor")
+
+# (history column, metric name, help text)
+PROMETHEUS_GAUGES = (
+    ('cpu', 'srm_cpu_percent', 'Average CPU utilisation across all cores.'),
+    ('memory', 'srm_memory_percent', 'Physical memory in use.'),
+    ('gpu', 'srm_gpu_percent', 'Utilisation of the busiest GPU.'),
+    ('gpu_memory', 'srm_gpu_memory_percent', 'VRAM usage of the fullest GPU.'),
+    ('disk_read', 'srm_disk_read_bytes_per_second', 'Bytes read from all physical disks.'),
+    ('disk_write', 'srm_disk_write_bytes_per_second', 'Bytes written to all physical disks.'),
+    ('disk_iops', 'srm_disk_operations_per_second', 'Read and write operations on all disks.'),
+    ('net_rx', 'srm_network_receive_bytes_per_second', 'Bytes received on physical NICs.'),
+    ('net_tx', 'srm_network_transmit_bytes_per_second', 'Bytes sent on physical NICs.'),
+    ('net_rx_packets', 'srm_network_receive_packets_per_second',
+     'Packets received on physical NICs.'),
+    ('net_tx_packets', 'srm_network_transmit_packets_per_second',
+     'Packets sent on physical NICs.'),
+    ('self_cpu', 'srm_self_cpu_percent', 'CPU used by the monitor, in % of one core.'),
+    ('self_rss', 'srm_self_resident_bytes', 'Resident memory of the monitor process.'),
+    ('self_threads', 'srm_self_threads', 'Threads in the monitor process.'),
+)
+
+# (device prefix, column label, metric name, label name, help text)
+PROMETHEUS_IO_GAUGES = (
+    ('disk', 'read', 'srm_disk_device_read_bytes_per_second', 'device', 'Bytes read per disk.'),
+    ('disk', 'write', 'srm_disk_device_write_bytes_per_second', 'device',
+     'Bytes written per disk.'),
+    ('net', 'rx', 'srm_network_device_receive_bytes_per_second', 'interface',
+     'Bytes received per NIC.'),
+    ('net', 'tx', 'srm_network_device_transmit_bytes_per_second', 'interface',
+     'Bytes sent per NIC.'),
+    ('disk', 'read_ops', 'srm_disk_device_reads_per_second', 'device',
+     'Read operations per disk.'),
+    ('disk', 'write_ops', 'srm_disk_device_writes_per_second', 'device',
+     'Write operations per disk.'),
+    ('net', 'rx_packets', 'srm_network_device_receive_packets_per_second', 'interface',
+     'Packets received per NIC.'),
+    ('net', 'tx_packets', 'srm_network_device_transmit_packets_per_second', 'interface',
+     'Packets sent per NIC.'),
+)
+
+# (per-device field, metric name, help text)
+PROMETHEUS_GPU_GAUGES = (
+    ('utilization', 'srm_gpu_device_utilization_percent', 'GPU utilisation per device.'),
+    ('memory', 'srm_gpu_device_memory_percent', 'VRAM usage per device.'),
+    ('temperature', 'srm_gpu_device_temperature_celsius', 'GPU temperature per device.'),
+    ('power', 'srm_gpu_device_power_watts', 'GPU power draw per device.'),
+)
+
+CACHE_SIZE = 64
+
+
+def _number(value):
+    """JSON has no NaN; report missing values as null"""
+    return None if value is None or math.isnan(value) else round(float(value), 3)
+
+
+def _prometheus_value(value):
+    return 'NaN' if value is None or math.isnan(value) else repr(round(float(value), 3))
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def snapshot(collector):
+    """Latest value of every history column"""
+    history = collector.history
+    with history.lock:
+        timestamps = history.timestamps_view(1)
+        return {
+            'timestamp': int(timestamps[0]) if len(timestamps) else None,
+            'samples': history.version,
+            'values': {name: _number(history.latest(name)) for name in history.columns},
+            'gpu_devices': {str(index): name
+                            for index, name in collector.gpu_devices.items()},
+        }
+
+
+def history_query(collector, params):
+    """Time-range query served from the rollup tiers"""
+    now = time.time()
+    column = params.get('column', ['cpu'])[0]
+    if column not in collector.rollups.columns:
+        raise KeyError(column)
+    if 'range' in params:
+        start = now - float(params['range'][0])
+        end = now
+    else:
+        start = float(params.get('start', [now - 3600])[0])
+        end = float(params.get('end', [now])[0])
+    points = min(int(params.get('points', [500])[0]), 5000)
+
+    series = collector.rollups.query(column, start, end, points)
+    result = {'column': column, 'start': start, 'end': end,
+              'timestamps': [int(ts) for ts in series['timestamps']]}
+    for stat in ('min', 'avg', 'max', 'p95'):
+        result[stat] = [_number(value) for value in series[stat]]
+    return result
+
+
+def diagnostics(collector):
+    """The monitor's own overhead: span timings, resource usage, skipped work"""
+    history = collector.history
+    with history.lock:
+        process = {name: _number(history.latest(name))
+                   for name in ('self_cpu', 'self_rss', 'self_threads')}
+    spans = {}
+    for name, summary in collector.instruments.snapshot().items():
+        spans[name] = {key: summary[key] if key in ('count', 'buckets')
+                       else round(summary[key] * 1000, 4)
+                       for key in ('count', 'mean', 'p50', 'p99', 'max', 'buckets')}
+    return {
+        'process': process,
+        'spans_ms': spans,
+        'missed_ticks': dict(collector.core.missed) if collector.core else {},
+        'notifications_dropped': collector.notifications.dropped,
+    }
+
+
+def prometheus_text(collector):
+    """Current snapshot in the Prometheus text exposition format"""
+    with collector.history.lock:
+        return _prometheus_text(collector)
+
+
+def _prometheus_text(collector):
+    history = collector.history
+    lines = []
+    for column, metric, help_text in PROMETHEUS_GAUGES:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {_prometheus_value(history.latest(column))}')
+
+    devices = sorted(collector.gpu_devices.items())
+    if devices:
+        for field, metric, help_text in PROMETHEUS_GPU_GAUGES:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            for index, name in devices:
+                value = history.latest(f'gpu{index}_{field}')
+                lines.append(f'{metric}{{gpu="{index}",name="{_escape_label(name)}"}} '
+                             f'{_prometheus_value(value)}')
+
+    for prefix, label, metric, label_name, help_text in PROMETHEUS_IO_GAUGES:
+        devices = collector.io_devices.get(prefix, [])
+        if not devices:
+            continue
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for name in devices:
+            value = history.latest(f'{prefix}_{name}_{label}')
+            lines.append(f'{metric}{{{label_name}="{_escape_label(name)}"}} '
+                         f'{_prometheus_value(value)}')
+
+    lines.append('# HELP srm_span_duration_seconds Time spent in the monitor\'s own '
+                 'collectors, GPU reads, frames and exports.')
+    lines.append('# TYPE srm_span_duration_seconds histogram')
+    for name, summary in collector.instruments.snapshot().items():
+        label = _escape_label(name)
+        cumulative = 0
+        for index, count in enumerate(summary['buckets']):
+            cumulative += count
+            bound = bucket_bound(index)
+            le = '+Inf' if index == SPAN_BUCKETS - 1 else repr(bound)
+            lines.append(f'srm_span_duration_seconds_bucket{{span="{label}",le="{le}"}} '
+                         f'{cumulative}')
+        lines.append(f'srm_span_duration_seconds_sum{{span="{label}"}} {summary["total"]!r}')
+        lines.append(f'srm_span_duration_seconds_count{{span="{label}"}} {summary["count"]}')
+
+    lines.append('# HELP srm_samples_total Samples recorded since start.')
+    lines.append('# TYPE srm_samples_total counter')
+    lines.append(f'srm_samples_total {history.version}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Embedded asyncio HTTP server exposing the collector's data.
+
+    Endpoints:
+      /snapshot  latest values as JSON
+      /history   ?column=cpu&range=3600&points=500 (or start/end epoch seconds)
+      /metrics   Prometheus text format
+      /diagnostics  the monitor's own span timings and resource usage as JSON
+
+    Handlers never call psutil; they only read the history buffer. Response
+    bodies are serialised once per sample tick and cached, so any number of
+    scrapers polling between two samples share the same bytes.
+    """
+
+    ROUTES = {
+        '/': ('application/json', lambda c, p: json.dumps(snapshot(c))),
+        '/snapshot': ('application/json', lambda c, p: json.dumps(snapshot(c))),
+        '/history': ('application/json', lambda c, p: json.dumps(history_query(c, p))),
+        '/metrics': ('text/plain; version=0.0.4; charset=utf-8',
+                     lambda c, p: prometheus_text(c)),
+        '/diagnostics': ('application/json', lambda c, p: json.dumps(diagnostics(c))),
+    }
+
+    def __init__(self, collector, host='127.0.0.1', port=9800):
+        self.collector = collector
+        self.host = host
+        self.port = port
+        self._cache = {}
+        self._cache_version = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.error = None  # why the listener could not be started
+
+    def _render(self, target):
+        """Return (status, content type, body) for a request target"""
+        url = urlsplit(target)
+        route = self.ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            return '404 Not Found', 'text/plain', b'not found\n'
+
+        version = self.collector.history.version
+        if version != self._cache_version:
+            self._cache.clear()
+            self._cache_version = version
+        cached = self._cache.get(target)
+        if cached is not None:
+            return cached
+
+        content_type, render = route
+        try:
+            body = render(self.collector, parse_qs(url.query)).encode()
+        except (KeyError, ValueError) as e:
+            return '400 Bad Request', 'text/plain', f'bad request: {e}\n'.encode()
+        except Exception as e:
+            log.exception("HTTP %s failed", url.path)
+            body = json.dumps({'error': f'{type(e).__name__}: {e}'}).encode()
+            return '500 Internal Server Error', 'application/json', body
+
+        response = ('200 OK', content_type, body)
+        if len(self._cache) < CACHE_SIZE:
+            self._cache[target] = response
+        return response
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=10)
+                if header in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] not in ('GET', 'HEAD'):
+                status, content_type, body = ('405 Method Not Allowed',
+                                              'text/plain', b'method not allowed\n')
+            else:
+                status, content_type, body = self._render(parts[1])
+
+            head = (f'HTTP/1.1 {status}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Cache-Control: no-store\r\n'
+                    'Connection: close\r\n\r\n').encode()
+            writer.write(head if parts and parts[0] == 'HEAD' else head + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception:
+            log.exception("HTTP connection failed")
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except asyncio.CancelledError:
+            pass
+        except OSError as e:
+            self.error = e
+        finally:
+            self._ready.set()
+            self._loop.close()
+
+    def start(self):
+        """Serve from a background thread; returns once the socket is bound
+        and raises the OSError if it could not be"""
+        self._thread = threading.Thread(target=self._run, name='metrics-http',
+                                        daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self.error is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+            raise self.error
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
@@ -0,0 +1,125 @@
+import math
+import os
+import threading
+import time
+import psutil
+
+# Log2 buckets of microseconds: bucket 0 is < 1 µs, bucket i < 2**i µs and
+# the last one takes everything longer
+SPAN_BUCKETS = 32
+
+# History columns with the monitor's own resource usage (raw history only)
+SELF_COLUMNS = ['self_cpu', 'self_rss', 'self_threads']
+
+
+def bucket_bound(index):
+    """Upper bound of a histogram bucket in seconds"""
+    return math.inf if index >= SPAN_BUCKETS - 1 else 2 ** index / 1e6
+
+
+class SpanHistogram:
+    """Count, total, maximum and log2 histogram of one span's durations.
+
+    Recording is an integer ``bit_length`` and a few additions, so spans can
+    wrap every collector tick and frame without showing up in a profile.
+    Quantiles are interpolated within a bucket, which is good to within a
+    factor of two.
+    """
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * SPAN_BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[min((ns // 1000).bit_length(), SPAN_BUCKETS - 1)] += 1
+
+    def quantile(self, q):
+        """Approximate ``q`` quantile in seconds"""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                low = 0.0 if index == 0 else 2 ** (index - 1) / 1e6
+                high = min(bucket_bound(index), self.max_ns / 1e9)
+                return low + (high - low) * max(0.0, rank - seen) / count
+            seen += count
+        return 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total_ns / 1e9,
+            'mean': self.total_ns / self.count / 1e9 if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'max': self.max_ns / 1e9,
+            'buckets': list(self.buckets),
+        }
+
+
+class _Span:
+    __slots__ = ('instruments', 'name', 'started')
+
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.instruments.record(self.name, time.perf_counter_ns() - self.started)
+
+
+class Instrumentation:
+    """The monitor's own overhead: timing spans and process resource usage.
+
+    ``span(name)`` times a block into that span's histogram; names are
+    dotted, e.g. ``collect.cpu``, ``gpu.nvml``, ``render.graphs`` or
+    ``export.csv``. ``sample_process()`` reads this process's CPU time,
+    RSS and thread count for the ``self_*`` history columns.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}
+        self._process = psutil.Process(os.getpid())
+        self._last_cpu = None
+
+    def record(self, name, ns):
+        with self.lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = SpanHistogram()
+            histogram.add(ns)
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def snapshot(self):
+        """Summary of every span (durations in seconds), sorted by name"""
+        with self.lock:
+            return {name: self.spans[name].summary() for name in sorted(self.spans)}
+
+    def sample_process(self):
+        """``self_*`` column values: CPU as % of one core since the last call"""
+        with self._process.oneshot():
+            times = self._process.cpu_times()
+            rss = self._process.memory_info().rss
+            threads = self._process.num_threads()
+        now = time.monotonic()
+        cpu_time = times.user + times.system
+        percent = math.nan
+        if self._last_cpu is not None and now > self._last_cpu[1]:
+            percent = (cpu_time - self._last_cpu[0]) / (now - self._last_cpu[1]) * 100
+        self._last_cpu = (cpu_time, now)
+        return {'self_cpu': percent, 'self_rss': float(rss), 'self_threads': float(threads)}
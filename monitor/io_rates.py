@@ -0,0 +1,91 @@
+import re
+import numpy as np
+
+# psutil counter fields read per device, in matrix column order
+DISK_FIELDS = ('read_bytes', 'write_bytes', 'read_count', 'write_count')
+NET_FIELDS = ('bytes_recv', 'bytes_sent', 'packets_recv', 'packets_sent')
+
+# Per-device history column suffixes, one per field above:
+# <prefix>_<device>_<label>
+DEVICE_LABELS = {
+    'disk': ('read', 'write', 'read_ops', 'write_ops'),
+    'net': ('rx', 'tx', 'rx_packets', 'tx_packets'),
+}
+
+# A counter below this that goes backwards by more than half of it wrapped
+# as a 32-bit value; any other decrease means the device was reset
+COUNTER_WRAP = 2 ** 32
+
+# Partitions repeat their disk's traffic and virtual/loopback interfaces
+# repeat a physical one's, so neither counts towards totals or gets columns
+PARTITION_PATTERN = re.compile(
+    r'^((sd|hd|vd|xvd)[a-z]+\d+|(nvme\d+n\d+|mmcblk\d+)p\d+|(loop|ram|zram)\d+)$')
+VIRTUAL_NIC_PATTERN = re.compile(
+    r'^(lo\d*|Loopback.*|veth.*|docker\d*|br-.*|virbr.*|cni.*|flannel.*|'
+    r'(tun|tap|ifb|dummy)\d*)$')
+
+
+class CounterRates:
+    """Per-device rates from cumulative psutil counters, vectorised.
+
+    Every update turns the counters of all devices into one float64 matrix
+    and subtracts the previous one, so the cost is a handful of numpy
+    operations however many disks or NICs exist. Devices are matched by
+    name, so ones that appear get a zero rate for their first interval and
+    ones that disappear are simply dropped. ``physical`` masks out devices
+    matching ``exclude`` (partitions, virtual NICs) and is only rebuilt when
+    the device list changes.
+    """
+
+    def __init__(self, fields, exclude=None):
+        self.fields = fields
+        self.exclude = exclude
+        self.devices = []
+        self.rates = np.zeros((0, len(fields)))
+        self.physical = np.zeros(0, dtype=bool)
+        # (devices, rates, physical) replaced as one tuple for other threads
+        self.latest = ([], self.rates, self.physical)
+        self.index = {}  # device name -> row in the previous matrix
+        self._previous = None
+        self._previous_time = None
+
+    def update(self, counters, timestamp):
+        """Return (device names, [devices, fields] rates per second)"""
+        names = list(counters or {})
+        if not names:
+            self.devices, self.rates = [], np.zeros((0, len(self.fields)))
+            self.physical = np.zeros(0, dtype=bool)
+            self.latest = (self.devices, self.rates, self.physical)
+            return self.devices, self.rates
+
+        record_type = type(counters[names[0]])
+        columns = [record_type._fields.index(field) for field in self.fields]
+        current = np.array(list(counters.values()), dtype=np.float64)[:, columns]
+        rates = np.zeros_like(current)
+
+        if self._previous is not None and timestamp > self._previous_time:
+            if names == self.devices:
+                have = slice(None)
+                previous = self._previous
+            else:
+                rows = np.array([self.index.get(name, -1) for name in names])
+                have = rows >= 0
+                previous = self._previous[rows[have]]
+            delta = current[have] - previous
+            wrapped = ((delta < 0) & (previous < COUNTER_WRAP) &
+                       (delta + COUNTER_WRAP < COUNTER_WRAP / 2))
+            delta = np.where(wrapped, delta + COUNTER_WRAP, delta)
+            # Still negative: the counter was reset, report no traffic
+            rates[have] = np.maximum(delta, 0) / (timestamp - self._previous_time)
+
+        if names != self.devices:
+            self.index = {name: row for row, name in enumerate(names)}
+            self.physical = np.array(
+                [not (self.exclude and self.exclude.match(name)) for name in names],
+                dtype=bool)
+        self.devices = names
+        self.rates = rates
+        self._previous = current
+        self._previous_time = timestamp
+        self.latest = (names, rates, self.physical)
+        return names, rates
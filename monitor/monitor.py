@@ -1,346 +1,106 @@
 import time
-from tkinter import messagebox
-import psutil
-from plyer import notification
-import threading
-import subprocess
-import platform
-import os
-import sys
 
-# Multiple GPU monitoring approaches
-try:
-    import GPUtil
-    GPUTIL_AVAILABLE = True
-except ImportError:
-    GPUTIL_AVAILABLE = False
-
-try:
-    import nvidia_ml_py3 as nvml
-    nvml.nvmlInit()
-    NVML_AVAILABLE = True
-except (ImportError, Exception):
-    NVML_AVAILABLE = False
-
-def get_amd_gpu_info():
-    """Get AMD GPU information using multiple methods"""
-    gpu_usage = 0.0
-    gpu_memory = 0.0
-    
-    if platform.system() == 'Windows':
-        try:
-            # FIXED: Add creationflags to prevent console window
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            result = subprocess.run([
-                'powershell', '-Command',
-                '''
-                try {
-                    $counters = Get-Counter "\\GPU Engine(*)\\Utilization Percentage" -ErrorAction Stop
-                    $maxUsage = ($counters.CounterSamples | Measure-Object CookedValue -Maximum).Maximum
-                    Write-Output $maxUsage
-                } catch {
-                    Write-Output "0"
-                }
-                '''
-            ], capture_output=True, text=True, timeout=5,
-               startupinfo=startupinfo,
-               creationflags=subprocess.CREATE_NO_WINDOW)
-            
-            if result.returncode == 0 and result.stdout and result.stdout.strip():
-                try:
-                    gpu_usage = float(result.stdout.strip())
-                    gpu_usage = min(max(gpu_usage, 0), 100)
-                except (ValueError, AttributeError):
-                    gpu_usage = 0.0
-        except Exception:
-            pass
-    
-    return gpu_usage, gpu_memory
-
-def get_gpu_info():
-    """Get GPU usage information with AMD support"""
-    gpu_usage = 0.0
-    gpu_memory = 0.0
-    
-    if NVML_AVAILABLE:
-        try:
-            device_count = nvml.nvmlDeviceGetCount()
-            if device_count > 0:
-                handle = nvml.nvmlDeviceGetHandleByIndex(0)
-                util = nvml.nvmlDeviceGetUtilizationRates(handle)
-                gpu_usage = util.gpu
-                mem_info = nvml.nvmlDeviceGetMemoryInfo(handle)
-                gpu_memory = (mem_info.used / mem_info.total) * 100
-                return gpu_usage, gpu_memory
-        except Exception:
-            pass
-    
-    if GPUTIL_AVAILABLE:
-        try:
-            gpus = GPUtil.getGPUs()
-            if gpus and len(gpus) > 0:
-                gpu = gpus[0]
-                gpu_usage = gpu.load * 100
-                gpu_memory = gpu.memoryUtil * 100
-                return gpu_usage, gpu_memory
-        except Exception:
-            pass
-    
-    gpu_usage, gpu_memory = get_amd_gpu_info()
-    return gpu_usage, gpu_memory
+from .hardware import get_capabilities
+from .gpu_backends import GPU_FIELDS
+from .io_rates import DEVICE_LABELS
 
 def check_gpu_existence():
-    """Check if GPU hardware exists"""
-    
-    if platform.system() == 'Windows':
-        try:
-            # FIXED: Add creationflags to prevent console window
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            result = subprocess.run([
-                'wmic', 'path', 'win32_VideoController', 'get', 'name'
-            ], capture_output=True, text=True, timeout=5, shell=True,
-               startupinfo=startupinfo,
-               creationflags=subprocess.CREATE_NO_WINDOW)
-            
-            if result.returncode == 0:
-                output = result.stdout.lower()
-                gpu_keywords = [
-                    'nvidia', 'geforce', 'quadro', 'rtx', 'gtx',
-                    'amd', 'radeon', 'rx', 'vega', 'navi',
-                    'intel arc', 'intel iris', 'intel xe'
-                ]
-                if any(keyword in output for keyword in gpu_keywords):
-                    return True
-        except:
-            pass
-    
-    elif platform.system() == 'Linux':
-        try:
-            if os.path.exists('/sys/class/drm/card0/device/vendor'):
-                with open('/sys/class/drm/card0/device/vendor', 'r') as f:
-                    vendor = f.read().strip()
-                    if vendor in ['0x1002', '0x10de', '0x8086']:
-                        return True
-        except:
-            pass
-    
-    return False
+    """Check if GPU hardware exists, using the cached capability probe"""
+    return get_capabilities().gpu_detected
 
 def get_gpu_diagnostic_info():
     """Get diagnostic information about GPU detection"""
-    info = {
-        'gpu_detected': check_gpu_existence(),
-        'nvml_available': NVML_AVAILABLE,
-        'gputil_available': GPUTIL_AVAILABLE,
-        'platform': platform.system(),
-        'gpu_type': 'Unknown'
+    return dict(get_capabilities().info)
+
+def gpu_device_values(self, devices):
+    """Flatten per-device GPU readings into gpu<N>_<field> history columns"""
+    values = {}
+    for device in devices:
+        if device.index not in self.gpu_devices:
+            # Columns first: readers look them up as soon as the device is listed
+            for field in GPU_FIELDS:
+                self.history.add_column(f"gpu{device.index}_{field}")
+            self.gpu_devices[device.index] = device.name
+            if self.storage is not None:
+                self.storage.set_meta(gpu_devices={
+                    str(index): name for index, name in self.gpu_devices.items()})
+        for field in GPU_FIELDS:
+            values[f"gpu{device.index}_{field}"] = getattr(device, field)
+    return values
+
+def device_rate_values(self, prefix, counter_rates):
+    """Per-device rates as <prefix>_<device>_<label> columns, one per
+    DEVICE_LABELS entry.
+
+    Only the first IO_MAX_DEVICES physical devices get history columns, so
+    hosts with hundreds of NICs or disks keep a bounded history; the rest
+    still count towards the totals.
+    """
+    labels = DEVICE_LABELS[prefix]
+    tracked = self.io_devices[prefix]
+    if len(tracked) < self.IO_MAX_DEVICES:
+        for name, physical in zip(counter_rates.devices, counter_rates.physical):
+            if len(tracked) >= self.IO_MAX_DEVICES:
+                break
+            if physical and name not in tracked:
+                tracked.append(name)
+                for label in labels:
+                    self.history.add_column(f"{prefix}_{name}_{label}")
+                if self.storage is not None:
+                    self.storage.set_meta(io_devices=self.io_devices)
+
+    values = {}
+    for name in tracked:
+        row = counter_rates.index.get(name)
+        if row is None:
+            continue  # the device is gone
+        for field, label in enumerate(labels):
+            values[f"{prefix}_{name}_{label}"] = float(counter_rates.rates[row, field])
+    return values
+
+def disk_values(self, disk_rates):
+    """Disk throughput and IOPS totals plus per-disk throughput and IOPS"""
+    total = disk_rates.rates[disk_rates.physical].sum(axis=0)
+    values = {
+        'disk_read': float(total[0]),
+        'disk_write': float(total[1]),
+        'disk_iops': float(total[2] + total[3]),
     }
-    
-    if platform.system() == 'Windows':
-        try:
-            # FIXED: Add creationflags to prevent console window
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            result = subprocess.run([
-                'wmic', 'path', 'win32_VideoController', 'get', 'name'
-            ], capture_output=True, text=True, timeout=5, shell=True,
-               startupinfo=startupinfo,
-               creationflags=subprocess.CREATE_NO_WINDOW)
-            
-            if result.returncode == 0 and result.stdout:
-                output = result.stdout.lower()
-                if 'amd' in output or 'radeon' in output:
-                    info['gpu_type'] = 'AMD'
-                elif 'nvidia' in output or 'geforce' in output:
-                    info['gpu_type'] = 'NVIDIA'
-                elif 'intel' in output:
-                    info['gpu_type'] = 'Intel'
-        except:
-            pass
-    
-    return info
-
-def monitor_resources(self):
-    cpu_high_start_time = None
-    memory_high_start_time = None
-    gpu_high_start_time = None
-    
-    try:
-        gpu_info = get_gpu_diagnostic_info()
-        self.gpu_info = gpu_info
-    except:
-        self.gpu_info = {'gpu_detected': False, 'gpu_type': 'Unknown'}
-
-    while self.monitoring:
+    values.update(device_rate_values(self, 'disk', disk_rates))
+    return values
+
+def network_values(self, net_rates):
+    """Network throughput and packet rate totals plus per-NIC throughput and
+    packet rates"""
+    total = net_rates.rates[net_rates.physical].sum(axis=0)
+    values = {
+        'net_rx': float(total[0]),
+        'net_tx': float(total[1]),
+        'net_rx_packets': float(total[2]),
+        'net_tx_packets': float(total[3]),
+    }
+    values.update(device_rate_values(self, 'net', net_rates))
+    return values
+
+def record_sample(self, values, timestamp):
+    """Store one sample in the raw history, the rollup tiers and the disk log"""
+    with self.history.lock:  # a history restore swaps the rollups in between
+        self.history.append(values, timestamp=timestamp)
+        self.rollups.add(values, timestamp)
+    if self.storage is not None:
         try:
-            cpu_percent_per_core = psutil.cpu_percent(interval=self.CPU_MON_INTERVAL, percpu=True)
-            avg_cpu_percent = sum(cpu_percent_per_core) / len(cpu_percent_per_core)
-            memory_percent = psutil.virtual_memory().percent
-            
-            gpu_percent, gpu_memory_percent = get_gpu_info()
-
-            self.cpu_history.append(avg_cpu_percent)
-            self.memory_history.append(memory_percent)
-            self.gpu_history.append(gpu_percent)
-            self.gpu_memory_history.append(gpu_memory_percent)
-            self.time_history.append(time.strftime('%H:%M:%S'))
-
-            self.all_cpu_history.append(avg_cpu_percent)
-            self.all_memory_history.append(memory_percent)
-            self.all_gpu_history.append(gpu_percent)
-            self.all_gpu_memory_history.append(gpu_memory_percent)
-            self.all_time_history.append(time.strftime('%H:%M:%S'))
-
-            current_time = time.time()
-
-            if avg_cpu_percent > self.CPU_THRESHOLD:
-                if cpu_high_start_time is None:
-                    cpu_high_start_time = current_time
-                elif current_time - cpu_high_start_time >= 60:
-                    try:
-                        notification.notify(
-                            title="CPU Alert",
-                            message=f"CPU usage over {self.CPU_THRESHOLD}% for {int(current_time - cpu_high_start_time)}s",
-                            timeout=5
-                        )
-                    except:
-                        pass
-                    cpu_high_start_time = None
-            else:
-                cpu_high_start_time = None
-
-            if memory_percent > self.MEMORY_THRESHOLD:
-                if memory_high_start_time is None:
-                    memory_high_start_time = current_time
-                elif current_time - memory_high_start_time >= 120:
-                    try:
-                        notification.notify(
-                            title="Memory Alert",
-                            message=f"Memory usage over {self.MEMORY_THRESHOLD}% for 120s",
-                            timeout=5
-                        )
-                    except:
-                        pass
-                    memory_high_start_time = None
-            else:
-                memory_high_start_time = None
-
-            if gpu_percent > 0.0 and gpu_percent > self.GPU_THRESHOLD:
-                if gpu_high_start_time is None:
-                    gpu_high_start_time = current_time
-                elif current_time - gpu_high_start_time >= 60:
-                    try:
-                        notification.notify(
-                            title="GPU Alert",
-                            message=f"GPU usage over {self.GPU_THRESHOLD}% for {int(current_time - gpu_high_start_time)}s",
-                            timeout=5
-                        )
-                    except:
-                        pass
-                    gpu_high_start_time = None
-            else:
-                gpu_high_start_time = None
-
-        except Exception:
+            self.storage.append(self.history.columns, values, timestamp)
+        except OSError:
             pass
 
-def update_graph(self):
-    """Update the resource usage graphs"""
-    while self.monitoring:
-        try:
-            for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
-                ax.clear()
-                ax.grid(True, alpha=0.3)
-                ax.set_facecolor('#fafafa')
-
-            recent_length = min(60, len(self.all_time_history))
-            if recent_length > 0:
-                time_data = self.all_time_history[-recent_length:]
-                cpu_data = self.all_cpu_history[-recent_length:]
-                memory_data = self.all_memory_history[-recent_length:]
-                gpu_data = self.all_gpu_history[-recent_length:]
-                gpu_memory_data = self.all_gpu_memory_history[-recent_length:]
-
-                self.ax1.plot(range(len(cpu_data)), cpu_data, 
-                             color='#0078d4', linewidth=2, label='CPU Usage')
-                self.ax1.axhline(y=self.CPU_THRESHOLD, color='#d13438', 
-                               linestyle='--', alpha=0.7, label=f'Threshold ({self.CPU_THRESHOLD}%)')
-                self.ax1.set_title('CPU Usage', fontweight='bold')
-                self.ax1.set_ylabel('Percentage (%)')
-                self.ax1.set_ylim(0, 100)
-                self.ax1.legend()
-
-                self.ax2.plot(range(len(memory_data)), memory_data, 
-                             color='#107c10', linewidth=2, label='Memory Usage')
-                self.ax2.axhline(y=self.MEMORY_THRESHOLD, color='#d13438', 
-                               linestyle='--', alpha=0.7, label=f'Threshold ({self.MEMORY_THRESHOLD}%)')
-                self.ax2.set_title('Memory Usage', fontweight='bold')
-                self.ax2.set_ylabel('Percentage (%)')
-                self.ax2.set_ylim(0, 100)
-                self.ax2.legend()
-
-                gpu_detected = check_gpu_existence()
-                has_gpu_data = any(x > 0.0 for x in gpu_data)
-                
-                if gpu_detected:
-                    self.ax3.plot(range(len(gpu_data)), gpu_data, 
-                                 color='#ca5010', linewidth=2, label='GPU Usage')
-                    
-                    if has_gpu_data:
-                        self.ax3.axhline(y=self.GPU_THRESHOLD, color='#d13438', 
-                                       linestyle='--', alpha=0.7, label=f'Threshold ({self.GPU_THRESHOLD}%)')
-                    
-                    if not has_gpu_data:
-                        self.ax3.text(0.5, 0.3, 'GPU Detected\n(Idle or Limited Monitoring)', 
-                                     transform=self.ax3.transAxes, ha='center', va='center',
-                                     fontsize=10, alpha=0.7)
-                    
-                    self.ax3.legend()
-                else:
-                    self.ax3.text(0.5, 0.5, 'No Dedicated GPU\nDetected', 
-                                 transform=self.ax3.transAxes, ha='center', va='center',
-                                 fontsize=12, alpha=0.6)
-                
-                self.ax3.set_title('GPU Usage', fontweight='bold')
-                self.ax3.set_ylabel('Percentage (%)')
-                self.ax3.set_xlabel('Time')
-                self.ax3.set_ylim(0, 100)
-
-                has_gpu_memory_data = any(x > 0.0 for x in gpu_memory_data)
-                
-                if gpu_detected:
-                    self.ax4.plot(range(len(gpu_memory_data)), gpu_memory_data, 
-                                 color='#8764b8', linewidth=2, label='GPU Memory')
-                    
-                    if not has_gpu_memory_data:
-                        self.ax4.text(0.5, 0.3, 'GPU Memory\n(Limited Monitoring)', 
-                                     transform=self.ax4.transAxes, ha='center', va='center',
-                                     fontsize=10, alpha=0.7)
-                    
-                    self.ax4.legend()
-                else:
-                    self.ax4.text(0.5, 0.5, 'No GPU Memory\nMonitoring Available', 
-                                 transform=self.ax4.transAxes, ha='center', va='center',
-                                 fontsize=12, alpha=0.6)
-                
-                self.ax4.set_title('GPU Memory', fontweight='bold')
-                self.ax4.set_ylabel('Percentage (%)')
-                self.ax4.set_xlabel('Time')
-                self.ax4.set_ylim(0, 100)
-
-            import matplotlib.pyplot as plt
-            plt.tight_layout()
-            self.canvas.draw()
-            
-        except Exception:
-            pass
-        
-        time.sleep(1)
\ No newline at end of file
+def query_range(self, column, seconds, max_points=500):
+    """Return min/avg/max/p95 series for the last ``seconds`` of a metric"""
+    now = time.time()
+    return self.rollups.query(column, now - seconds, now, max_points)
+
+def scan_processes(self):
+    """Refresh the process table and hand the records to any view"""
+    self.process_tracker.scan()
+    records = self.process_tracker.records()
+    self.process_history.update(records)
+    self.publish_processes(records)
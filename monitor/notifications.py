@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+log = logging.getLogger("system_resource_monitor")
+
+SINK_NAMES = ('desktop', 'log', 'file', 'webhook')
+
+
+class Notification:
+    """One alert on its way to the sinks"""
+
+    def __init__(self, key, title, message, timestamp=None):
+        self.key = key  # rule name; cooldowns and de-duplication use it
+        self.title = title
+        self.message = message
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.count = 1  # identical alerts folded into this one
+
+    def as_dict(self):
+        return {'key': self.key, 'title': self.title, 'message': self.message,
+                'timestamp': self.timestamp, 'count': self.count}
+
+
+class DesktopSink:
+    """Desktop popup via plyer; a storm becomes a single summary popup"""
+
+    def send(self, notifications):
+        from plyer import notification
+        if len(notifications) == 1:
+            title, message = notifications[0].title, notifications[0].message
+        else:
+            title = f"{len(notifications)} alerts"
+            message = "\n".join(n.message for n in notifications)
+        notification.notify(title=title, message=message, timeout=5)
+
+
+class LogSink:
+    def send(self, notifications):
+        for n in notifications:
+            suffix = f" (x{n.count})" if n.count > 1 else ""
+            log.warning("%s: %s%s", n.title, n.message, suffix)
+
+
+class FileSink:
+    """Append one JSON object per alert to ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, notifications):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            for n in notifications:
+                f.write(json.dumps(n.as_dict()) + "\n")
+
+
+class WebhookSink:
+    """POST each batch as ``{"alerts": [...]}`` JSON to ``url``"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notifications):
+        body = json.dumps({'alerts': [n.as_dict() for n in notifications]}).encode()
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def build_sinks(settings):
+    """Sinks named in ``settings.NOTIFY_SINKS``; objects with ``send`` pass through"""
+    sinks = []
+    for sink in settings.NOTIFY_SINKS:
+        if sink == 'desktop':
+            sinks.append(DesktopSink())
+        elif sink == 'log':
+            sinks.append(LogSink())
+        elif sink == 'file':
+            sinks.append(FileSink(settings.NOTIFY_FILE))
+        elif sink == 'webhook':
+            sinks.append(WebhookSink(settings.NOTIFY_WEBHOOK, settings.NOTIFY_TIMEOUT))
+        elif hasattr(sink, 'send'):
+            sinks.append(sink)
+        else:
+            raise ValueError(f"unknown notification sink {sink!r}")
+    return sinks
+
+
+class NotificationDispatcher:
+    """Delivers alerts to sinks from a background thread.
+
+    ``submit`` only puts the alert on a bounded queue, so the sampling loop
+    never waits on a notification backend; when the queue is full the alert
+    is dropped and counted. The worker collects everything that arrives
+    within ``batch_window`` seconds of the first alert, folds identical
+    alerts together, drops rules still inside their ``cooldown`` and hands
+    the rest to every sink as one batch. Sink failures are logged and
+    counted on the worker; they never reach the sampling loop.
+    """
+
+    def __init__(self, sinks, cooldown=300, batch_window=2, max_queue=1000):
+        self.sinks = list(sinks)
+        self.cooldown = cooldown
+        self.batch_window = batch_window
+        self.sent = 0
+        self.dropped = 0
+        self.suppressed = 0  # held back by a cooldown
+        self.errors = 0
+        self._queue = queue.Queue(max_queue)
+        self._last_sent = {}  # key -> time of the last delivery
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def submit(self, title, message, key=None):
+        """Queue an alert without blocking; returns False if it was dropped"""
+        try:
+            self._queue.put_nowait(Notification(key or title, title, message))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _collect(self, first):
+        """The first alert plus everything arriving within the batch window"""
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            # When stopping, take what is queued without waiting for more
+            remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    def _filter(self, batch):
+        """Fold duplicates together and drop rules that are cooling down"""
+        now = time.monotonic()
+        merged = {}
+        for n in batch:
+            if (n.key, n.message) in merged:
+                merged[(n.key, n.message)].count += 1
+                continue
+            last = self._last_sent.get(n.key)
+            if last is not None and now - last < self.cooldown:
+                self.suppressed += 1
+                continue
+            merged[(n.key, n.message)] = n
+        for n in merged.values():
+            self._last_sent[n.key] = now
+        return list(merged.values())
+
+    def _deliver(self, notifications):
+        for sink in self.sinks:
+            try:
+                sink.send(notifications)
+            except Exception:
+                self.errors += 1
+                log.exception("Notification sink %s failed", type(sink).__name__)
+        self.sent += len(notifications)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    break
+                continue
+            if first is None:
+                # Wake-up from stop(); anything queued before it is still sent
+                if self._queue.empty():
+                    break
+                continue
+            notifications = self._filter(self._collect(first))
+            if notifications:
+                self._deliver(notifications)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='notifications', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Deliver what is already queued, then stop the worker"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
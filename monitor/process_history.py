@@ -0,0 +1,130 @@
+import heapq
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Fields kept per sample, in slab order
+PROCESS_HISTORY_FIELDS = ('cpu_percent_normalized', 'rss', 'io_bytes_per_sec')
+
+
+class ProcessHistoryStore:
+    """Rolling CPU/RSS/I/O history for the busiest processes in fixed memory.
+
+    All history lives in one preallocated float32 slab of shape
+    ``[slots, length, fields]``; each tracked process owns one slot used as a
+    ring buffer. The ``slots`` busiest processes of every scan get a slot,
+    exited processes give theirs back immediately, and when a busy newcomer
+    needs a slot the least recently busy process is evicted. Memory never grows
+    past the slab, whatever the size of the process table.
+    """
+
+    def __init__(self, slots=64, length=120):
+        self.slots = int(slots)
+        self.length = int(length)
+        self.slab = np.full((self.slots, self.length, len(PROCESS_HISTORY_FIELDS)),
+                            np.nan, dtype=np.float32)
+        self._heads = np.zeros(self.slots, dtype=np.int64)
+        self._counts = np.zeros(self.slots, dtype=np.int64)
+        self._lru = OrderedDict()  # (pid, create_time) -> slot, least recent first
+        self._free = list(range(self.slots - 1, -1, -1))
+        self._lock = threading.Lock()
+        # Bumped on every update so views can tell when to redraw
+        self.version = 0
+
+    def __contains__(self, key):
+        return key in self._lru
+
+    def _release(self, key):
+        slot = self._lru.pop(key)
+        self._counts[slot] = 0
+        self._free.append(slot)
+
+    def _claim(self, key):
+        if not self._free:
+            self._release(next(iter(self._lru)))
+        slot = self._free.pop()
+        self.slab[slot] = np.nan
+        self._heads[slot] = 0
+        self._counts[slot] = 0
+        self._lru[key] = slot
+        return slot
+
+    def update(self, records):
+        """Record one scan; ``records`` are ProcessTracker records"""
+        busiest = heapq.nlargest(self.slots, records,
+                                 key=lambda record: record['cpu_percent_normalized'])
+        live = {(record['pid'], record['create_time']) for record in records}
+
+        with self._lock:
+            for key in [key for key in self._lru if key not in live]:
+                self._release(key)
+
+            # Refresh every tracked busy process first, so a newcomer only
+            # evicts a process outside this scan's top ``slots``
+            keys = [(record['pid'], record['create_time']) for record in busiest]
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+            for record, key in zip(busiest, keys):
+                if key in self._lru:
+                    continue
+                if self._free or record['cpu_percent_normalized'] > 0:
+                    # Idle newcomers only fill free slots, never evict
+                    self._claim(key)
+
+            # Every tracked process gets a sample, busy this scan or not
+            for record in records:
+                slot = self._lru.get((record['pid'], record['create_time']))
+                if slot is None:
+                    continue
+                head = self._heads[slot]
+                for field, name in enumerate(PROCESS_HISTORY_FIELDS):
+                    value = record[name]
+                    self.slab[slot, head, field] = np.nan if value is None else value
+                self._heads[slot] = (head + 1) % self.length
+                self._counts[slot] = min(self._counts[slot] + 1, self.length)
+            self.version += 1
+
+    def series(self, key, field=None):
+        """History for one process, oldest first, as a copy.
+
+        Returns a ``[n, fields]`` array, or ``[n]`` when ``field`` is given;
+        empty when the process has no history.
+        """
+        with self._lock:
+            slot = self._lru.get(key)
+            if slot is None:
+                data = self.slab[0, :0].copy()
+            else:
+                count, head = self._counts[slot], self._heads[slot]
+                index = (head - count + np.arange(count)) % self.length
+                data = self.slab[slot, index]
+        if field is not None:
+            return data[:, PROCESS_HISTORY_FIELDS.index(field)]
+        return data
+
+    def nbytes(self):
+        return self.slab.nbytes
+
+
+def format_process_history(store, records):
+    """Text section listing the stored history of each record, oldest first"""
+    blocks = []
+    for record in records:
+        key = (record['pid'], record['create_time'])
+        if key not in store:
+            continue
+        series = store.series(key)
+        if not len(series):
+            continue
+        cpu, rss, io = series.T
+        blocks.append("\n".join((
+            f"PID {record['pid']} ({record['name']}), {len(series)} samples",
+            "  CPU %:    " + " ".join(f"{v:.1f}" for v in cpu),
+            "  RSS MB:   " + " ".join(f"{v / 1048576:.1f}" for v in rss),
+            "  I/O KB/s: " + " ".join("-" if np.isnan(v) else f"{v / 1024:.1f}"
+                                      for v in io),
+        )))
+    if not blocks:
+        return ""
+    return "History (oldest first, one sample per scan)\n" + "\n\n".join(blocks)
@@ -0,0 +1,235 @@
+import heapq
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+# (column id, heading, width, anchor, record key used for sorting)
+PROCESS_COLUMNS = (
+    ('name', 'Name', 220, 'w', 'name'),
+    ('pid', 'PID', 70, 'e', 'pid'),
+    ('cpu', 'CPU %', 80, 'e', 'cpu_percent_normalized'),
+    ('memory', 'Memory %', 90, 'e', 'memory_percent'),
+    ('io', 'I/O', 100, 'e', 'io_bytes_per_sec'),
+)
+
+SORT_KEYS = {column: key for column, _, _, _, key in PROCESS_COLUMNS}
+
+SPARKLINE_WIDTH = 60
+SPARKLINE_HEIGHT = 16
+SPARKLINE_COLOR = '#0078d4'
+SPARKLINE_BACKGROUND = '#ffffff'
+
+
+def format_rate(value):
+    """Human readable bytes per second; unreadable counters show as a dash"""
+    if value is None:
+        return '—'
+    for unit in ('B/s', 'KB/s', 'MB/s', 'GB/s'):
+        if value < 1024 or unit == 'GB/s':
+            return f"{value:.0f} {unit}" if unit == 'B/s' else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def format_record(record):
+    """Cell text for one process, in PROCESS_COLUMNS order"""
+    return (
+        record['name'],
+        str(record['pid']),
+        f"{record['cpu_percent_normalized']:.2f}",
+        f"{record['memory_percent']:.2f}",
+        format_rate(record['io_bytes_per_sec']),
+    )
+
+
+def select_rows(records, column, descending, count):
+    """The first ``count`` records in table order, by heap selection: the
+    same rows a full sort would put on top, without sorting the rest"""
+    key = SORT_KEYS[column]
+    if key == 'name':
+        sort_key = lambda record: record['name'].lower()
+    else:
+        # Unreadable values sort below every real one
+        sort_key = lambda record: (record[key] is not None, record[key] or 0)
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(count, records, key=sort_key)
+
+
+def sparkline_data(values, width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT,
+                   color=SPARKLINE_COLOR, background=SPARKLINE_BACKGROUND):
+    """Bar sparkline of the newest ``width`` values as PhotoImage.put() data.
+
+    Bars are scaled to the largest value (at least 5) and right-aligned, so
+    a process with a short history fills in from the right.
+    """
+    values = np.nan_to_num(np.asarray(values[-width:], dtype=np.float32))
+    scale = max(float(values.max()) if len(values) else 0.0, 5.0)
+    bars = np.zeros(width, dtype=np.int64)
+    if len(values):
+        bars[width - len(values):] = np.ceil(values / scale * (height - 1))
+    levels = np.arange(height - 1, -1, -1)[:, None]
+    filled = levels < bars[None, :]
+    return ' '.join('{' + ' '.join(color if on else background for on in row) + '}'
+                    for row in filled)
+
+
+class ProcessTable:
+    """Virtualised, sortable process list on top of ``ttk.Treeview``.
+
+    The tree only ever holds the rows that fit on screen; a separate
+    scrollbar tracks the offset into the full record list. Only the rows
+    down to the bottom of the visible window are selected in sort order, so
+    a refresh never sorts the whole process list. Rows are keyed by PID and
+    updated cell by cell, so a refresh only touches what changed. Sorting
+    re-orders the last published records and never asks the sampler for a
+    new scan.
+
+    With a ``history`` store, column #0 shows a CPU sparkline per row; the
+    images are only redrawn when the store has new samples.
+    """
+
+    def __init__(self, parent, sort_column='cpu', descending=True, history=None):
+        self.frame = ttk.Frame(parent)
+        self.history = history
+        self._images = {}  # iid -> (PhotoImage, history version drawn)
+        self.records = []
+        self._ordered = []  # leading rows of ``records`` in sort order
+        self.sort_column = sort_column
+        self.descending = descending
+        self.offset = 0
+        self.visible_rows = 25
+        self._rows = {}  # iid -> cell values currently shown
+
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in PROCESS_COLUMNS],
+                                 show='tree headings' if history else 'headings',
+                                 height=self.visible_rows, selectmode='browse')
+        if history is not None:
+            self.tree.heading('#0', text='CPU trend')
+            self.tree.column('#0', width=SPARKLINE_WIDTH + 24, stretch=False)
+        for column, heading, width, anchor, _ in PROCESS_COLUMNS:
+            self.tree.heading(column, text=heading,
+                              command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor=anchor,
+                             stretch=(column == 'name'))
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self._scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self._scroll('scroll', 3, 'units'))
+        self._update_headings()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_records(self, records):
+        """Show a new set of process records"""
+        self.records = records
+        self._ordered = []
+        self.render()
+
+    def ordered(self, count):
+        """The first ``count`` records in the current sort order"""
+        if len(self._ordered) >= min(count, len(self.records)):
+            return self._ordered[:count]
+        return select_rows(self.records, self.sort_column, self.descending, count)
+
+    def sort_by(self, column):
+        """Sort by a column; clicking the active column flips the order"""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = column != 'name'
+        self._update_headings()
+        self._ordered = []
+        self.render()
+
+    def _update_headings(self):
+        for column, heading, _, _, _ in PROCESS_COLUMNS:
+            if column == self.sort_column:
+                heading += ' ▼' if self.descending else ' ▲'
+            self.tree.heading(column, text=heading)
+
+    def _max_offset(self):
+        return max(0, len(self.records) - self.visible_rows)
+
+    def _scroll(self, action, amount=None, what=None):
+        if action == 'moveto':
+            offset = int(float(amount) * len(self.records))
+        else:
+            step = self.visible_rows if what == 'pages' else 1
+            offset = self.offset + int(amount) * step
+        offset = min(max(0, offset), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _on_wheel(self, event):
+        self._scroll('scroll', -1 if event.delta > 0 else 1, 'units')
+        return 'break'
+
+    def _on_resize(self, event):
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        header = 25
+        rows = max(1, (event.height - header) // int(row_height))
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def render(self):
+        """Bring the visible window of rows in line with the sorted records"""
+        self.offset = min(self.offset, self._max_offset())
+        needed = min(self.offset + self.visible_rows, len(self.records))
+        if len(self._ordered) < needed:
+            # One page of slack so scrolling down a little reuses the selection
+            self._ordered = select_rows(self.records, self.sort_column, self.descending,
+                                        needed + self.visible_rows)
+        window = self._ordered[self.offset:self.offset + self.visible_rows]
+
+        shown = set()
+        for position, record in enumerate(window):
+            iid = str(record['pid'])
+            values = format_record(record)
+            shown.add(iid)
+            current = self._rows.get(iid)
+            if current is None:
+                self.tree.insert('', position, iid=iid, values=values)
+            else:
+                if self.tree.index(iid) != position:
+                    self.tree.move(iid, '', position)
+                for (column, *_), old, new in zip(PROCESS_COLUMNS, current, values):
+                    if old != new:
+                        self.tree.set(iid, column, new)
+            self._rows[iid] = values
+            if self.history is not None:
+                self._draw_sparkline(iid, record)
+
+        stale = [iid for iid in self._rows if iid not in shown]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._rows[iid]
+                self._images.pop(iid, None)
+
+        total = len(self.records)
+        if total:
+            self.scrollbar.set(self.offset / total,
+                               min(1.0, (self.offset + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _draw_sparkline(self, iid, record):
+        image, drawn = self._images.get(iid, (None, None))
+        if drawn == self.history.version:
+            return
+        if image is None:
+            image = tk.PhotoImage(master=self.tree, width=SPARKLINE_WIDTH,
+                                  height=SPARKLINE_HEIGHT)
+            self.tree.item(iid, image=image)
+        values = self.history.series((record['pid'], record['create_time']),
+                                     'cpu_percent_normalized')
+        image.put(sparkline_data(values), to=(0, 0))
+        self._images[iid] = (image, self.history.version)
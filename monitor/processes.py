@@ -0,0 +1,195 @@
+import time
+import psutil
+from .procfs import PROCFS_AVAILABLE, ProcfsScanner
+
+
+class ProcessEntry:
+    """Tracked state for one process between scans"""
+
+    __slots__ = ('process', 'pid', 'create_time', 'name', 'cpu_time', 'seen_at',
+                 'cpu_percent', 'rss', 'memory_percent', 'io_bytes', 'io_rate',
+                 'io_readable')
+
+    def __init__(self, pid, create_time, name, cpu_time, seen_at, process=None):
+        self.process = process
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name
+        self.cpu_time = cpu_time
+        self.seen_at = seen_at
+        self.cpu_percent = 0.0
+        self.rss = 0
+        self.memory_percent = 0.0
+        self.io_bytes = None
+        self.io_rate = None  # None when the counters are not readable
+        self.io_readable = True
+
+    def record(self):
+        return {
+            'pid': self.pid,
+            'name': self.name,
+            'create_time': self.create_time,
+            'cpu_percent_normalized': self.cpu_percent,
+            'memory_percent': self.memory_percent,
+            'rss': self.rss,
+            'io_bytes_per_sec': self.io_rate,
+        }
+
+
+class ProcessTracker:
+    """Process table keyed by (pid, create_time) and updated in place.
+
+    ``psutil.Process`` objects are created once per process and kept across
+    scans; exited processes are dropped by diffing the PID set. CPU usage is
+    the delta of user+system time since the previous scan divided by the
+    wall time elapsed and the core count, so each scan needs only one
+    ``oneshot`` read per live process and no sort of the full table.
+
+    ``scanner`` selects how processes are read: ``'procfs'`` uses the Linux
+    fast path in ``procfs.ProcfsScanner``, ``'psutil'`` the portable path and
+    ``'auto'`` picks procfs when it is available. Both produce the same records.
+    """
+
+    def __init__(self, scanner='auto', proc_root='/proc'):
+        self.entries = {}  # (pid, create_time) -> ProcessEntry
+        self._by_pid = {}  # pid -> key
+        self.cpu_count = psutil.cpu_count() or 1
+        self.procfs = None
+        if scanner == 'procfs' or (scanner == 'auto' and PROCFS_AVAILABLE):
+            self.procfs = ProcfsScanner(proc_root)
+
+    def _add(self, pid, now, total_memory):
+        process = psutil.Process(pid)
+        with process.oneshot():
+            create_time = process.create_time()
+            times = process.cpu_times()
+            name = process.name()
+            try:
+                rss = process.memory_info().rss
+            except psutil.AccessDenied:
+                rss = 0
+        entry = ProcessEntry(pid, create_time, name, times.user + times.system, now,
+                             process)
+        # Filled on the first scan, as the procfs path does
+        entry.rss = rss
+        entry.memory_percent = rss / total_memory * 100
+        entry.io_bytes = self._psutil_io(entry)
+        key = (pid, create_time)
+        self.entries[key] = entry
+        self._by_pid[pid] = key
+        return entry
+
+    def _remove(self, pid):
+        key = self._by_pid.pop(pid, None)
+        if key is not None:
+            self.entries.pop(key, None)
+
+    def _update(self, entry, cpu_time, rss, now, total_memory, io_bytes=None):
+        elapsed = now - entry.seen_at
+        if elapsed > 0:
+            entry.cpu_percent = max(0.0, (cpu_time - entry.cpu_time) / elapsed
+                                    * 100 / self.cpu_count)
+            if io_bytes is not None and entry.io_bytes is not None:
+                entry.io_rate = max(0.0, (io_bytes - entry.io_bytes) / elapsed)
+        entry.io_bytes = io_bytes
+        entry.cpu_time = cpu_time
+        entry.seen_at = now
+        entry.rss = rss
+        entry.memory_percent = rss / total_memory * 100
+
+    def scan(self):
+        """Refresh the table; returns the number of processes tracked"""
+        if self.procfs is not None:
+            return self._scan_procfs()
+
+        now = time.monotonic()
+        total_memory = psutil.virtual_memory().total
+        pids = set(psutil.pids())
+
+        for pid in self._by_pid.keys() - pids:
+            self._remove(pid)
+        for pid in pids - self._by_pid.keys():
+            try:
+                self._add(pid, now, total_memory)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+        for key, entry in list(self.entries.items()):
+            if entry.seen_at == now:
+                continue  # just added and read by _add
+            try:
+                with entry.process.oneshot():
+                    create_time = entry.process.create_time()
+                    if create_time != entry.create_time:
+                        # The PID was reused by a new process
+                        self._remove(entry.pid)
+                        self._add(entry.pid, now, total_memory)
+                        continue
+                    times = entry.process.cpu_times()
+                    rss = entry.process.memory_info().rss
+                    io_bytes = self._psutil_io(entry)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self._remove(entry.pid)
+                continue
+            except psutil.AccessDenied:
+                continue
+
+            self._update(entry, times.user + times.system, rss, now, total_memory,
+                         io_bytes)
+
+        return len(self.entries)
+
+    @staticmethod
+    def _psutil_io(entry):
+        # Only asked once for processes whose counters are not readable
+        if not entry.io_readable:
+            return None
+        try:
+            counters = entry.process.io_counters()
+        except (psutil.AccessDenied, AttributeError):
+            entry.io_readable = False
+            return None
+        return counters.read_bytes + counters.write_bytes
+
+    def _procfs_io(self, entry):
+        if not entry.io_readable:
+            return None
+        try:
+            return self.procfs.read_io(entry.pid)
+        except PermissionError:
+            entry.io_readable = False
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _scan_procfs(self):
+        now = time.monotonic()
+        total_memory = psutil.virtual_memory().total
+        seen = set()
+
+        for pid in self.procfs.pids():
+            try:
+                create_time, name, cpu_time, rss = self.procfs.read(pid)
+            except (OSError, ValueError, IndexError):
+                continue  # exited between listing and reading
+            seen.add(pid)
+            entry = self.entries.get((pid, create_time))
+            if entry is None:
+                self._remove(pid)  # gone, or the PID was reused
+                entry = ProcessEntry(pid, create_time, name, cpu_time, now)
+                self.entries[(pid, create_time)] = entry
+                self._by_pid[pid] = (pid, create_time)
+                entry.rss = rss
+                entry.memory_percent = rss / total_memory * 100
+                entry.io_bytes = self._procfs_io(entry)
+            else:
+                self._update(entry, cpu_time, rss, now, total_memory,
+                             self._procfs_io(entry))
+
+        for pid in self._by_pid.keys() - seen:
+            self._remove(pid)
+        return len(self.entries)
+
+    def records(self):
+        """Every tracked process as a record, unsorted"""
+        return [entry.record() for entry in self.entries.values()]
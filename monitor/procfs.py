@@ -0,0 +1,84 @@
+import os
+
+PROCFS_AVAILABLE = os.path.isfile('/proc/self/stat') and os.path.isfile('/proc/self/statm')
+
+# Zero-based positions in /proc/[pid]/stat after the ")" closing the name
+# (field 3, "state", is position 0)
+STAT_UTIME = 11
+STAT_STIME = 12
+STAT_STARTTIME = 19
+
+# The kernel truncates process names to 15 characters
+TASK_COMM_LEN = 15
+
+
+class ProcfsScanner:
+    """Linux fast path that reads /proc/[pid]/stat and statm directly.
+
+    Each file is read with a single ``os.readv`` into a preallocated buffer
+    and only the fields needed for the process table are parsed, instead of
+    building a ``psutil.Process`` and opening a file per attribute.
+    """
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self._stat_buffer = bytearray(1024)
+        self._statm_buffer = bytearray(256)
+        self._cmdline_buffer = bytearray(4096)
+        self._io_buffer = bytearray(512)
+        self.boot_time = self._read_boot_time()
+
+    def _read_boot_time(self):
+        with open(os.path.join(self.proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        raise RuntimeError("btime not found in /proc/stat")
+
+    def _read(self, path, buffer):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.readv(fd, [buffer])
+        finally:
+            os.close(fd)
+        return bytes(buffer[:size])
+
+    def pids(self):
+        return [int(name) for name in os.listdir(self.proc_root) if name.isdigit()]
+
+    def read(self, pid):
+        """Return (create_time, name, cpu seconds, rss bytes) for one PID"""
+        base = f"{self.proc_root}/{pid}/"
+        stat = self._read(base + 'stat', self._stat_buffer)
+        statm = self._read(base + 'statm', self._statm_buffer)
+
+        # The name may itself contain spaces or parentheses
+        name_end = stat.rindex(b')')
+        name = stat[stat.index(b'(') + 1:name_end].decode(errors='replace')
+        fields = stat[name_end + 2:].split()
+        cpu_time = (int(fields[STAT_UTIME]) + int(fields[STAT_STIME])) / self.clock_ticks
+        create_time = self.boot_time + int(fields[STAT_STARTTIME]) / self.clock_ticks
+        rss = int(statm.split()[1]) * self.page_size
+        if len(name) >= TASK_COMM_LEN:
+            name = self._full_name(base, name)
+        return create_time, name, cpu_time, rss
+
+    def read_io(self, pid):
+        """Bytes read from plus written to storage; raises PermissionError
+        for other users' processes unless running privileged"""
+        total = 0
+        for line in self._read(f"{self.proc_root}/{pid}/io", self._io_buffer).splitlines():
+            if line.startswith((b'read_bytes:', b'write_bytes:')):
+                total += int(line.split()[1])
+        return total
+
+    def _full_name(self, base, name):
+        """Recover a truncated name from the command line, as psutil does"""
+        try:
+            cmdline = self._read(base + 'cmdline', self._cmdline_buffer)
+        except OSError:
+            return name
+        program = os.path.basename(cmdline.split(b'\0', 1)[0].decode(errors='replace'))
+        return program if program.startswith(name) else name
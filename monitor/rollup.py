@@ -0,0 +1,348 @@
+import math
+import warnings
+import numpy as np
+from .history import FIRST_SAMPLE_WEIGHT, MAX_SAMPLE_WEIGHT, HistoryBuffer, sample_weights
+
+STATS = ('min', 'avg', 'max', 'p95')
+
+# (bucket width in seconds, number of buckets kept)
+DEFAULT_TIERS = (
+    (60, 7 * 24 * 60),         # 1 minute buckets for 7 days
+    (15 * 60, 90 * 24 * 4),    # 15 minute buckets for 90 days
+    (60 * 60, 2 * 365 * 24),   # 1 hour buckets for 2 years
+)
+
+# A tier may return up to this many times the requested points before the
+# query moves on to the next, coarser tier
+REDUCE_FACTOR = 4
+
+# The streaming p95 sees the series resampled (sample and hold) at this
+# period in seconds, so a burst of fast samples is not over-counted
+P95_RESAMPLE = 1.0
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac's P² algorithm)."""
+
+    def __init__(self, p=0.95):
+        self.p = p
+        self.reset()
+
+    def reset(self):
+        self._initial = []
+        self._q = None
+        self._n = None
+        self._desired = None
+        self._increments = None
+
+    def add(self, x):
+        if self._q is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                self._initial.sort()
+                p = self.p
+                self._q = self._initial
+                self._n = [0, 1, 2, 3, 4]
+                self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+                self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+            return
+
+        q, n = self._q, self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self):
+        if self._q is not None:
+            return self._q[2]
+        if not self._initial:
+            return math.nan
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(math.ceil(self.p * len(ordered))) - 1)]
+
+
+def weighted_percentile(block, weights, q):
+    """Per-column ``q`` percentile of the rows of ``block``, each row counting
+    ``weights[row]``; NaN values are ignored"""
+    order = np.argsort(block, axis=0)  # NaN sorts last
+    ordered = np.take_along_axis(block, order, axis=0)
+    weight = np.where(np.isnan(ordered), 0.0, weights[order])
+    cumulative = np.cumsum(weight, axis=0)
+    total = cumulative[-1]
+    index = np.argmax(cumulative >= q / 100 * total, axis=0)
+    return np.where(total > 0, ordered[index, np.arange(block.shape[1])], np.nan)
+
+
+def p95_repeats(weights, credit):
+    """How often each sample enters the streaming p95, and the credit left over"""
+    elapsed = credit + np.cumsum(weights)
+    steps = np.floor(elapsed / P95_RESAMPLE + 0.5)
+    repeats = np.diff(steps, prepend=0).astype(np.int64)
+    return repeats, float(elapsed[-1] - steps[-1] * P95_RESAMPLE) if len(weights) else credit
+
+
+class RollupTier:
+    """One resolution level: an open bucket plus a ring of closed buckets.
+
+    Samples are weighted by the time they stand for (see
+    ``history.sample_weights``), so the average stays a time average when
+    the sampling interval varies.
+    """
+
+    def __init__(self, columns, resolution, capacity):
+        self.resolution = resolution
+        self.columns = list(columns)
+        self.buckets = HistoryBuffer(
+            [f"{name}:{stat}" for name in self.columns for stat in STATS],
+            capacity=capacity)
+        self._bucket_start = None
+        self._reset()
+
+    def _reset(self):
+        size = len(self.columns)
+        self._min = np.full(size, np.inf)
+        self._max = np.full(size, -np.inf)
+        self._sum = np.zeros(size)
+        self._weight = np.zeros(size)
+        self._count = np.zeros(size)
+        self._p95 = [P2Quantile(0.95) for _ in self.columns]
+
+    def add(self, values, timestamp, weight=1.0, repeats=1):
+        bucket_start = timestamp - timestamp % self.resolution
+        if self._bucket_start is None:
+            self._bucket_start = bucket_start
+        elif bucket_start != self._bucket_start:
+            self.flush()
+            self._bucket_start = bucket_start
+
+        valid = ~np.isnan(values)
+        np.fmin(self._min, values, out=self._min, where=valid)
+        np.fmax(self._max, values, out=self._max, where=valid)
+        self._sum += np.where(valid, values * weight, 0.0)
+        self._weight += valid * weight
+        self._count += valid
+        for i in np.flatnonzero(valid):
+            for _ in range(repeats):
+                self._p95[i].add(float(values[i]))
+
+    def extend(self, timestamps, matrix, weights, repeats):
+        """Fold many samples (rows of ``matrix``) in at once.
+
+        Buckets that are complete within the batch are computed with numpy,
+        including an exact time-weighted p95; only the first and last bucket
+        go through the streaming path so they merge with the open bucket
+        correctly. ``weights`` and ``repeats`` are per row, as in ``add``.
+        """
+        if not len(timestamps):
+            return
+        starts = timestamps - timestamps % self.resolution
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1,
+                                 [len(timestamps)]))
+        groups = list(zip(bounds[:-1], bounds[1:]))
+
+        for row in range(*groups[0]):
+            self.add(matrix[row], timestamps[row], weights[row], repeats[row])
+        if len(groups) == 1:
+            return
+        self.flush()
+        self._bucket_start = None
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN buckets
+            for lo, hi in groups[1:-1]:
+                block = matrix[lo:hi]
+                weight = weights[lo:hi]
+                valid = ~np.isnan(block)
+                stats = {'min': np.nanmin(block, axis=0),
+                         'avg': (np.where(valid, block, 0.0) * weight[:, None]).sum(axis=0) /
+                                (valid * weight[:, None]).sum(axis=0),
+                         'max': np.nanmax(block, axis=0),
+                         'p95': weighted_percentile(block, weight, 95)}
+                self.buckets.append(
+                    {f"{name}:{stat}": stats[stat][i]
+                     for i, name in enumerate(self.columns) for stat in STATS},
+                    timestamp=starts[lo])
+
+        for row in range(*groups[-1]):
+            self.add(matrix[row], timestamps[row], weights[row], repeats[row])
+
+    def flush(self):
+        """Close the open bucket and store its statistics."""
+        if self._bucket_start is None or not self._count.any():
+            return
+        row = {}
+        for i, name in enumerate(self.columns):
+            if self._count[i]:
+                p95 = self._p95[i].value()
+                row[f"{name}:min"] = self._min[i]
+                row[f"{name}:avg"] = (self._sum[i] / self._weight[i] if self._weight[i]
+                                      else np.nan)
+                row[f"{name}:max"] = self._max[i]
+                # Too short to be resampled at all: the maximum bounds the p95
+                row[f"{name}:p95"] = self._max[i] if math.isnan(p95) else p95
+        self.buckets.append(row, timestamp=self._bucket_start)
+        self._reset()
+
+
+class RollupStore:
+    """Tiered retention: raw samples in ``raw`` plus incrementally maintained
+    min/avg/max/p95 buckets at each resolution in ``tiers``.
+
+    Shares the raw buffer's lock, so a query never sees a half-written sample.
+    """
+
+    def __init__(self, raw, columns, tiers=DEFAULT_TIERS):
+        self.raw = raw
+        self.lock = raw.lock
+        self.columns = list(columns)
+        self.tiers = [RollupTier(self.columns, resolution, capacity)
+                      for resolution, capacity in tiers]
+        self._last_time = None  # of the previous sample, for its weight
+        self._credit = 0.0  # resampling phase of the streaming p95
+
+    def add(self, values, timestamp):
+        """Fold one raw sample into every tier."""
+        vector = np.array([values.get(name, np.nan) for name in self.columns],
+                          dtype=np.float64)
+        with self.lock:
+            if self._last_time is None:
+                weight = FIRST_SAMPLE_WEIGHT
+            else:
+                weight = min(max(timestamp - self._last_time, 0.0), MAX_SAMPLE_WEIGHT)
+            self._last_time = timestamp
+            self._credit += weight
+            repeats = int(self._credit / P95_RESAMPLE + 0.5)
+            self._credit -= repeats * P95_RESAMPLE
+            for tier in self.tiers:
+                tier.add(vector, timestamp, weight, repeats)
+
+    def extend(self, timestamps, values):
+        """Fold many samples in at once; ``timestamps`` in epoch seconds and
+        ``values`` mapping column name to an array"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        matrix = np.column_stack([
+            np.asarray(values[name], dtype=np.float64) if name in values
+            else np.full(len(timestamps), np.nan) for name in self.columns])
+        with self.lock:
+            weights = sample_weights(timestamps, self._last_time)
+            repeats, self._credit = p95_repeats(weights, self._credit)
+            if len(timestamps):
+                self._last_time = float(timestamps[-1])
+            for tier in self.tiers:
+                tier.extend(timestamps, matrix, weights, repeats)
+
+    def _covers(self, buffer, start_ms):
+        if not len(buffer):
+            return False
+        # A buffer that never wrapped holds everything since monitoring began
+        return len(buffer) < buffer.capacity or buffer.timestamps_view(len(buffer))[0] <= start_ms
+
+    def query(self, column, start, end, max_points=500):
+        """Return timestamps (epoch ms) and min/avg/max/p95 arrays for a column
+        between ``start`` and ``end`` (epoch seconds), with at most
+        ``max_points`` points. The finest tier that covers the range within
+        the point budget is used, so the raw history is never scanned.
+        The arrays returned are copies that stay valid while sampling goes on."""
+        with self.lock:
+            result = self._query(column, start, end, max_points)
+            return {key: np.array(value) for key, value in result.items()}
+
+    def _query(self, column, start, end, max_points):
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        sources = [(self.raw, None)] + [(tier.buckets, tier) for tier in self.tiers]
+
+        chosen = None
+        for buffer, tier in sources:
+            if not self._covers(buffer, start_ms):
+                continue
+            timestamps = buffer.timestamps_view()
+            # Include the bucket that is still open at ``start``
+            first = start_ms if tier is None else start_ms - tier.resolution * 1000
+            lo = np.searchsorted(timestamps, first, side='right' if tier else 'left')
+            hi = np.searchsorted(timestamps, end_ms, side='right')
+            # Merging a few points per output is cheaper than dropping to a
+            # much coarser tier
+            if hi - lo <= max_points * REDUCE_FACTOR:
+                chosen = (buffer, tier, lo, hi)
+                break
+
+        if chosen is None:
+            # Fall back to the coarsest data that exists
+            for buffer, tier in reversed(sources):
+                if len(buffer):
+                    timestamps = buffer.timestamps_view()
+                    chosen = (buffer, tier,
+                              np.searchsorted(timestamps, start_ms, side='left'),
+                              np.searchsorted(timestamps, end_ms, side='right'))
+                    break
+            else:
+                empty = np.empty(0, dtype=np.float32)
+                return {'timestamps': np.empty(0, dtype=np.int64), 'min': empty,
+                        'avg': empty, 'max': empty, 'p95': empty}
+
+        buffer, tier, lo, hi = chosen
+        timestamps = buffer.timestamps_view()[lo:hi]
+        weights = None
+        if tier is None:
+            values = buffer.view(column)[lo:hi]
+            result = {'timestamps': timestamps, 'min': values, 'avg': values,
+                      'max': values, 'p95': values}
+            # Raw samples may be unevenly spaced; merge them as a time average
+            previous = buffer.timestamps_view()[lo - 1] / 1000 if lo > 0 else None
+            weights = sample_weights(timestamps / 1000, previous)
+        else:
+            result = {'timestamps': timestamps}
+            for stat in STATS:
+                result[stat] = buffer.view(f"{column}:{stat}")[lo:hi]
+
+        return reduce_points(result, max_points, weights)
+
+
+def reduce_points(series, max_points, weights=None):
+    """Merge neighbouring points so that at most ``max_points`` remain.
+
+    ``weights`` (seconds per point) make the merged average a time average;
+    by default every point counts the same.
+    """
+    size = len(series['timestamps'])
+    if size <= max_points or max_points <= 0:
+        return series
+    group = int(math.ceil(size / max_points))
+    starts = np.arange(0, size, group)
+    avg = series['avg']
+    if weights is None:
+        weights = np.ones(size)
+    valid = np.add.reduceat(~np.isnan(avg) * weights, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'timestamps': series['timestamps'][starts],
+            'min': np.fmin.reduceat(series['min'], starts),
+            'avg': np.add.reduceat(np.nan_to_num(avg) * weights, starts) / valid,
+            'max': np.fmax.reduceat(series['max'], starts),
+            # Upper bound: the merged p95 cannot exceed the largest member p95
+            'p95': np.fmax.reduceat(series['p95'], starts),
+        }
@@ -0,0 +1,40 @@
+import numpy as np
+import psutil
+
+
+class CpuSampler:
+    """Non-blocking CPU utilisation from ``psutil.cpu_times`` deltas.
+
+    Each call compares the per-core counters with the previous call, so the
+    measurement window is simply the time between two samples and nothing
+    has to sleep inside psutil.
+    """
+
+    def __init__(self):
+        self._previous = self._read()
+
+    @staticmethod
+    def _read():
+        times = np.array(psutil.cpu_times(percpu=True), dtype=np.float64)
+        fields = psutil.cpu_times()._fields
+        idle = times[:, fields.index('idle')]
+        if 'iowait' in fields:
+            idle = idle + times[:, fields.index('iowait')]
+        # guest time is already included in user/nice on Linux
+        total = times[:, [i for i, name in enumerate(fields)
+                          if name not in ('guest', 'guest_nice')]].sum(axis=1)
+        return total, idle
+
+    def sample(self):
+        """Per-core busy percentages since the previous call"""
+        total, idle = self._read()
+        previous_total, previous_idle = self._previous
+        self._previous = (total, idle)
+        if len(total) != len(previous_total):
+            # A core went on- or offline; start a fresh window
+            return np.zeros(len(total))
+        elapsed = total - previous_total
+        busy = elapsed - (idle - previous_idle)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(elapsed > 0, busy / elapsed * 100, 0.0)
+        return np.clip(percent, 0.0, 100.0)
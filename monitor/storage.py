@@ -0,0 +1,226 @@
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+MAGIC = b'SRMLOG01'
+SEGMENT_PATTERN = 'segment-*.srm'
+
+
+def record_dtype(columns):
+    """Fixed-width record layout: int64 epoch-ms timestamp + float32 per column"""
+    return np.dtype([('ts', '<i8')] + [(name, '<f4') for name in columns])
+
+
+def _header_bytes(columns, meta):
+    payload = json.dumps({'columns': list(columns), 'meta': meta}).encode()
+    length = len(MAGIC) + 4 + len(payload)
+    padding = -length % 8  # keep records 8-byte aligned in the file
+    return MAGIC + struct.pack('<I', len(payload) + padding) + payload + b' ' * padding
+
+
+class SegmentReader:
+    """Memory-mapped view of one segment; records are paged in on access.
+
+    A trailing partial record (from a crash mid-write) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a metrics segment")
+            (length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(length).decode())
+        self.columns = header['columns']
+        self.meta = header.get('meta', {})
+        self.dtype = record_dtype(self.columns)
+        self.offset = len(MAGIC) + 4 + length
+
+        count = max(0, (os.path.getsize(path) - self.offset) // self.dtype.itemsize)
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                     offset=self.offset, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def between(self, start_ms, end_ms):
+        """Records with start_ms <= ts <= end_ms, still memory-mapped"""
+        ts = self.records['ts']
+        lo = np.searchsorted(ts, start_ms, side='left')
+        hi = np.searchsorted(ts, end_ms, side='right')
+        return self.records[lo:hi]
+
+
+def list_segments(directory):
+    """Segment paths, oldest first (names embed their creation time and a
+    sequence number for segments opened within the same millisecond)"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+class SegmentLog:
+    """Append-only, fixed-width binary metrics log split into segments.
+
+    Writes go through a buffered file and are flushed and fsynced by a
+    background thread every ``fsync_interval`` seconds, so the sampling
+    thread never waits on the disk. A new segment is started when the
+    current one reaches ``max_bytes`` or ``max_age`` seconds, when the set of
+    columns changes, and on every start; the oldest segments are deleted once
+    the directory grows beyond ``retention_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=16 * 1024 * 1024, max_age=6 * 3600,
+                 fsync_interval=5, retention_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync_interval = fsync_interval
+        self.retention_bytes = retention_bytes
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._columns = None
+        self._struct = None
+        self._opened_at = 0
+        self._size = 0
+        self._meta = {}
+        self._stop = threading.Event()
+        self._flusher = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def set_meta(self, **meta):
+        """Metadata stored in the header of subsequent segments"""
+        self._meta.update(meta)
+
+    def _open_segment(self, columns):
+        self._close_segment()
+        # A roll within the same millisecond as the previous one gets the
+        # next sequence number; never append to an existing segment
+        stamp = int(time.time() * 1000)
+        for sequence in range(10000):
+            path = os.path.join(self.directory, f"segment-{stamp:015d}-{sequence:04d}.srm")
+            try:
+                self._file = open(path, 'xb')
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(f"no free segment name for {stamp} in {self.directory}")
+        header = _header_bytes(columns, self._meta)
+        self._file.write(header)
+        self._columns = list(columns)
+        self._struct = struct.Struct('<q' + 'f' * len(columns))
+        self._opened_at = time.time()
+        self._size = len(header)
+        self._enforce_retention()
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _enforce_retention(self):
+        segments = list_segments(self.directory)
+        sizes = [os.path.getsize(path) for path in segments]
+        total = sum(sizes)
+        # Never delete the segment currently being written (the newest one)
+        for path, size in zip(segments[:-1], sizes[:-1]):
+            if total <= self.retention_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def append(self, columns, values, timestamp):
+        """Append one record; ``values`` maps column name to value"""
+        with self._lock:
+            if (self._file is None or columns != self._columns or
+                    self._size >= self.max_bytes or
+                    timestamp - self._opened_at >= self.max_age):
+                self._open_segment(columns)
+            record = self._struct.pack(int(timestamp * 1000),
+                                       *(values.get(name, np.nan) for name in columns))
+            self._file.write(record)
+            self._size += len(record)
+
+    def sync(self):
+        """Flush buffered records and fsync them to disk"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            fd = os.dup(self._file.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def start(self):
+        self._stop.clear()
+
+        def flush_loop():
+            while not self._stop.wait(self.fsync_interval):
+                try:
+                    self.sync()
+                except OSError:
+                    pass
+
+        self._flusher = threading.Thread(target=flush_loop, name='segment-fsync',
+                                         daemon=True)
+        self._flusher.start()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=2)
+            self._flusher = None
+        with self._lock:
+            self._close_segment()
+
+    def read_recent(self, max_records, paths=None):
+        """Newest ``max_records`` records as (columns, records) per segment,
+        oldest first, touching only the segments needed. ``paths`` limits
+        the read to those segments."""
+        chunks = []
+        remaining = max_records
+        if paths is None:
+            paths = list_segments(self.directory)
+        for path in reversed(paths):
+            if remaining <= 0:
+                break
+            try:
+                segment = SegmentReader(path)
+            except (OSError, ValueError):
+                continue
+            records = segment.records[-remaining:] if remaining < len(segment) else segment.records
+            if len(records):
+                chunks.append((segment, records))
+                remaining -= len(records)
+        return list(reversed(chunks))
+
+    def read_range(self, start, end):
+        """Yield (segment, records) for epoch-second range [start, end]"""
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        for path in list_segments(self.directory):
+            try:
+                segment = SegmentReader(path)
+            except (OSError, ValueError):
+                continue
+            if not len(segment) or segment.records['ts'][-1] < start_ms:
+                continue
+            if segment.records['ts'][0] > end_ms:
+                break
+            records = segment.between(start_ms, end_ms)
+            if len(records):
+                yield segment, records
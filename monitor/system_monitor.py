@@ -1,40 +1,34 @@
+import logging
 import tkinter as tk
 from tkinter import ttk
-from collections import deque
-import threading
 from tkinter import messagebox
 from utils.utils import export_data
-from .monitor import monitor_resources, update_graph
-from .gui import create_gui
-import psutil
+from .collector import Collector
+from .gui import (build_tab, create_gui, draw_diagnostics, draw_frame, draw_heatmap,
+                  draw_io, sync_layout)
+from .process_view import format_rate
+from .process_history import format_process_history
 import queue
-import time
-from concurrent.futures import ThreadPoolExecutor
 
-class ResourceMonitor:
+log = logging.getLogger("system_resource_monitor")
+
+class ResourceMonitor(Collector):
     def __init__(self, current_version):
+        super().__init__()
         self.CURRENT_VERSION = current_version
-        self.CPU_THRESHOLD = 85
-        self.MEMORY_THRESHOLD = 90
-        self.GPU_THRESHOLD = 99.5
-        self.HISTORY_LENGTH = 60
-        self.CPU_MON_INTERVAL = 1
-
-        self.cpu_history = deque(maxlen=self.HISTORY_LENGTH)
-        self.memory_history = deque(maxlen=self.HISTORY_LENGTH)
-        self.gpu_history = deque(maxlen=self.HISTORY_LENGTH)
-        self.gpu_memory_history = deque(maxlen=self.HISTORY_LENGTH)
-        self.time_history = deque(maxlen=self.HISTORY_LENGTH)
-
-        self.all_cpu_history = []
-        self.all_memory_history = []
-        self.all_gpu_history = []
-        self.all_gpu_memory_history = []
-        self.all_time_history = []
-
-        self.monitoring = False
+
+        self.GRAPH_RANGE = None  # seconds shown in the graphs; None = live view
+        self.GRAPH_MAX_POINTS = 300
+        self.REFRESH_RATE = 2  # max graph redraws per second
+
+        self._frame_job = None
+        self._drawn_version = -1
+        self._heatmap_version = -1
+        self._io_version = -1
+        self._diagnostics_version = -1
+        self._render_errors = set()  # (view, error) already logged
+        self.export_job = None
         self.process_queue = queue.Queue()
-        self.process_monitoring_thread = None
 
         self.root = tk.Tk()
         self.root.title("System Resource Monitor v2.0")
@@ -75,28 +69,104 @@ class ResourceMonitor:
         
         self.root.configure(bg=bg_color)
 
+    def visible_tab(self):
+        """Index of the tab on screen, or None when the window is hidden"""
+        try:
+            if self.root.state() == 'iconic' or not self.root.winfo_viewable():
+                return None
+            return self.tab_control.index('current')
+        except tk.TclError:
+            return None
+
+    def schedule_frame(self):
+        """Frame scheduler: runs on the Tk thread via root.after.
+
+        The sampler only appends to the history buffer; its version counter
+        tells the scheduler whether anything new arrived, so any number of
+        samples between two frames is coalesced into a single redraw.
+        """
+        if not self.monitoring:
+            self._frame_job = None
+            return
+
+        tab = self.visible_tab()
+        build_tab(self, tab)
+        if tab == 0:
+            version = self.history.version
+            if sync_layout(self):
+                self._drawn_version = -1
+            elif version != self._drawn_version:
+                self._drawn_version = version
+                try:
+                    with self.instruments.span('render.graphs'):
+                        draw_frame(self)
+                except Exception as e:
+                    self.log_render_error('graphs', e)
+        elif tab == 1 and self.core_history.version != self._heatmap_version:
+            self._heatmap_version = self.core_history.version
+            try:
+                with self.instruments.span('render.heatmap'):
+                    draw_heatmap(self)
+            except Exception as e:
+                self.log_render_error('heatmap', e)
+        elif tab == 2 and self.history.version != self._io_version:
+            self._io_version = self.history.version
+            try:
+                with self.instruments.span('render.io'):
+                    draw_io(self)
+            except Exception as e:
+                self.log_render_error('io', e)
+        elif tab == 4 and self.history.version != self._diagnostics_version:
+            self._diagnostics_version = self.history.version
+            try:
+                draw_diagnostics(self)
+            except Exception as e:
+                self.log_render_error('diagnostics', e)
+
+        self._frame_job = self.root.after(int(1000 / self.REFRESH_RATE),
+                                          self.schedule_frame)
+
+    def log_render_error(self, view, error):
+        """Log a failed redraw with its traceback, once per distinct error;
+        the next frame tries again"""
+        key = (view, type(error).__name__, str(error))
+        if key not in self._render_errors:
+            self._render_errors.add(key)
+            log.exception("Drawing the %s view failed", view)
+
     def update_process_info(self):
-        """Update top processes in the GUI."""
+        """Update the process table with the newest scan, skipping stale ones."""
+        records = None
         try:
-            process_text = self.process_queue.get_nowait()
-            self.process_list.config(state="normal")
-            self.process_list.delete(1.0, tk.END)
-            self.process_list.insert(tk.END, process_text)
-            self.process_list.config(state="disabled")
+            while True:
+                records = self.process_queue.get_nowait()
         except queue.Empty:
             pass
+        if records is not None:
+            with self.instruments.span('render.processes'):
+                self.process_table.set_records(records)
 
         self.root.after(1000, self.update_process_info)
 
     def export_top_processes(self):
-        """Export the current list of processes to a file."""
+        """Export the first PROCESS_EXPORT_COUNT processes, in table order, to a file."""
         try:
-            process_text = self.process_list.get(1.0, tk.END).strip()
-
-            if not process_text:
+            records = self.process_table.ordered(self.PROCESS_EXPORT_COUNT)
+            if not records:
                 messagebox.showwarning("Export Failed", "No processes to export.")
                 return
 
+            process_text = "\n".join(
+                f"PID: {proc['pid']:>6} | {proc['name']:<20} | "
+                f"CPU: {proc['cpu_percent_normalized']:>6.2f}% | "
+                f"Memory: {proc['memory_percent']:>6.2f}% | "
+                f"I/O: {format_rate(proc['io_bytes_per_sec']):>10}"
+                for proc in records
+            )
+            history_text = format_process_history(self.process_history, records)
+            if history_text:
+                process_text += "\n\n" + history_text
+
             with open("top_processes.txt", "w") as file:
                 file.write(process_text)
                 messagebox.showinfo("Export Successful", 
@@ -108,20 +178,9 @@ class ResourceMonitor:
 
     def start_monitoring(self):
         if not self.monitoring:
-            self.monitoring = True
-
-            # Start monitoring threads
-            self.monitor_thread = threading.Thread(target=monitor_resources, 
-                                                 args=(self,), daemon=True)
-            self.graph_thread = threading.Thread(target=update_graph, 
-                                               args=(self,), daemon=True)
-            self.monitor_thread.start()
-            self.graph_thread.start()
-
-            if hasattr(self, 'monitor_top_processes'):
-                self.process_monitoring_thread = threading.Thread(
-                    target=self.monitor_top_processes, daemon=True)
-                self.process_monitoring_thread.start()
+            # Sampling runs in the background, drawing stays on the Tk thread
+            self.start_collecting()
+            self.schedule_frame()
 
             # Update GUI state
             self.start_button.config(state="disabled")
@@ -130,60 +189,51 @@ class ResourceMonitor:
                                    foreground="#107c10")
 
     def stop_monitoring(self):
-        self.monitoring = False
+        self.stop_collecting()
+        if self._frame_job is not None:
+            self.root.after_cancel(self._frame_job)
+            self._frame_job = None
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
         self.status_label.config(text="🔴 Monitoring Stopped", 
                                foreground="#d13438")
 
-    def monitor_top_processes(self):
-        """Monitor all processes and order them by CPU usage."""
-        def monitor_chunk(process_chunk):
-            processes = []
-            for proc in process_chunk:
-                try:
-                    cpu_percent = proc.info['cpu_percent'] / psutil.cpu_count()
-                    proc.info['cpu_percent_normalized'] = cpu_percent
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-            return processes
-
-        while self.monitoring:
-            try:
-                all_processes = list(psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']))
-
-                chunk_size = max(1, len(all_processes) // 5)
-                process_chunks = [all_processes[i:i + chunk_size] 
-                                for i in range(0, len(all_processes), chunk_size)]
-
-                with ThreadPoolExecutor(max_workers=5) as executor:
-                    results = executor.map(monitor_chunk, process_chunks)
-
-                all_sorted_processes = sorted(
-                    [proc for chunk in results for proc in chunk],
-                    key=lambda p: p['cpu_percent_normalized'],
-                    reverse=True
-                )[:20]  # Top 20 processes
-
-                process_text = "\n".join(
-                    f"PID: {proc['pid']:>6} | {proc['name']:<20} | "
-                    f"CPU: {proc['cpu_percent_normalized']:>6.2f}% | "
-                    f"Memory: {proc['memory_percent']:>6.2f}%"
-                    for proc in all_sorted_processes
-                )
-
-                self.process_queue.put(process_text)
-
-            except Exception as e:
-                messagebox.showerror("Error", 
-                                   f"Error monitoring processes: {e}")
-
-            time.sleep(2)
+    def publish_processes(self, records):
+        """Hand each process scan to the Tk thread; the table sorts it there."""
+        self.process_queue.put(records)
 
     def export_data(self):
-        export_data(self)
+        if self.export_job is not None and not self.export_job.done.is_set():
+            messagebox.showinfo("Export Running", "An export is already in progress.")
+            return
+        try:
+            self.export_job = export_data(self)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Export Failed", str(e))
+            return
+        if self.export_job is not None:
+            self.export_progress['value'] = 0
+            self.export_progress.pack(side="left", padx=5)
+            self.watch_export()
+
+    def watch_export(self):
+        """Follow the background export from the Tk thread"""
+        job = self.export_job
+        self.export_progress['value'] = job.progress
+        if not job.done.is_set():
+            self.root.after(100, self.watch_export)
+            return
+        self.export_progress.pack_forget()
+        if job.error is not None:
+            messagebox.showerror("Export Failed", f"An error occurred while exporting: {job.error}")
+        else:
+            messagebox.showinfo("Export Complete",
+                                f"Exported {job.rows} samples to '{job.path}' "
+                                f"in {job.elapsed:.1f}s")
 
     def cleanup(self):
-        self.monitoring = False
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_job.done.wait(timeout=2)
+        self.shutdown()
         self.root.quit()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from monitor.alerts import AlertEngine, AlertRule
+
+
+def run(engine, series, start=0.0, step=1.0, column='cpu'):
+    """Feed ``series`` one sample per ``step`` seconds; returns the sample
+    indices at which some rule started firing"""
+    fired = []
+    for i, value in enumerate(series):
+        if engine.evaluate({column: value}, start + i * step):
+            fired.append(i)
+    return fired
+
+
+def test_sustained_fires_once_after_the_duration_and_resets_below():
+    engine = AlertEngine([AlertRule('hot', 'cpu', 'sustained', 80, duration=10)])
+    # 15 s above, one dip, then 10 s above again
+    series = [90] * 15 + [50] + [90] * 11
+    assert run(engine, series) == [10, 26]
+
+
+def test_sustained_threshold_follows_the_setting():
+    settings = SimpleNamespace(CPU_THRESHOLD=95)
+    engine = AlertEngine([AlertRule('hot', 'cpu', 'sustained', 'CPU_THRESHOLD')], settings)
+    assert run(engine, [90, 90]) == []
+    settings.CPU_THRESHOLD = 85
+    assert engine.evaluate({'cpu': 90}, 2.0)
+
+
+def test_rate_compares_against_the_start_of_the_window():
+    engine = AlertEngine([AlertRule('climb', 'memory', 'rate', 2, window=10)])
+    # Flat, then climbing 3 points per second
+    series = [40] * 20 + [40 + 3 * i for i in range(1, 11)]
+    fired = run(engine, series, column='memory')
+    # 40 at the window start, so beyond 2/s once 20 points up: the 7th step
+    assert fired == [26]
+    assert engine.values[0] == pytest.approx(3.0)
+
+
+def test_rate_below_catches_a_drop():
+    engine = AlertEngine([AlertRule('drop', 'memory', 'rate', -4, window=4, below=True)])
+    assert run(engine, [80, 80, 80, 80, 80, 60], column='memory') == [5]
+
+
+def test_p95_over_the_window_then_clears_as_it_slides():
+    engine = AlertEngine([AlertRule('busy', 'cpu', 'p95', 80, window=100)])
+    # 10 % of the window at 95: the p95 is beyond 80
+    series = ([20] * 9 + [95]) * 10
+    fired = run(engine, series)
+    assert fired and engine.active() == ['busy']
+    assert engine.values[0] == pytest.approx(95.5)
+    # Once every high sample has slid out of the window the rule clears
+    run(engine, [20] * 100, start=100.0)
+    assert engine.active() == []
+    assert engine.values[0] == pytest.approx(20.5)
+
+
+def test_p95_weights_samples_by_the_time_they_stand_for():
+    engine = AlertEngine([AlertRule('busy', 'cpu', 'p95', 80, window=600)])
+    # Ten quick high samples are a few seconds; the low one held a minute outweighs them
+    for i in range(10):
+        engine.evaluate({'cpu': 95}, 0.1 * i)
+    engine.evaluate({'cpu': 10}, 60.0)
+    engine.evaluate({'cpu': 10}, 120.0)
+    assert engine.values[0] < 80
+
+
+def test_hysteresis_holds_until_the_clear_level_and_rearms():
+    engine = AlertEngine([AlertRule('hot', 'cpu', 'hysteresis', 90, clear=70)])
+    # Fires at 95, stays active above 70, clears at 65, fires again at 95
+    series = [50, 95, 85, 75, 65, 85, 95]
+    fired = []
+    active = []
+    for i, value in enumerate(series):
+        if engine.evaluate({'cpu': value}, float(i)):
+            fired.append(i)
+        active.append(bool(engine.active()))
+    assert fired == [1, 6]
+    assert active == [False, True, True, True, False, False, True]
+
+
+def test_missing_values_never_fire():
+    engine = AlertEngine([AlertRule('hot', 'gpu', 'sustained', 10),
+                          AlertRule('busy', 'gpu', 'p95', 10)])
+    assert run(engine, [math.nan] * 5, column='gpu') == []
+
+
+def test_headroom_skips_rate_rules():
+    engine = AlertEngine([AlertRule('hot', 'cpu', 'sustained', 80),
+                          AlertRule('climb', 'cpu', 'rate', 2, window=10)])
+    run(engine, [60, 60])
+    headroom = engine.headroom()
+    assert headroom[0] == pytest.approx(0.2)
+    assert np.isnan(headroom[1])
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        AlertRule('x', 'cpu', 'average', 80)
@@ -0,0 +1,44 @@
+import csv
+
+import numpy as np
+
+from monitor.export import ExportJob, RollupExportJob
+from monitor.history import HistoryBuffer
+from monitor.rollup import RollupStore
+
+START = 1700000040.0  # on a minute boundary
+
+
+def filled_rollups(minutes=30):
+    history = HistoryBuffer(['cpu', 'memory'], capacity=60)
+    rollups = RollupStore(history, ['cpu', 'memory'])
+    timestamps = START + np.arange(minutes * 60.0)
+    values = {'cpu': np.full(len(timestamps), 40.0), 'memory': np.full(len(timestamps), 60.0)}
+    history.extend((timestamps * 1000).astype(np.int64), values)
+    rollups.extend(timestamps, values)
+    return rollups
+
+
+def test_rollup_export_runs_as_a_job(tmp_path):
+    path = str(tmp_path / 'rollups.csv')
+    job = RollupExportJob(filled_rollups(), path, START, START + 1800, max_points=100)
+    job.start()
+    assert job.done.wait(timeout=10)
+    assert job.error is None and job.progress == 1.0
+
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["Time"] + [f"{label} {stat}" for label in ("CPU (%)", "Memory (%)")
+                                  for stat in ("min", "avg", "max", "p95")]
+    assert len(rows) - 1 == job.rows == job.total <= 100
+    assert rows[1][1:] == ['40.00'] * 4 + ['60.00'] * 4
+
+
+def test_raw_export_streams_every_held_sample(tmp_path):
+    history = filled_rollups().raw
+    path = str(tmp_path / 'raw.csv')
+    job = ExportJob(history, path, chunk_rows=7)
+    job.run()
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert job.error is None and job.rows == len(rows) - 1 == 60
@@ -0,0 +1,83 @@
+import numpy as np
+
+from monitor.history import HistoryBuffer
+
+
+def filled(count, capacity=5):
+    """Buffer that had ``count`` samples appended, one second apart"""
+    buffer = HistoryBuffer(['cpu'], capacity=capacity)
+    for i in range(count):
+        buffer.append({'cpu': float(i)}, timestamp=1000 + i)
+    return buffer
+
+
+def test_ring_wraps_and_keeps_the_newest_samples_in_order():
+    buffer = filled(8)
+    assert len(buffer) == 5
+    assert buffer.version == 8
+    assert buffer.view('cpu').tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert buffer.timestamps_view().tolist() == [1003000, 1004000, 1005000, 1006000, 1007000]
+    assert buffer.view('cpu', 2).tolist() == [6.0, 7.0]
+    assert buffer.latest('cpu') == 7.0
+
+
+def test_extend_past_capacity_matches_appending():
+    buffer = filled(3)
+    buffer.extend(np.arange(1003, 1010) * 1000, {'cpu': np.arange(3.0, 10.0)})
+    reference = filled(10)
+    assert buffer.version == reference.version
+    np.testing.assert_array_equal(buffer.view('cpu'), reference.view('cpu'))
+    np.testing.assert_array_equal(buffer.timestamps_view(), reference.timestamps_view())
+
+
+def test_views_are_read_only_and_reads_are_copies():
+    buffer = filled(3)
+    assert not buffer.view('cpu').flags.writeable
+    timestamps, values = buffer.read(['cpu'])
+    values['cpu'][:] = -1
+    assert buffer.view('cpu').tolist() == [0.0, 1.0, 2.0]
+
+
+def test_column_added_later_reads_nan_before_it_existed():
+    buffer = filled(2)
+    buffer.add_column('memory')
+    buffer.append({'cpu': 2.0, 'memory': 50.0}, timestamp=1002)
+    values = buffer.view('memory').tolist()
+    assert np.isnan(values[:2]).all() and values[2] == 50.0
+
+
+def test_read_since_across_the_wrap():
+    buffer = filled(8)
+    timestamps, values = buffer.read_since(['cpu'], 1005)
+    assert timestamps.tolist() == [1005000, 1006000, 1007000]
+    assert values['cpu'].tolist() == [5.0, 6.0, 7.0]
+    # Before the oldest held sample: everything held; after the newest: nothing
+    assert buffer.read_since(['cpu'], 0)[1]['cpu'].tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert len(buffer.read_since(['cpu'], 2000)[0]) == 0
+
+
+def test_sequence_numbers_survive_new_samples():
+    buffer = filled(4)
+    first, stop = buffer.sequence_range(1002, 1003)
+    assert (first, stop) == (2, 4)
+    buffer.append({'cpu': 4.0}, timestamp=1004)
+    buffer.append({'cpu': 5.0}, timestamp=1005)
+    read_from, timestamps, values = buffer.read_sequence(['cpu'], first, stop)
+    assert read_from == 2 and values['cpu'].tolist() == [2.0, 3.0]
+    # Overwritten samples are skipped
+    for i in range(6, 9):
+        buffer.append({'cpu': float(i)}, timestamp=1000 + i)
+    read_from, timestamps, values = buffer.read_sequence(['cpu'], first, stop)
+    assert read_from == 4 and len(timestamps) == 0
+
+
+def test_prepend_puts_older_samples_in_front():
+    buffer = filled(2)
+    buffer.prepend(np.array([990000, 991000]), {'cpu': np.array([-2.0, -1.0])})
+    assert buffer.view('cpu').tolist() == [-2.0, -1.0, 0.0, 1.0]
+    assert buffer.timestamps_view().tolist() == [990000, 991000, 1000000, 1001000]
+    assert buffer.version == 4
+
+    # Only the newest ``capacity`` samples overall are kept
+    buffer.prepend(np.array([980000, 981000]), {'cpu': np.array([-4.0, -3.0])})
+    assert buffer.view('cpu').tolist() == [-3.0, -2.0, -1.0, 0.0, 1.0]
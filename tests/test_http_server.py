@@ -0,0 +1,43 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from monitor.http_server import MetricsServer
+
+
+class BrokenServer(MetricsServer):
+    ROUTES = dict(MetricsServer.ROUTES, **{
+        '/broken': ('application/json', lambda c, p: 1 / 0),
+        '/bad': ('application/json', lambda c, p: int(p['n'][0])),
+    })
+
+
+def make_server():
+    return BrokenServer(SimpleNamespace(history=SimpleNamespace(version=0)))
+
+
+def test_unexpected_error_is_a_json_500(caplog):
+    status, content_type, body = make_server()._render('/broken')
+    assert status == '500 Internal Server Error'
+    assert content_type == 'application/json'
+    assert json.loads(body) == {'error': 'ZeroDivisionError: division by zero'}
+    assert 'HTTP /broken failed' in caplog.text
+
+
+def test_bad_parameters_are_a_400():
+    status, _, _ = make_server()._render('/bad?n=x')
+    assert status == '400 Bad Request'
+    status, _, _ = make_server()._render('/missing')
+    assert status == '404 Not Found'
+
+
+def test_start_raises_when_the_port_is_taken():
+    first = MetricsServer(SimpleNamespace(history=SimpleNamespace(version=0)), port=0)
+    first.start()
+    try:
+        second = MetricsServer(first.collector, port=first.port)
+        with pytest.raises(OSError):
+            second.start()
+    finally:
+        first.stop()
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+
+from monitor.history import HistoryBuffer
+from monitor.io_rates import DISK_FIELDS, PARTITION_PATTERN, CounterRates
+from monitor.monitor import disk_values
+
+DiskCounters = namedtuple('DiskCounters', DISK_FIELDS)
+
+
+def collector(max_devices=4):
+    return SimpleNamespace(history=HistoryBuffer([]), io_devices={'disk': [], 'net': []},
+                           IO_MAX_DEVICES=max_devices, storage=None)
+
+
+def test_per_disk_throughput_and_iops():
+    rates = CounterRates(DISK_FIELDS, PARTITION_PATTERN)
+    rates.update({'sda': DiskCounters(0, 0, 0, 0), 'sda1': DiskCounters(0, 0, 0, 0)}, 0.0)
+    rates.update({'sda': DiskCounters(4096, 8192, 10, 30),
+                  'sda1': DiskCounters(4096, 8192, 10, 30)}, 2.0)
+    owner = collector()
+    values = disk_values(owner, rates)
+
+    # The partition repeats its disk: no column, not in the totals
+    assert owner.io_devices['disk'] == ['sda']
+    assert values == pytest.approx({
+        'disk_read': 2048, 'disk_write': 4096, 'disk_iops': 20,
+        'disk_sda_read': 2048, 'disk_sda_write': 4096,
+        'disk_sda_read_ops': 5, 'disk_sda_write_ops': 15})
+    assert set(values) - {'disk_read', 'disk_write', 'disk_iops'} <= set(owner.history.columns)
+
+
+def test_only_the_first_devices_get_columns():
+    rates = CounterRates(DISK_FIELDS, PARTITION_PATTERN)
+    rates.update({f'sd{c}': DiskCounters(0, 0, 0, 0) for c in 'abc'}, 0.0)
+    owner = collector(max_devices=2)
+    disk_values(owner, rates)
+    assert owner.io_devices['disk'] == ['sda', 'sdb']
+    assert 'disk_sdc_read_ops' not in owner.history.columns
@@ -0,0 +1,28 @@
+from monitor.process_history import ProcessHistoryStore
+
+
+def scan(**cpu):
+    """Process records named by pid letter with the given CPU percentages"""
+    return [{'pid': name, 'create_time': 0.0, 'cpu_percent_normalized': value,
+             'rss': 1024.0, 'io_bytes_per_sec': None} for name, value in cpu.items()]
+
+
+def test_busy_newcomer_evicts_only_outside_the_top_slots():
+    store = ProcessHistoryStore(slots=2, length=10)
+    for _ in range(5):
+        store.update(scan(A=40, B=30))
+    store.update(scan(C=50, A=40, B=0))
+
+    assert len(store.series(('A', 0.0))) == 6
+    assert len(store.series(('C', 0.0))) == 1
+    assert ('B', 0.0) not in store
+
+
+def test_exited_processes_free_their_slot():
+    store = ProcessHistoryStore(slots=2, length=10)
+    store.update(scan(A=40, B=30))
+    store.update(scan(A=40, C=0))
+    # B exited, so even an idle newcomer gets its slot
+    assert ('B', 0.0) not in store
+    assert len(store.series(('C', 0.0))) == 1
+    assert len(store.series(('A', 0.0))) == 2
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from monitor.processes import ProcessTracker
+from monitor.procfs import PROCFS_AVAILABLE
+
+SCANNERS = ['psutil'] + (['procfs'] if PROCFS_AVAILABLE else [])
+
+
+def own_record(tracker):
+    return next(record for record in tracker.records() if record['pid'] == os.getpid())
+
+
+@pytest.mark.parametrize('scanner', SCANNERS)
+def test_first_scan_fills_memory(scanner):
+    tracker = ProcessTracker(scanner=scanner)
+    tracker.scan()
+    record = own_record(tracker)
+    assert record['rss'] > 0
+    assert 0 < record['memory_percent'] < 100
+    assert record['cpu_percent_normalized'] == 0.0
+
+
+@pytest.mark.skipif(not PROCFS_AVAILABLE, reason="needs /proc")
+def test_scanners_agree_after_one_scan():
+    portable, procfs = ProcessTracker(scanner='psutil'), ProcessTracker(scanner='procfs')
+    portable.scan()
+    procfs.scan()
+    slow, fast = own_record(portable), own_record(procfs)
+    assert slow['name'] == fast['name']
+    assert slow['create_time'] == pytest.approx(fast['create_time'], abs=0.01)
+    assert slow['rss'] == pytest.approx(fast['rss'], rel=0.1)
@@ -0,0 +1,45 @@
+import pytest
+
+from monitor.collector import Collector
+from monitor.monitor import record_sample
+from monitor.storage import SegmentLog, list_segments
+
+START = 1700000040.0
+
+
+@pytest.fixture
+def collector(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    for i in range(10):
+        log.append(['cpu', 'memory'], {'cpu': float(i), 'memory': 50.0}, START + i)
+    log.close()
+
+    c = Collector({'STORAGE_ENABLED': False})
+    c.storage = SegmentLog(str(tmp_path))
+    yield c
+    c.shutdown()
+    c.storage.close()
+
+
+def test_restored_samples_go_in_front_of_live_ones(collector):
+    segments = list_segments(collector.storage.directory)
+    record_sample(collector, {'cpu': 100.0, 'memory': 60.0}, START + 20)
+    collector.restore_history(segments)
+
+    timestamps, values = collector.history.read(['cpu'])
+    assert timestamps.tolist() == [int((START + i) * 1000) for i in range(10)] + \
+        [int((START + 20) * 1000)]
+    assert values['cpu'].tolist() == [float(i) for i in range(10)] + [100.0]
+    minute = collector.rollups.query('cpu', START, START + 60, max_points=1000)
+    assert minute['max'].max() == 100.0
+
+
+def test_overlap_with_live_samples_keeps_the_older_part(collector):
+    segments = list_segments(collector.storage.directory)
+    for i in (5, 6):
+        record_sample(collector, {'cpu': 100.0 + i, 'memory': 60.0}, START + i)
+    collector.restore_history(segments)
+
+    timestamps, values = collector.history.read(['cpu'])
+    assert values['cpu'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 105.0, 106.0]
+    assert (timestamps[1:] > timestamps[:-1]).all()
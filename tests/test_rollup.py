@@ -0,0 +1,85 @@
+import numpy as np
+
+from monitor.history import HistoryBuffer
+from monitor.rollup import RollupStore, reduce_points
+
+COLUMNS = ['cpu', 'memory']
+START = 1700000040.0  # on a minute boundary
+
+
+def samples():
+    """Half an hour of unevenly spaced samples with gaps in one column"""
+    rng = np.random.default_rng(7)
+    steps = rng.choice([0.5, 1.0, 1.0, 2.0, 5.0], size=1200)
+    timestamps = START + 17 + np.cumsum(steps)
+    cpu = 50 + 40 * np.sin(timestamps / 37) + rng.normal(0, 2, size=len(timestamps))
+    memory = np.where(rng.random(len(timestamps)) < 0.1, np.nan,
+                      50 + 10 * np.sin(np.arange(len(timestamps)) / 50))
+    return timestamps, {'cpu': cpu, 'memory': memory}
+
+
+def rollups():
+    return RollupStore(HistoryBuffer(COLUMNS, capacity=10), COLUMNS)
+
+
+def buckets(store):
+    for tier in store.tiers:
+        tier.flush()
+    minute = store.tiers[0].buckets
+    return minute.timestamps_view(), {
+        f"{name}:{stat}": minute.view(f"{name}:{stat}")
+        for name in COLUMNS for stat in ('min', 'avg', 'max', 'p95')}
+
+
+def test_batch_extend_matches_incremental_add():
+    timestamps, values = samples()
+    incremental, batch = rollups(), rollups()
+    for i, timestamp in enumerate(timestamps):
+        incremental.add({name: values[name][i] for name in COLUMNS}, timestamp)
+    # Split mid-bucket so the open bucket carries over between calls
+    half = len(timestamps) // 2 + 3
+    batch.extend(timestamps[:half], {name: v[:half] for name, v in values.items()})
+    batch.extend(timestamps[half:], {name: v[half:] for name, v in values.items()})
+
+    expected_times, expected = buckets(incremental)
+    times, actual = buckets(batch)
+    np.testing.assert_array_equal(times, expected_times)
+    for name in COLUMNS:
+        for stat in ('min', 'avg', 'max'):
+            np.testing.assert_allclose(actual[f"{name}:{stat}"], expected[f"{name}:{stat}"],
+                                       rtol=1e-5, err_msg=f"{name}:{stat}")
+        # Exact percentile in the batch path, P² estimate in the streaming one
+        np.testing.assert_allclose(actual[f"{name}:p95"], expected[f"{name}:p95"],
+                                   atol=5, err_msg=f"{name}:p95")
+
+
+def test_bucket_average_is_time_weighted():
+    store = rollups()
+    # 50 for 50 seconds, then 100 for 10 seconds of the same minute
+    store.add({'cpu': 50.0}, START)
+    store.add({'cpu': 100.0}, START + 50)
+    store.add({'cpu': 100.0}, START + 60)
+    _, stats = buckets(store)
+    assert stats['cpu:min'][0] == 50.0 and stats['cpu:max'][0] == 100.0
+    # The first sample stands for one second: (50 * 1 + 100 * 50) / 51
+    np.testing.assert_allclose(stats['cpu:avg'][0], (50 + 100 * 50) / 51, rtol=1e-6)
+
+
+def test_query_falls_back_to_minute_buckets():
+    timestamps, values = samples()
+    store = rollups()
+    store.extend(timestamps, values)
+    series = store.query('cpu', START, timestamps[-1], max_points=100)
+    assert 0 < len(series['timestamps']) <= 100
+    assert (np.diff(series['timestamps']) >= 60000).all()
+
+
+def test_reduce_points_merges_as_a_time_average():
+    series = {'timestamps': np.arange(4) * 1000, 'min': np.array([0.0, 10, 20, 30]),
+              'avg': np.array([0.0, 10, 20, 30]), 'max': np.array([0.0, 10, 20, 30]),
+              'p95': np.array([0.0, 10, 20, 30])}
+    reduced = reduce_points(series, 2, weights=np.array([1.0, 3.0, 1.0, 1.0]))
+    assert reduced['timestamps'].tolist() == [0, 2000]
+    assert reduced['min'].tolist() == [0.0, 20.0]
+    assert reduced['max'].tolist() == [10.0, 30.0]
+    np.testing.assert_allclose(reduced['avg'], [7.5, 25.0])
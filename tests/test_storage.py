@@ -0,0 +1,81 @@
+import math
+import os
+
+import numpy as np
+
+from monitor import storage
+from monitor.storage import SegmentLog, SegmentReader, list_segments
+
+
+def read_back(log):
+    """(columns, timestamps, values per column) of every segment, oldest first"""
+    return [(segment.columns, records['ts'].tolist(),
+             {name: records[name].tolist() for name in segment.columns})
+            for segment, records in log.read_recent(10 ** 6)]
+
+
+def test_two_rolls_in_one_millisecond_keep_segments_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage.time, 'time', lambda: 1700000000.0)
+    log = SegmentLog(str(tmp_path))
+    log.append(['cpu'], {'cpu': 1.0}, 1700000000.0)
+    log.append(['cpu', 'memory'], {'cpu': 2.0, 'memory': 3.0}, 1700000000.0)  # roll
+    log.append(['cpu'], {'cpu': 4.0}, 1700000000.0)  # roll again, same millisecond
+    log.close()
+
+    assert len(list_segments(str(tmp_path))) == 3
+    assert read_back(log) == [
+        (['cpu'], [1700000000000], {'cpu': [1.0]}),
+        (['cpu', 'memory'], [1700000000000], {'cpu': [2.0], 'memory': [3.0]}),
+        (['cpu'], [1700000000000], {'cpu': [4.0]}),
+    ]
+
+
+def test_write_rotate_read_round_trip(tmp_path):
+    log = SegmentLog(str(tmp_path), max_bytes=200)
+    log.set_meta(gpu_devices={'0': 'Test GPU'})
+    for i in range(40):
+        log.append(['cpu', 'memory'], {'cpu': float(i), 'memory': math.nan},
+                   1700000000.0 + i)
+    log.close()
+
+    segments = list_segments(str(tmp_path))
+    assert len(segments) > 1
+    assert SegmentReader(segments[0]).meta == {'gpu_devices': {'0': 'Test GPU'}}
+
+    chunks = read_back(log)
+    timestamps = [ts for _, chunk, _ in chunks for ts in chunk]
+    cpu = [value for _, _, values in chunks for value in values['cpu']]
+    assert timestamps == [1700000000000 + 1000 * i for i in range(40)]
+    assert cpu == [float(i) for i in range(40)]
+    assert all(math.isnan(value) for _, _, values in chunks for value in values['memory'])
+
+    # Range reads cross segment boundaries
+    ranged = [ts for _, records in log.read_range(1700000010, 1700000019)
+              for ts in records['ts']]
+    assert ranged == [1700000000000 + 1000 * i for i in range(10, 20)]
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    for i in range(3):
+        log.append(['cpu'], {'cpu': float(i)}, 1700000000.0 + i)
+    log.close()
+    path = list_segments(str(tmp_path))[0]
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    segment = SegmentReader(path)
+    assert len(segment) == 3
+    np.testing.assert_array_equal(segment.records['cpu'], [0.0, 1.0, 2.0])
+
+
+def test_retention_deletes_oldest_segments(tmp_path):
+    log = SegmentLog(str(tmp_path), max_bytes=100, retention_bytes=400)
+    for i in range(100):
+        log.append(['cpu'], {'cpu': float(i)}, 1700000000.0 + i)
+    log.close()
+
+    segments = list_segments(str(tmp_path))
+    assert sum(os.path.getsize(path) for path in segments[:-1]) <= 400
+    # The newest records survive
+    assert read_back(log)[-1][2]['cpu'][-1] == 99.0
@@ -1,48 +1,42 @@
 import os
 import platform
 import psutil
-import csv
-from tkinter import filedialog
+import time
 
-try:
-    import GPUtil
-    GPU_AVAILABLE = True
-except ImportError:
-    GPU_AVAILABLE = False
+from monitor.export import ExportJob, PARQUET_AVAILABLE, RollupExportJob
 
 def export_data(self):
-    """Export monitoring data to CSV with GPU information"""
+    """Ask for a file and start streaming the history to it in the background.
+
+    With a graph range selected, only that range is exported; CSV exports
+    of ranges that reach back past the raw history get rollups instead.
+    Returns the started ExportJob, or None.
+    """
+    from tkinter import filedialog
+    filetypes = [("CSV files", "*.csv"), ("NDJSON files", "*.ndjson"),
+                 ("NumPy archive", "*.npz")]
+    if PARQUET_AVAILABLE:
+        filetypes.append(("Parquet files", "*.parquet"))
     file_path = filedialog.asksaveasfilename(
         defaultextension=".csv", 
-        filetypes=[("CSV files", "*.csv")],
+        filetypes=filetypes,
         title="Save monitoring data"
     )
-    
-    if file_path:
-        with open(file_path, "w", newline='') as file:
-            writer = csv.writer(file)
-            
-            # Write headers
-            headers = ["Time", "CPU (%)", "Memory (%)"]
-            if GPU_AVAILABLE:
-                headers.extend(["GPU (%)", "GPU Memory (%)"])
-            writer.writerow(headers)
-            
-            # Write data
-            for i in range(len(self.all_time_history)):
-                row = [
-                    self.all_time_history[i], 
-                    self.all_cpu_history[i], 
-                    self.all_memory_history[i]
-                ]
-                
-                if GPU_AVAILABLE and i < len(self.all_gpu_history):
-                    row.extend([
-                        self.all_gpu_history[i], 
-                        self.all_gpu_memory_history[i]
-                    ])
-                
-                writer.writerow(row)
+    if not file_path:
+        return None
+
+    start = None
+    if self.GRAPH_RANGE:
+        now = time.time()
+        start = now - self.GRAPH_RANGE
+        oldest = self.history.timestamps_view(len(self.history))[:1]
+        too_long = not len(oldest) or oldest[0] / 1000 > start
+        if too_long and file_path.lower().endswith('.csv'):
+            return RollupExportJob(self.rollups, file_path, start, now,
+                                   self.GRAPH_MAX_POINTS,
+                                   instruments=self.instruments).start()
+    return ExportJob(self.history, file_path, start=start,
+                     instruments=self.instruments).start()
 
 def gather_system_info():
     """Gather comprehensive system information including GPU"""
@@ -62,7 +56,11 @@ def gather_system_info():
     
     # GPU info
     info.append("\n=== GPU INFORMATION ===")
-    if GPU_AVAILABLE:
+    try:
+        import GPUtil
+    except ImportError:
+        GPUtil = None
+    if GPUtil is not None:
         try:
             gpus = GPUtil.getGPUs()
             if gpus: